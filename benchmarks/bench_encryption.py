@@ -0,0 +1,105 @@
+# bench_encryption.py - Throughput of RC4 128-bit (PyPDF2) vs AES-256 (pikepdf/qpdf) encryption
+#
+# Encrypts a small text document and a large image document with both
+# engines of security_utils and reports the time and MB/s (of input) for
+# each. Every output is reopened with the user password to check it.
+#
+# AES-256 needs pikepdf or qpdf (see linearize_utils.py).
+#
+# Usage: python benchmarks/bench_encryption.py [small pages] [large pages]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pypdfium2 as pdfium
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+import linearize_utils
+import security_utils
+
+SETTINGS = {
+    "mode": "add_password",
+    "owner_password": "owner-secret",
+    "user_password": "user-secret",
+    "allow_printing": True,
+    "allow_copying": False,
+    "allow_modification": False,
+}
+
+
+def make_text_pdf(path, num_pages):
+    """Create a text PDF with the given number of pages"""
+    c = canvas.Canvas(path, pagesize=(612, 792))
+    for i in range(num_pages):
+        c.setFont("Helvetica", 14)
+        for line in range(40):
+            c.drawString(72, 720 - line * 16, f"Page {i + 1} line {line + 1} - the quick brown fox jumps over the lazy dog")
+        c.showPage()
+    c.save()
+
+
+def make_image_pdf(path, num_pages):
+    """Create a PDF with a large, incompressible image on every page"""
+    c = canvas.Canvas(path, pagesize=(612, 792))
+    for i in range(num_pages):
+        img = Image.frombytes("RGB", (640, 640), os.urandom(640 * 640 * 3))
+        c.drawImage(ImageReader(img), 72, 200, 468, 468)
+        c.drawString(72, 160, f"Page {i + 1}")
+        c.showPage()
+    c.save()
+
+
+def check_output(path, num_pages):
+    """Open the encrypted file with the user password and render page 1"""
+    pdf = pdfium.PdfDocument(path, password=SETTINGS["user_password"])
+    try:
+        assert len(pdf) == num_pages, f"{path}: {len(pdf)} pages, expected {num_pages}"
+        pdf[0].render(scale=0.2).to_pil()
+    finally:
+        pdf.close()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    small_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    large_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    if not security_utils.is_aes256_available():
+        print("AES-256 needs pikepdf (pip install pikepdf) or the qpdf tool.")
+        sys.exit(1)
+
+    engines = [
+        ("RC4 128-bit (PyPDF2)", dict(SETTINGS, encryption=security_utils.ENCRYPTION_RC4_128)),
+        ("AES-256", dict(SETTINGS, encryption=security_utils.ENCRYPTION_AES256)),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"AES-256 backend: {linearize_utils.get_linearizer()}")
+        print(f"{'document':<24} {'engine':<22} {'time':>8} {'MB/s':>8} {'output MB':>10}")
+        for label, make, num_pages in (("small (text)", make_text_pdf, small_pages),
+                                       ("large (images)", make_image_pdf, large_pages)):
+            source = os.path.join(tmp_dir, "source.pdf")
+            make(source, num_pages)
+            source_mb = os.path.getsize(source) / (1024 * 1024)
+            document = f"{label}, {num_pages} p"
+
+            for name, settings in engines:
+                output = os.path.join(tmp_dir, f"{settings['encryption']}.pdf")
+                seconds = timed(security_utils.process_pdf, source, output, settings)
+                check_output(output, num_pages)
+                print(f"{document:<24} {name:<22} {seconds:7.2f}s {source_mb / seconds:8.1f} "
+                      f"{os.path.getsize(output) / (1024 * 1024):10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# bench_linearize_latency.py - First-page latency of plain vs linearized PDFs over slow HTTP
+#
+# Serves a generated PDF and its linearized copy from a local HTTP server
+# that supports range requests and is throttled to a fixed bandwidth and
+# per-request latency. Each file is then opened the way a browser PDF
+# viewer does it: pdfium's progressive loader asks for the byte ranges it
+# needs, and the client fetches them with Range requests until page 1 can
+# be rendered. The full-download time is shown for comparison.
+#
+# Linearization needs pikepdf or qpdf (see linearize_utils.py).
+#
+# Usage: python benchmarks/bench_linearize_latency.py [pages] [KB/s] [latency ms]
+import ctypes
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+import linearize_utils
+
+# Size of the blocks the client asks for, like a viewer's range request granularity
+FETCH_CHUNK_SIZE = 64 * 1024
+
+
+def make_source_pdf(path, num_pages):
+    """Create a PDF with a large, incompressible image and some text on every page"""
+    c = canvas.Canvas(path, pagesize=(612, 792))
+    for i in range(num_pages):
+        img = Image.frombytes("RGB", (320, 320), os.urandom(320 * 320 * 3))
+        c.drawImage(ImageReader(img), 72, 300, 468, 468)
+        c.setFont("Helvetica", 14)
+        c.drawString(72, 260, f"Page {i + 1}")
+        c.showPage()
+    c.save()
+
+
+def make_handler(directory, bytes_per_second, latency):
+    """Build a request handler that serves directory with range support and throttling"""
+
+    class ThrottledRangeHandler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def _serve(self, send_body):
+            time.sleep(latency)
+            path = self.translate_path(self.path)
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                self.send_error(404)
+                return
+
+            start, end = 0, size - 1
+            range_header = self.headers.get("Range")
+            if range_header and range_header.startswith("bytes="):
+                first, _, last = range_header[6:].partition("-")
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            if not send_body:
+                return
+
+            # Send in small blocks, sleeping to hold the configured bandwidth
+            block_size = 16 * 1024
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    block = f.read(min(block_size, remaining))
+                    if not block:
+                        break
+                    self.wfile.write(block)
+                    remaining -= len(block)
+                    time.sleep(len(block) / bytes_per_second)
+
+    return ThrottledRangeHandler
+
+
+class RangeLoader:
+    """Fetches a remote file on demand with HTTP range requests, keeping what it has seen"""
+
+    def __init__(self, url):
+        self.url = url
+        request = urllib.request.Request(url, method="HEAD")
+        with urllib.request.urlopen(request) as response:
+            self.length = int(response.headers["Content-Length"])
+        self.data = bytearray(self.length)
+        self.chunks = set()  # Indices of FETCH_CHUNK_SIZE blocks already downloaded
+        self.requests = 0
+        self.bytes_fetched = 0
+
+    def _chunk_range(self, offset, size):
+        first = offset // FETCH_CHUNK_SIZE
+        last = (max(offset + size, offset + 1) - 1) // FETCH_CHUNK_SIZE
+        return range(first, min(last, (self.length - 1) // FETCH_CHUNK_SIZE) + 1)
+
+    def is_available(self, offset, size):
+        return all(chunk in self.chunks for chunk in self._chunk_range(offset, size))
+
+    def ensure(self, offset, size):
+        """Download every missing block in [offset, offset + size), one request per gap"""
+        missing = [chunk for chunk in self._chunk_range(offset, size) if chunk not in self.chunks]
+        while missing:
+            run_end = 0
+            while run_end + 1 < len(missing) and missing[run_end + 1] == missing[run_end] + 1:
+                run_end += 1
+            start = missing[0] * FETCH_CHUNK_SIZE
+            end = min((missing[run_end] + 1) * FETCH_CHUNK_SIZE, self.length) - 1
+
+            request = urllib.request.Request(self.url, headers={"Range": f"bytes={start}-{end}"})
+            with urllib.request.urlopen(request) as response:
+                body = response.read()
+            self.data[start:start + len(body)] = body
+            self.chunks.update(missing[:run_end + 1])
+            self.requests += 1
+            self.bytes_fetched += len(body)
+            missing = missing[run_end + 1:]
+
+
+def first_page_progressive(url):
+    """Render page 1 as soon as pdfium's progressive loader has the data it needs.
+
+    Returns (seconds, bytes fetched, requests, linearized).
+    """
+    start = time.perf_counter()
+    loader = RangeLoader(url)
+
+    # The ctypes callbacks must stay referenced until the document is closed
+    is_data_avail = pdfium_c.FX_FILEAVAIL._fields_[1][1](
+        lambda _, offset, size: loader.is_available(offset, size))
+    add_segment = pdfium_c.FX_DOWNLOADHINTS._fields_[1][1](
+        lambda _, offset, size: loader.ensure(offset, size))
+
+    def get_block(_, position, buffer, size):
+        loader.ensure(position, size)
+        ctypes.memmove(buffer, bytes(loader.data[position:position + size]), size)
+        return 1
+
+    get_block_func = pdfium_c.FPDF_FILEACCESS._fields_[1][1](get_block)
+    file_avail = pdfium_c.FX_FILEAVAIL(version=1, IsDataAvail=is_data_avail)
+    file_access = pdfium_c.FPDF_FILEACCESS(m_FileLen=loader.length, m_GetBlock=get_block_func)
+    hints = pdfium_c.FX_DOWNLOADHINTS(version=1, AddSegment=add_segment)
+
+    avail = pdfium_c.FPDFAvail_Create(ctypes.byref(file_avail), ctypes.byref(file_access))
+    try:
+        while pdfium_c.FPDFAvail_IsDocAvail(avail, ctypes.byref(hints)) == pdfium_c.PDF_DATA_NOTAVAIL:
+            pass
+        linearized = pdfium_c.FPDFAvail_IsLinearized(avail) == pdfium_c.PDF_LINEARIZED
+        raw_doc = pdfium_c.FPDFAvail_GetDocument(avail, None)
+        if not raw_doc:
+            raise RuntimeError("pdfium could not open the document")
+
+        first_page = pdfium_c.FPDFAvail_GetFirstPageNum(raw_doc)
+        while pdfium_c.FPDFAvail_IsPageAvail(avail, first_page, ctypes.byref(hints)) == pdfium_c.PDF_DATA_NOTAVAIL:
+            pass
+
+        pdf = pdfium.PdfDocument(raw_doc)
+        try:
+            page = pdf[first_page]
+            page.render(scale=1).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+    finally:
+        pdfium_c.FPDFAvail_Destroy(avail)
+
+    return time.perf_counter() - start, loader.bytes_fetched, loader.requests, linearized
+
+
+def full_download(url):
+    """Download the whole file with one request; returns seconds"""
+    start = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def main():
+    num_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    kilobytes_per_second = float(sys.argv[2]) if len(sys.argv) > 2 else 2048
+    latency_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 40
+
+    if not linearize_utils.is_linearization_available():
+        print("Linearization needs pikepdf (pip install pikepdf) or the qpdf tool.")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plain = os.path.join(tmp_dir, "plain.pdf")
+        linear = os.path.join(tmp_dir, "linearized.pdf")
+        make_source_pdf(plain, num_pages)
+        linearize_utils.linearize_pdf(plain, linear)
+
+        handler = make_handler(tmp_dir, kilobytes_per_second * 1024, latency_ms / 1000)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        try:
+            print(f"{num_pages} pages, {kilobytes_per_second:.0f} KB/s, {latency_ms:.0f} ms per request "
+                  f"(backend: {linearize_utils.get_linearizer()})")
+            print(f"{'file':<12} {'size KB':>9} {'full download':>14} {'first page':>11} {'fetched KB':>11} {'requests':>9}")
+            for path in (plain, linear):
+                url = f"{base_url}/{os.path.basename(path)}"
+                seconds, fetched, requests, linearized = first_page_progressive(url)
+                name = "linearized" if linearized else "plain"
+                print(f"{name:<12} {os.path.getsize(path) / 1024:9.0f} {full_download(url):13.2f}s "
+                      f"{seconds:10.2f}s {fetched / 1024:11.0f} {requests:9d}")
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# bench_organizer_save.py - Compare the old and new PDF Organizer save paths
+#
+# Usage: python benchmarks/bench_organizer_save.py [pages]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyPDF2 import PdfReader, PdfWriter
+from reportlab.pdfgen import canvas
+
+import pdf_utils
+
+
+def make_source_pdf(path, num_pages):
+    """Create a text PDF with the given number of pages"""
+    c = canvas.Canvas(path, pagesize=(612, 792))
+    for i in range(num_pages):
+        c.setFont("Helvetica", 14)
+        for line in range(40):
+            c.drawString(72, 720 - line * 16, f"Page {i + 1} line {line + 1} - the quick brown fox jumps over the lazy dog")
+        c.showPage()
+    c.save()
+
+
+def make_page_list(path, num_pages):
+    """Reverse the document in chunks of 10, rotate every 7th page and add a few blank pages"""
+    entries = []
+    for chunk_start in range(0, num_pages, 10):
+        for page_idx in reversed(range(chunk_start, min(num_pages, chunk_start + 10))):
+            entries.append((path, page_idx, False, 90 if page_idx % 7 == 0 else 0))
+        if chunk_start % 100 == 0:
+            entries.append((None, 0, True, 0))
+    return entries
+
+
+def save_with_pypdf2(entries, output_path):
+    """The previous save path: a new PdfReader for every output page"""
+    writer = PdfWriter()
+    for pdf_path, page_idx, is_blank, rotation in entries:
+        if is_blank:
+            writer.add_blank_page(width=612, height=792)
+        else:
+            reader = PdfReader(pdf_path)
+            page = reader.pages[page_idx]
+            if rotation:
+                page.rotate(rotation)
+            writer.add_page(page)
+    with open(output_path, "wb") as f:
+        writer.write(f)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    num_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "source.pdf")
+        make_source_pdf(source, num_pages)
+        entries = make_page_list(source, num_pages)
+
+        old_output = os.path.join(tmp_dir, "old.pdf")
+        new_output = os.path.join(tmp_dir, "new.pdf")
+        old_time = timed(save_with_pypdf2, entries, old_output)
+        new_time = timed(pdf_utils.write_page_list, entries, new_output)
+
+        print(f"Source: {num_pages} pages, output: {len(entries)} pages")
+        print(f"PyPDF2, reader per page : {old_time:8.2f} s  {os.path.getsize(old_output) / 1024:10.1f} KB")
+        print(f"pdfium, runs per source : {new_time:8.2f} s  {os.path.getsize(new_output) / 1024:10.1f} KB")
+        print(f"Speedup: {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,25 @@ from PIL import Image, ImageTk
 import utils
 from styles import COLORS, FONTS
 
+# EXIF orientation tag and the canvas transform (a, b, c, d) that shows the
+# stored image upright, applied around the center of the image.
+# Orientations 5-8 swap the displayed width and height.
+EXIF_ORIENTATION_TAG = 0x0112
+EXIF_ORIENTATION_TRANSFORMS = {
+    2: (-1, 0, 0, 1),   # Mirrored horizontally
+    3: (-1, 0, 0, -1),  # Rotated 180
+    4: (1, 0, 0, -1),   # Mirrored vertically
+    5: (0, -1, -1, 0),  # Transposed
+    6: (0, -1, 1, 0),   # Rotated 90 clockwise
+    7: (0, 1, 1, 0),    # Transversed
+    8: (0, 1, -1, 0),   # Rotated 90 counterclockwise
+}
+
+# Image modes whose JPEG data can be embedded as is. CMYK JPEGs are decoded
+# instead, since Adobe files store inverted CMYK that viewers show differently.
+JPEG_PASSTHROUGH_MODES = ("L", "RGB")
+
+
 class ImageToPDFTab:
     def __init__(self, parent):
         # Create frame
@@ -384,7 +403,6 @@ class ImageToPDFTab:
             
             # Create PDF
             from reportlab.pdfgen import canvas
-            from reportlab.lib.utils import ImageReader
             
             c = canvas.Canvas(output_path, pagesize=(page_width, page_height))
             
@@ -406,25 +424,34 @@ class ImageToPDFTab:
                 self.frame.winfo_toplevel().after(0, lambda p=i+1, t=total_images: 
                     self.status_var.set(f"Processing image {p}/{t}: {os.path.basename(self.images_paths[i])}"))
                 
-                # Open image and get dimensions
-                img = Image.open(img_path)
-                img_width, img_height = img.size
-                
-                # Calculate maximum dimensions preserving aspect ratio
-                max_width = page_width - 2 * margin
-                max_height = page_height - 2 * margin
-                
-                # Calculate scaling factor
-                scale = min(max_width / img_width, max_height / img_height)
-                new_width = img_width * scale
-                new_height = img_height * scale
-                
-                # Calculate centered position
-                x_pos = (page_width - new_width) / 2
-                y_pos = (page_height - new_height) / 2
-                
-                # Draw image
-                c.drawImage(ImageReader(img), x_pos, y_pos, width=new_width, height=new_height)
+                # Open image (reads the header only) and get dimensions
+                with Image.open(img_path) as img:
+                    img_width, img_height = img.size
+                    orientation = img.getexif().get(EXIF_ORIENTATION_TAG, 1)
+                    transform = EXIF_ORIENTATION_TRANSFORMS.get(orientation)
+                    
+                    # Displayed size, after applying the EXIF orientation
+                    shown_width, shown_height = img_width, img_height
+                    if orientation in (5, 6, 7, 8):
+                        shown_width, shown_height = img_height, img_width
+                    
+                    # Calculate maximum dimensions preserving aspect ratio
+                    max_width = page_width - 2 * margin
+                    max_height = page_height - 2 * margin
+                    
+                    # Calculate scaling factor
+                    scale = min(max_width / shown_width, max_height / shown_height)
+                    new_width = img_width * scale
+                    new_height = img_height * scale
+                    
+                    # Draw image centered on the page, turned upright by the transform
+                    c.saveState()
+                    c.translate(page_width / 2, page_height / 2)
+                    if transform:
+                        c.transform(*transform, 0, 0)
+                    c.drawImage(self._image_source(img, img_path), -new_width / 2, -new_height / 2,
+                                width=new_width, height=new_height)
+                    c.restoreState()
                 
                 # Go to next page
                 c.showPage()
@@ -451,6 +478,18 @@ class ImageToPDFTab:
             # Re-enable controls
             self.frame.winfo_toplevel().after(0, lambda: utils.set_controls_state(self.frame, tk.NORMAL))
     
+    def _image_source(self, img, img_path):
+        """Return what to pass to drawImage for an opened image.
+        JPEGs are given by path, so reportlab embeds the original DCT data
+        without decoding it; everything else is decoded by PIL."""
+        from reportlab.lib.utils import ImageReader
+        
+        # reportlab only embeds a file as JPEG data based on its extension
+        ext = os.path.splitext(img_path)[1].lower()
+        if img.format == "JPEG" and img.mode in JPEG_PASSTHROUGH_MODES and ext in (".jpg", ".jpeg"):
+            return img_path
+        return ImageReader(img)
+    
     def cancel_conversion(self):
         self.conversion_canceled = True
         self.status_var.set("Canceling conversion...")
@@ -0,0 +1,169 @@
+# linearize_utils.py - Linearization (fast web view) without Ghostscript
+import os
+import platform
+import stat
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+# Label for the "fast web view" checkboxes, with a hint when no backend is installed
+LINEARIZE_LABEL = "Linearize (fast web view)"
+
+
+def find_qpdf():
+    """Detect the qpdf command line tool and return (executable, version) or (None, None)."""
+    candidates = ["qpdf"]
+
+    # On Windows, also check common install locations
+    if platform.system() == "Windows":
+        for base in [
+            os.environ.get("ProgramFiles", r"C:\Program Files"),
+            os.environ.get("ProgramFiles(x86)", r"C:\Program Files (x86)"),
+        ]:
+            if os.path.isdir(base):
+                for name in sorted(os.listdir(base), reverse=True):
+                    if name.lower().startswith("qpdf"):
+                        candidates.append(os.path.join(base, name, "bin", "qpdf.exe"))
+
+    for exe in candidates:
+        try:
+            result = subprocess.run(
+                [exe, "--version"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=5,
+            )
+            if result.returncode == 0:
+                version = result.stdout.decode(errors="replace").splitlines()[0].strip()
+                return exe, version
+        except (subprocess.SubprocessError, FileNotFoundError, OSError, IndexError):
+            continue
+    return None, None
+
+
+# Cache the result at module level
+_qpdf_cache = None
+
+
+def get_qpdf():
+    """Cached qpdf detection. Returns (executable, version) or (None, None)."""
+    global _qpdf_cache
+    if _qpdf_cache is None:
+        _qpdf_cache = find_qpdf()
+    return _qpdf_cache
+
+
+def get_linearizer():
+    """Return a description of the linearization backend that will be used, or None."""
+    if pikepdf is not None:
+        return f"pikepdf {pikepdf.__version__}"
+    exe, version = get_qpdf()
+    if exe:
+        return version or "qpdf"
+    return None
+
+
+def is_linearization_available():
+    """Return True if pikepdf or qpdf is installed."""
+    return get_linearizer() is not None
+
+
+def linearize_label():
+    """Checkbox text for the linearize option, noting what is missing if needed."""
+    if is_linearization_available():
+        return LINEARIZE_LABEL
+    return f"{LINEARIZE_LABEL} - requires pikepdf or qpdf"
+
+
+def is_linearized(pdf_path):
+    """Return True if the file starts with a linearization dictionary."""
+    with open(pdf_path, "rb") as f:
+        head = f.read(1024)
+    return b"/Linearized" in head
+
+
+# os.umask can only be read by setting it, which is not safe once worker
+# threads run, so read it once at import
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def linearize_pdf(input_path, output_path=None):
+    """Rewrite a PDF so its first page can be shown before the rest is downloaded.
+
+    Uses pikepdf when it is installed and the qpdf command line tool
+    otherwise. With output_path None the file is replaced in place. The
+    result is written to a temporary file next to the target first, so a
+    failure never leaves a half-written PDF behind.
+    """
+    target = output_path or input_path
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf", prefix=".p2i-linearize-",
+                                    dir=os.path.dirname(os.path.abspath(target)))
+    os.close(fd)
+    try:
+        if pikepdf is not None:
+            with pikepdf.open(input_path) as pdf:
+                pdf.save(tmp_path, linearize=True)
+        else:
+            exe, _ = get_qpdf()
+            if exe is None:
+                raise RuntimeError("Linearization requires pikepdf (pip install pikepdf) or the qpdf tool.")
+            result = subprocess.run(
+                [exe, "--linearize", input_path, tmp_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            # Exit code 3 means qpdf wrote the file but reported warnings
+            if result.returncode not in (0, 3):
+                raise RuntimeError(f"qpdf error: {result.stderr.decode(errors='replace').strip()}")
+        # mkstemp creates the file 0600; give the result the permissions the
+        # target already had, or those a normally created file would get
+        if os.path.exists(target):
+            mode = stat.S_IMODE(os.stat(target).st_mode)
+        else:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, target)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def linearize_files(pdf_paths, max_workers=4, progress_callback=None, cancel_check=None):
+    """Linearize several PDFs in place, a few at a time.
+
+    progress_callback(done, total) is called as files finish. Returns a
+    list of (pdf_path, error message) for the files that failed; files
+    not started before cancel_check() returned True are left as they are.
+    """
+    pdf_paths = list(pdf_paths)
+    failures = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        for pdf_path in pdf_paths:
+            futures[pool.submit(_linearize_unless_canceled, pdf_path, cancel_check)] = pdf_path
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failures.append((futures[future], str(e)))
+            done += 1
+            if progress_callback:
+                progress_callback(done, len(pdf_paths))
+    return failures
+
+
+def _linearize_unless_canceled(pdf_path, cancel_check):
+    if cancel_check and cancel_check():
+        return
+    linearize_pdf(pdf_path)
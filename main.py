@@ -809,6 +809,7 @@ To verify: open a terminal and run: gswin64c --version
 
     def on_close(self):
         self.settings.save_settings()
+        self.pdf_organizer_tab.shutdown()
         self.root.destroy()
 
 
@@ -823,4 +824,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed for worker processes in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     main()
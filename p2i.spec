@@ -17,7 +17,8 @@ a = Analysis(
         (tcl_dir, 'tcl/tcl8.6'),
         (tk_dir, 'tcl/tk8.6'),
     ],
-    hiddenimports=['styles'],
+    # reportlab loads its C speedups with exec(), which PyInstaller cannot see
+    hiddenimports=['styles', '_rl_accel'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
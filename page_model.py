@@ -0,0 +1,250 @@
+# page_model.py - Compact page list model for the PDF organizer
+from array import array
+from collections import namedtuple
+
+# One organized page as seen by callers; uid stays the same while the page is moved or rotated
+Page = namedtuple("Page", ["pdf_path", "page_idx", "is_blank", "rotation", "uid"])
+
+BLANK_SOURCE = -1
+
+
+class PageModel:
+    """Ordered list of organized pages stored in parallel typed arrays.
+
+    Source paths are interned to small integer IDs, and page indices,
+    rotations and stable per-entry IDs live in array columns, so a page
+    costs a few bytes instead of a tuple of Python objects. Rotations
+    belong to the page entry, so they follow the page when it moves.
+    Indexing is O(1). Moves, inserts and deletes rebuild each column from
+    slices: O(n) bytes copied in C plus one Python step per contiguous
+    run of affected pages, not O(1), but only microseconds for thousands
+    of pages.
+
+    Every mutation notifies listeners with a change event:
+        ("insert", index, count)   count pages inserted starting at index
+        ("remove", indices)        pages at these (old, ascending) indices removed
+        ("move", indices, to_idx)  pages at these (old, ascending) indices moved as a
+                                   block that now starts at to_idx
+        ("update", indices)        pages changed in place (e.g. rotated)
+        ("reset",)                 the whole list changed
+    """
+
+    def __init__(self):
+        self._paths = []  # source ID -> pdf path
+        self._path_ids = {}  # pdf path -> source ID
+        self._source = array("i")  # source ID per page, BLANK_SOURCE for blank pages
+        self._page = array("i")  # page index within the source
+        self._rotation = array("h")  # cumulative rotation in degrees
+        self._uid = array("q")  # stable identity per page entry
+        self._next_uid = 0
+        self._listeners = []
+
+    # Change notification
+    def add_listener(self, listener):
+        """Register listener(event, *args) to be called after every change"""
+        self._listeners.append(listener)
+
+    def _notify(self, *event):
+        for listener in self._listeners:
+            listener(*event)
+
+    # Reading
+    def __len__(self):
+        return len(self._source)
+
+    def __bool__(self):
+        return len(self._source) > 0
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self._source)
+        source = self._source[index]
+        is_blank = source == BLANK_SOURCE
+        return Page(
+            None if is_blank else self._paths[source],
+            self._page[index],
+            is_blank,
+            self._rotation[index],
+            self._uid[index]
+        )
+
+    def __iter__(self):
+        for index in range(len(self._source)):
+            yield self[index]
+
+    def uid(self, index):
+        return self._uid[index]
+
+    def uids(self):
+        """Return the uids of all pages in order"""
+        return self._uid.tolist()
+
+    def index_of(self, uid):
+        """Return the current index of the page with the given uid, or -1"""
+        try:
+            return self._uid.index(uid)
+        except ValueError:
+            return -1
+
+    def indices_of(self, uids):
+        """Return the ascending indices of the pages whose uid is in the given set"""
+        return [index for index, uid in enumerate(self._uid) if uid in uids]
+
+    def source_id(self, pdf_path):
+        """Return the interned ID for pdf_path, adding it if needed"""
+        source = self._path_ids.get(pdf_path)
+        if source is None:
+            source = len(self._paths)
+            self._paths.append(pdf_path)
+            self._path_ids[pdf_path] = source
+        return source
+
+    # Mutations
+    def insert_pages(self, index, pages):
+        """Insert (pdf_path, page_idx, is_blank[, rotation]) items before index"""
+        sources, page_indices, rotations = array("i"), array("i"), array("h")
+        for page in pages:
+            pdf_path, page_idx, is_blank = page[:3]
+            sources.append(BLANK_SOURCE if is_blank else self.source_id(pdf_path))
+            page_indices.append(page_idx)
+            rotations.append(page[3] if len(page) > 3 else 0)
+
+        count = len(sources)
+        if not count:
+            return 0
+        uids = array("q", range(self._next_uid, self._next_uid + count))
+        self._next_uid += count
+
+        index = max(0, min(index, len(self._source)))
+        self._source[index:index] = sources
+        self._page[index:index] = page_indices
+        self._rotation[index:index] = rotations
+        self._uid[index:index] = uids
+
+        self._notify("insert", index, count)
+        return count
+
+    def append_pages(self, pages):
+        return self.insert_pages(len(self._source), pages)
+
+    def insert_blank(self, index):
+        self.insert_pages(index, [(None, 0, True)])
+
+    def duplicate(self, index):
+        """Insert a copy of the page at index (with its rotation) right after it"""
+        self.duplicate_indices([index])
+
+    def duplicate_indices(self, indices):
+        """Insert copies of the given pages as one block after the last of them.
+
+        Returns the index of the first copy.
+        """
+        indices = sorted(set(indices))
+        if not indices:
+            return -1
+        pages = [self[index] for index in indices]
+        self.insert_pages(indices[-1] + 1, [page[:4] for page in pages])
+        return indices[-1] + 1
+
+    def remove_indices(self, indices):
+        """Remove the pages at the given indices in one pass"""
+        indices = sorted(set(i for i in indices if 0 <= i < len(self._source)))
+        if not indices:
+            return
+
+        # Keep everything between the removed runs, slice by slice
+        keep = _complement_runs(_runs(indices), len(self._source))
+        for column in ("_source", "_page", "_rotation", "_uid"):
+            old = getattr(self, column)
+            setattr(self, column, _join_slices(old, keep))
+
+        self._notify("remove", indices)
+
+    def remove(self, index):
+        self.remove_indices([index])
+
+    def remove_source(self, pdf_path):
+        """Remove every page that comes from pdf_path"""
+        source = self._path_ids.get(pdf_path)
+        if source is None:
+            return
+        self.remove_indices([i for i, s in enumerate(self._source) if s == source])
+
+    def move(self, from_idx, to_idx):
+        """Move one page so that it ends up at to_idx"""
+        count = len(self._source)
+        if from_idx == to_idx or not (0 <= from_idx < count and 0 <= to_idx < count):
+            return
+
+        for column in (self._source, self._page, self._rotation, self._uid):
+            value = column.pop(from_idx)
+            column.insert(to_idx, value)
+
+        self._notify("move", [from_idx], to_idx)
+
+    def move_indices(self, indices, to_idx):
+        """Move the given pages, in their current order, to a block starting at to_idx"""
+        indices = sorted(set(i for i in indices if 0 <= i < len(self._source)))
+        if not indices:
+            return
+        to_idx = max(0, min(to_idx, len(self._source) - len(indices)))
+        if indices == list(range(to_idx, to_idx + len(indices))):
+            return  # Already in place
+
+        # Cut the moved runs and the pages between them as slices, then splice
+        runs = _runs(indices)
+        keep = _complement_runs(runs, len(self._source))
+        for column in ("_source", "_page", "_rotation", "_uid"):
+            old = getattr(self, column)
+            block = _join_slices(old, runs)
+            rest = _join_slices(old, keep)
+            setattr(self, column, rest[:to_idx] + block + rest[to_idx:])
+
+        self._notify("move", indices, to_idx)
+
+    def rotate(self, indices, angle):
+        """Add angle degrees to the rotation of each page in indices"""
+        indices = sorted(set(indices))
+        for index in indices:
+            self._rotation[index] = (self._rotation[index] + angle) % 360
+        if indices:
+            self._notify("update", indices)
+
+    def clear(self):
+        self._paths.clear()
+        self._path_ids.clear()
+        for column in (self._source, self._page, self._rotation, self._uid):
+            del column[:]
+        self._notify("reset")
+
+
+def _runs(indices):
+    """Turn ascending indices into (start, end) half-open runs of consecutive indices"""
+    runs = []
+    for index in indices:
+        if runs and runs[-1][1] == index:
+            runs[-1][1] = index + 1
+        else:
+            runs.append([index, index + 1])
+    return runs
+
+
+def _complement_runs(runs, length):
+    """The (start, end) runs of [0, length) not covered by runs"""
+    gaps = []
+    previous = 0
+    for start, end in runs:
+        if start > previous:
+            gaps.append((previous, start))
+        previous = end
+    if previous < length:
+        gaps.append((previous, length))
+    return gaps
+
+
+def _join_slices(column, runs):
+    """Concatenate column[start:end] for each run into a new array"""
+    new = array(column.typecode)
+    for start, end in runs:
+        new.extend(column[start:end])
+    return new
@@ -3,8 +3,10 @@ import threading
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pypdfium2 as pdfium
 import utils
+import pdf_utils
+import linearize_utils
+from pdf_utils import PageCountIndex
 from styles import COLORS, FONTS
 
 class PDFMergeTab:
@@ -21,6 +23,12 @@ class PDFMergeTab:
         self.status_var = tk.StringVar(value="Ready")
         self.selected_index = 0
         self.conversion_canceled = False
+        self.deduplicate = tk.BooleanVar(value=True)  # Write shared fonts/images/profiles once
+        self.linearize = tk.BooleanVar(value=False)  # Rewrite the output for fast web view
+        
+        # Page counts persisted across sessions, so only new or changed files are opened
+        self.page_index = PageCountIndex()
+        self._count_generation = 0  # Bumped for every count so stale results are ignored
         
         # Create UI elements
         self.create_file_frame()
@@ -87,6 +95,14 @@ class PDFMergeTab:
         # Display selected PDF count and total pages
         self.info_label = ttk.Label(info_frame, text="Selected PDFs: 0 | Total Pages: 0")
         self.info_label.pack(fill="x", expand=True, padx=5, pady=5)
+        
+        ttk.Checkbutton(info_frame, text="Store identical fonts, images and color profiles only once",
+                        variable=self.deduplicate).pack(anchor="w", padx=5, pady=5)
+        linearize_check = ttk.Checkbutton(info_frame, text=linearize_utils.linearize_label(),
+                                          variable=self.linearize)
+        linearize_check.pack(anchor="w", padx=5, pady=5)
+        if not linearize_utils.is_linearization_available():
+            utils.keep_disabled(linearize_check)
     
     def add_pdfs(self):
         file_paths = filedialog.askopenfilenames(
@@ -195,28 +211,36 @@ class PDFMergeTab:
     
     def update_info_label(self):
         """Update the information label with PDF count and total pages"""
+        self._count_generation += 1
         if not self.pdf_paths:
             self.info_label.config(text="Selected PDFs: 0 | Total Pages: 0")
             return
             
         # Count pages in all PDFs
-        threading.Thread(target=self._count_pages_thread).start()
+        threading.Thread(target=self._count_pages_thread,
+                         args=(list(self.pdf_paths), self._count_generation)).start()
     
-    def _count_pages_thread(self):
+    def _count_pages_thread(self, pdf_paths, generation):
         try:
             self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Counting pages..."))
             
-            total_pages = 0
-            for pdf_path in self.pdf_paths:
-                try:
-                    pdf = pdfium.PdfDocument(pdf_path)
-                    total_pages += len(pdf)
-                except Exception as e:
-                    # If we can't open a PDF, just skip it in the count
-                    continue
+            def on_progress(done, total):
+                if generation == self._count_generation:
+                    self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(
+                        f"Counting pages {done}/{total}..."))
+            
+            # Indexed files cost a stat; new files are opened concurrently.
+            # Files that can't be opened are just skipped in the count
+            counts = self.page_index.counts(pdf_paths, progress_callback=on_progress)
+            # Sum over the list, which may name the same file more than once
+            total_pages = sum(counts.get(pdf_path) or 0 for pdf_path in pdf_paths)
+            
+            # A newer count started while this one ran
+            if generation != self._count_generation:
+                return
             
             self.frame.winfo_toplevel().after(0, lambda: self.info_label.config(
-                text=f"Selected PDFs: {len(self.pdf_paths)} | Total Pages: {total_pages}"))
+                text=f"Selected PDFs: {len(pdf_paths)} | Total Pages: {total_pages}"))
             self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Page count complete"))
         except Exception as e:
             error_msg = str(e)
@@ -264,49 +288,58 @@ class PDFMergeTab:
             self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Merging PDFs..."))
             self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(0))
             
-            # Create a new PDF document to contain the merged result
-            merger = pdfium.PdfDocument.new()
-            
-            # Process each PDF
             total_pdfs = len(self.pdf_paths)
-            for i, pdf_path in enumerate(self.pdf_paths):
-                if self.conversion_canceled:
-                    self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Merging canceled"))
-                    # Delete partial output
-                    if os.path.exists(output_path):
-                        try:
-                            os.remove(output_path)
-                        except:
-                            pass
-                    return
-                
-                # Update progress
-                progress_pct = ((i + 1) / total_pdfs) * 100
-                current_file = os.path.basename(pdf_path)
+            
+            def on_progress(done, total, label):
+                progress_pct = (done / total) * 100
                 self.frame.winfo_toplevel().after(0, lambda p=progress_pct: self.progress_var.set(p))
-                self.frame.winfo_toplevel().after(0, lambda p=i+1, t=total_pdfs, f=current_file: 
-                    self.status_var.set(f"Processing {p}/{t}: {f}"))
-                
-                # Open source PDF
+                if done <= total_pdfs:
+                    self.frame.winfo_toplevel().after(0, lambda p=done, t=total_pdfs, f=label:
+                        self.status_var.set(f"Processing {p}/{t}: {f}"))
+                else:
+                    self.frame.winfo_toplevel().after(0, lambda f=label: self.status_var.set(f))
+            
+            def on_warning(message):
+                self.frame.winfo_toplevel().after(0, lambda: messagebox.showwarning("Warning", message))
+            
+            # Merge in bounded groups so memory and open files stay flat for any number of inputs
+            stats = {}
+            completed = pdf_utils.merge_pdfs(
+                list(self.pdf_paths), output_path,
+                progress_callback=on_progress,
+                cancel_check=lambda: self.conversion_canceled,
+                warning_callback=on_warning,
+                deduplicate=self.deduplicate.get(),
+                stats=stats
+            )
+            if not completed:
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Merging canceled"))
+                # Delete partial output
+                if os.path.exists(output_path):
+                    try:
+                        os.remove(output_path)
+                    except:
+                        pass
+                return
+            
+            if self.linearize.get():
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Linearizing for fast web view..."))
                 try:
-                    pdf = pdfium.PdfDocument(pdf_path)
-                    
-                    # Import all pages from this PDF - correctly pass pages as a list of indices
-                    merger.import_pages(pdf)
+                    linearize_utils.linearize_pdf(output_path)
                 except Exception as e:
-                    error_msg = str(e)
-                    self.frame.winfo_toplevel().after(0, lambda f=current_file, err=error_msg: 
-                        messagebox.showwarning("Warning", f"Failed to process {f}: {err}"))
-                    continue
-            
-            # Save the merged PDF
-            merger.save(output_path)
+                    # The merged file is fine, keep it
+                    self.frame.winfo_toplevel().after(0, lambda err=str(e): messagebox.showwarning("Warning",
+                        f"The merged PDF was saved without linearization: {err}"))
             
             # Complete
             self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
             self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Merge complete: {os.path.basename(output_path)}"))
+            dedup_note = ""
+            if stats.get("duplicates"):
+                dedup_note = (f"\n{stats['duplicates']} duplicate resources removed "
+                              f"({stats['bytes_saved'] / (1024 * 1024):.1f} MB saved).")
             self.frame.winfo_toplevel().after(0, lambda: messagebox.showinfo("Success", 
-                f"PDFs merged successfully.\n{total_pdfs} PDFs combined.\nSaved to: {output_path}"))
+                f"PDFs merged successfully.\n{total_pdfs} PDFs combined.{dedup_note}\nSaved to: {output_path}"))
             
         except Exception as e:
             error_msg = str(e)
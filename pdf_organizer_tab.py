@@ -1,14 +1,22 @@
 # pdf_organizer_tab.py
 import os
 import threading
+import time
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 import pypdfium2 as pdfium
 from PIL import Image, ImageTk
-from PyPDF2 import PdfReader, PdfWriter
 import utils
+import pdf_utils
+import linearize_utils
+from render_utils import (RenderPool, ThumbnailCache, PreviewCache, PDFIUM_LOCK, PRIORITY_PREVIEW, PRIORITY_VISIBLE,
+                          PRIORITY_PREFETCH, PRIORITY_BACKGROUND, cached_content_hash, file_content_hash,
+                          render_to_fit)
+from thumbnail_grid import ThumbnailGrid
+from page_model import PageModel
 from styles import COLORS, FONTS
 
 class PDFOrganizerTab:
@@ -21,18 +29,35 @@ class PDFOrganizerTab:
         self.source_pdfs = []  # List of PDF paths
         self.output_dir = tk.StringVar()
         self.output_name = tk.StringVar(value="organized.pdf")
+        self.linearize = tk.BooleanVar(value=False)  # Rewrite the output for fast web view
         self.progress_var = tk.DoubleVar(value=0.0)
         self.status_var = tk.StringVar(value="Ready")
         self.process_canceled = False
+        self.export_cancel_event = None  # Set to stop a running bulk export
         
         # Page management
-        # Each entry: (pdf_path, page_index, is_blank)
-        self.all_pages = []
-        self.page_rotations = {}  # Dict mapping page list index to cumulative rotation degrees
-        self.selected_index = -1
-        self.thumbnail_cache = {}  # Cache for page thumbnails
+        # Compact page list; each page keeps its own rotation, so it follows the page when moved
+        self.pages = PageModel()
+        self.pages.add_listener(self._on_pages_changed)
+        self.selected_index = -1  # Page shown in the preview
+        # Multi-selection by page uid; bulk operations act on it when it contains the current page
+        self.selected_uids = set()
+        self._selection_anchor = None  # uid that shift-click ranges start from
+        self.thumbnail_cache = ThumbnailCache()  # Memory LRU backed by ~/.p2i/thumbnails
         self.current_zoom = 1.0  # Zoom level for main preview
         
+        # Fixed-size worker pool that renders thumbnails, visible ones first
+        self.render_pool = RenderPool(num_workers=2)
+        self._pending_thumbnails = set()  # Cache keys queued in the current generation
+        
+        # Multi-resolution preview renders so zooming reuses earlier renders
+        self.preview_cache = PreviewCache(base_scale=1.5)
+        self.prefetch_distance = 2  # Neighbouring pages rendered ahead on each side
+        
+        # Source PDFs are opened in the background, several at a time
+        self.load_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="p2i-load")
+        self._load_generation = 0  # Bumped to abandon loads that are still running
+        
         # Create UI elements
         self.create_main_layout()
         
@@ -137,6 +162,7 @@ class PDFOrganizerTab:
 
         ttk.Button(advanced_frame, text="Insert from PDF...", command=self.insert_pages_from_pdf).pack(side="left", padx=5)
         ttk.Button(advanced_frame, text="Extract Page", command=self.extract_current_page).pack(side="left", padx=5)
+        ttk.Button(advanced_frame, text="Export Selected...", command=self.export_selected_pages).pack(side="left", padx=5)
         ttk.Button(advanced_frame, text="Duplicate Page", command=self.duplicate_page).pack(side="left", padx=5)
         ttk.Button(advanced_frame, text="Move to Position...", command=self.move_to_position).pack(side="left", padx=5)
     
@@ -199,37 +225,16 @@ class PDFOrganizerTab:
         ttk.Button(controls_frame, text="Deselect All", command=self.deselect_all_thumbnails).pack(side="left", padx=5)
         ttk.Button(controls_frame, text="Delete Selected", command=self.delete_selected_thumbnails).pack(side="left", padx=5)
         
-        # Create canvas with scrollbar for thumbnails
-        self.thumb_canvas_frame = ttk.Frame(self.thumbnails_frame)
-        self.thumb_canvas_frame.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        scrollbar = ttk.Scrollbar(self.thumb_canvas_frame)
-        scrollbar.pack(side="right", fill="y")
-        
-        self.thumb_canvas = tk.Canvas(
-            self.thumb_canvas_frame, 
-            bg="lightgray", 
-            highlightthickness=0,
-            yscrollcommand=scrollbar.set
+        # Virtualized grid that only builds tiles for the rows in view
+        self.thumbnail_grid = ThumbnailGrid(
+            self.thumbnails_frame,
+            get_count=lambda: len(self.pages),
+            get_image=self._get_thumbnail_image,
+            is_selected=self._is_page_selected,
+            on_select=self._select_thumbnail,
+            on_move=self._on_thumbnail_moved
         )
-        self.thumb_canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.config(command=self.thumb_canvas.yview)
-        
-        # Container frame for thumbnails
-        self.thumbnails_container = ttk.Frame(self.thumb_canvas)
-        self.thumb_canvas.create_window((0, 0), window=self.thumbnails_container, anchor="nw")
-        
-        # Configure scrolling behavior
-        self.thumbnails_container.bind("<Configure>", self.on_thumbnails_configure)
-        self.thumb_canvas.bind("<MouseWheel>", self.on_mousewheel)
-        
-        # Drag and drop reordering
-        self.thumb_canvas.bind("<ButtonPress-1>", self.on_thumbnail_press)
-        self.thumb_canvas.bind("<B1-Motion>", self.on_thumbnail_motion)
-        self.thumb_canvas.bind("<ButtonRelease-1>", self.on_thumbnail_release)
-        
-        # Initialize drag variables
-        self.drag_data = {"item": None, "x": 0, "y": 0}
+        self.thumbnail_grid.frame.pack(fill="both", expand=True, padx=5, pady=5)
     
     def create_output_panel(self):
         output_frame = ttk.LabelFrame(self.bottom_frame, text="Output Settings")
@@ -244,73 +249,39 @@ class PDFOrganizerTab:
         ttk.Label(output_frame, text="Output Filename:").grid(row=1, column=0, sticky="w", padx=5, pady=5)
         ttk.Entry(output_frame, textvariable=self.output_name, width=50).grid(row=1, column=1, sticky="ew", padx=5, pady=5)
         
+        linearize_check = ttk.Checkbutton(output_frame, text=linearize_utils.linearize_label(),
+                                          variable=self.linearize)
+        linearize_check.grid(row=2, column=1, sticky="w", padx=5, pady=5)
+        if not linearize_utils.is_linearization_available():
+            utils.keep_disabled(linearize_check)
+        
         # Make column 1 expand
         output_frame.columnconfigure(1, weight=1)
     
     # Event handlers
-    def on_thumbnails_configure(self, event):
-        """Update the scroll region when the thumbnails container changes size"""
-        self.thumb_canvas.configure(scrollregion=self.thumb_canvas.bbox("all"))
-    
-    def on_mousewheel(self, event):
-        """Handle mouse wheel events for the thumbnails canvas"""
-        self.thumb_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-    
-    def on_thumbnail_press(self, event):
-        """Start thumbnail drag operation"""
-        # Find thumbnail under cursor
-        x, y = self.thumb_canvas.canvasx(event.x), self.thumb_canvas.canvasy(event.y)
-        item = self.thumb_canvas.find_closest(x, y)[0]
-        
-        # Save drag data
-        self.drag_data["item"] = item
-        self.drag_data["x"] = x
-        self.drag_data["y"] = y
-    
-    def on_thumbnail_motion(self, event):
-        """Handle thumbnail being dragged"""
-        if self.drag_data["item"] is None:
-            return
-            
-        # Calculate new position
-        x, y = self.thumb_canvas.canvasx(event.x), self.thumb_canvas.canvasy(event.y)
-        dx, dy = x - self.drag_data["x"], y - self.drag_data["y"]
-        
-        # Move the thumbnail
-        self.thumb_canvas.move(self.drag_data["item"], dx, dy)
-        
-        # Update drag data
-        self.drag_data["x"] = x
-        self.drag_data["y"] = y
+    def _on_thumbnail_moved(self, from_idx, to_idx):
+        """Handle a thumbnail dragged onto another thumbnail"""
+        if self.pages.uid(from_idx) in self.selected_uids and len(self.selected_uids) > 1:
+            # Dragging part of a multi-selection moves the whole selection
+            indices = self.pages.indices_of(self.selected_uids)
+            if to_idx in indices:
+                return
+            # Drop after the target when dragging forward, before it when dragging back
+            target = to_idx - sum(1 for i in indices if i < to_idx)
+            start = target + 1 if to_idx > indices[0] else target
+            self._move_pages(indices, start)
+        else:
+            self._move_pages([from_idx], to_idx)
     
-    def on_thumbnail_release(self, event):
-        """End thumbnail drag operation and handle reordering"""
-        if self.drag_data["item"] is None:
-            return
-            
-        # Get the target position in the list
-        x, y = self.thumb_canvas.canvasx(event.x), self.thumb_canvas.canvasy(event.y)
-        
-        # Find thumbnail at the drop location
-        target_items = self.thumb_canvas.find_overlapping(x-5, y-5, x+5, y+5)
-        
-        # If dropped on another thumbnail, do reordering
-        if target_items and target_items[0] != self.drag_data["item"]:
-            # Get indices
-            item_tag = self.thumb_canvas.gettags(self.drag_data["item"])[0]
-            from_idx = int(item_tag.split("_")[1])
-            
-            target_tag = self.thumb_canvas.gettags(target_items[0])[0]
-            to_idx = int(target_tag.split("_")[1])
-            
-            # Reorder pages
-            self.reorder_pages(from_idx, to_idx)
-        
-        # Reset drag data
-        self.drag_data["item"] = None
-        
-        # Refresh thumbnail display
-        self.refresh_thumbnails()
+    def _on_pages_changed(self, event, *args):
+        """Patch only the thumbnails affected by a page model change"""
+        if event == "reset":
+            self.selected_uids.clear()
+            self._selection_anchor = None
+            self.refresh_thumbnails()
+        else:
+            # Queued renders stay valid: they are matched to tiles by cache key, not position
+            self.thumbnail_grid.pages_changed(event, *args)
     
     def on_pdf_select(self, event):
         """Handle PDF selection in the listbox"""
@@ -325,8 +296,8 @@ class PDFOrganizerTab:
             self.status_var.set(f"Selected PDF: {os.path.basename(pdf_path)}")
             
             # Find the first page from this PDF and select it
-            for idx, (path, page_idx, _) in enumerate(self.all_pages):
-                if path == pdf_path:
+            for idx, page in enumerate(self.pages):
+                if page.pdf_path == pdf_path:
                     self.selected_index = idx
                     self.update_preview()
                     break
@@ -349,16 +320,14 @@ class PDFOrganizerTab:
         
         self.status_var.set(f"Added {len(file_paths)} PDFs. Total: {len(self.source_pdfs)}")
         
-        # Load pages
-        self.load_pdf_pages(file_paths)
+        def select_first_page():
+            # Select the first page if no current selection
+            if self.selected_index < 0 and self.pages:
+                self.selected_index = 0
+                self.update_preview()
         
-        # Select the first page if no current selection
-        if self.selected_index < 0 and self.all_pages:
-            self.selected_index = 0
-            self.update_preview()
-        
-        # Update thumbnails
-        self.refresh_thumbnails()
+        # Load pages in the background
+        self.load_pdf_pages(file_paths, on_loaded=select_first_page)
     
     def remove_selected_pdf(self):
         """Remove the selected PDF from the list"""
@@ -376,27 +345,22 @@ class PDFOrganizerTab:
             self.source_pdfs.pop(pdf_idx)
             self.pdf_listbox.delete(pdf_idx)
             
+            # Keep the selected page if it survives the removal
+            selected_uid = self.pages.uid(self.selected_index) if 0 <= self.selected_index < len(self.pages) else None
+            
             # Remove all pages from this PDF
-            self.all_pages = [(path, page_idx, is_blank) for path, page_idx, is_blank 
-                             in self.all_pages if path != pdf_path]
+            self.pages.remove_source(pdf_path)
             
             # Update selected index
-            if self.selected_index >= len(self.all_pages):
-                self.selected_index = max(0, len(self.all_pages) - 1)
-            elif self.selected_index >= 0:
-                # If the current page is from the removed PDF, select another page
-                if self.all_pages[self.selected_index][0] == pdf_path:
-                    # Try to find a good page to select
-                    if self.all_pages:
-                        self.selected_index = 0
-                    else:
-                        self.selected_index = -1
+            if selected_uid is not None and self.pages.index_of(selected_uid) >= 0:
+                self.selected_index = self.pages.index_of(selected_uid)
+            else:
+                self.selected_index = 0 if self.pages else -1
             
             self.status_var.set(f"Removed PDF: {os.path.basename(pdf_path)}")
             
-            # Update preview and thumbnails
+            # Update preview
             self.update_preview()
-            self.refresh_thumbnails()
     
     def clear_pdfs(self):
         """Clear all PDFs from the list"""
@@ -405,16 +369,17 @@ class PDFOrganizerTab:
             
         result = messagebox.askyesno("Confirm", "Are you sure you want to clear all PDFs?")
         if result:
+            self._load_generation += 1  # Discard files that are still loading
             self.source_pdfs.clear()
             self.pdf_listbox.delete(0, tk.END)
-            self.all_pages.clear()
+            self.pages.clear()
             self.selected_index = -1
-            self.thumbnail_cache.clear()
-            self.page_rotations.clear()
+            self.thumbnail_cache.clear_memory()
+            self.preview_cache.clear()
+            self.render_pool.close_documents()
             
-            # Update preview and thumbnails
+            # Update preview
             self.update_preview()
-            self.refresh_thumbnails()
             
             self.status_var.set("All PDFs cleared")
     
@@ -475,55 +440,117 @@ class PDFOrganizerTab:
         # Store current selected page's PDF and index for restoration
         selected_pdf = None
         selected_page_idx = None
-        if self.selected_index >= 0 and self.selected_index < len(self.all_pages):
-            selected_pdf, selected_page_idx, _ = self.all_pages[self.selected_index]
+        if self.selected_index >= 0 and self.selected_index < len(self.pages):
+            selected_pdf, selected_page_idx = self.pages[self.selected_index][:2]
         
-        # Clear current pages
-        self.all_pages.clear()
-        
-        # Reload all pages
-        self.load_pdf_pages(self.source_pdfs)
+        # Clear current pages and abandon loads that are still running
+        self._load_generation += 1
+        self.pages.clear()
+        self.selected_index = -1
+        self.update_preview()
         
-        # Try to restore selection
-        if selected_pdf and selected_page_idx is not None:
-            # Find the same page in the new list
-            for idx, (path, page_idx, _) in enumerate(self.all_pages):
-                if path == selected_pdf and page_idx == selected_page_idx:
-                    self.selected_index = idx
-                    break
+        def restore_selection():
+            # Try to restore selection
+            if selected_pdf and selected_page_idx is not None:
+                # Find the same page in the new list
+                for idx, page in enumerate(self.pages):
+                    if page.pdf_path == selected_pdf and page.page_idx == selected_page_idx:
+                        self.selected_index = idx
+                        break
+                else:
+                    # If not found, select the first page
+                    self.selected_index = 0 if self.pages else -1
             else:
-                # If not found, select the first page
-                self.selected_index = 0 if self.all_pages else -1
-        else:
-            # Select first page if any
-            self.selected_index = 0 if self.all_pages else -1
-        
-        # Update preview and thumbnails
-        self.update_preview()
-        self.refresh_thumbnails()
+                # Select first page if any
+                self.selected_index = 0 if self.pages else -1
+            
+            # Update preview
+            self.update_preview()
+            
+            self.status_var.set("Pages refreshed")
         
-        self.status_var.set("Pages refreshed")
+        # Reload all pages
+        self.load_pdf_pages(self.source_pdfs, on_loaded=restore_selection)
     
-    def load_pdf_pages(self, pdf_paths):
-        """Load pages from the given PDF files"""
-        for pdf_path in pdf_paths:
+    def load_pdf_pages(self, pdf_paths, on_loaded=None):
+        """Load pages from the given PDF files in the background.
+        
+        Files are opened concurrently and their pages are appended in the
+        order the files were given as soon as each one is ready. Files that
+        fail to open are reported together once all files are done, then
+        on_loaded() is called on the Tk thread.
+        """
+        pdf_paths = list(pdf_paths)
+        total = len(pdf_paths)
+        generation = self._load_generation
+        results = {}  # position -> page count or exception, waiting for earlier files
+        state = {"next": 0, "received": 0, "pages": 0}
+        errors = []
+        
+        def on_result(position, result):
+            # Runs on the Tk thread
+            if generation != self._load_generation:
+                return
+            results[position] = result
+            state["received"] += 1
+            
+            # Add finished files in selection order; later files wait for earlier ones
+            while state["next"] in results:
+                pdf_path = pdf_paths[state["next"]]
+                count = results.pop(state["next"])
+                state["next"] += 1
+                if isinstance(count, Exception):
+                    errors.append(f"{os.path.basename(pdf_path)}: {str(count)}")
+                elif pdf_path in self.source_pdfs:  # Skip files removed while loading
+                    self.pages.append_pages((pdf_path, page_idx, False) for page_idx in range(count))
+                    state["pages"] += count
+            
+            self.progress_var.set(state["received"] / total * 100)
+            self.status_var.set(f"Loading PDFs {state['received']}/{total}...")
+            
+            if state["next"] == total:
+                self._on_pdfs_loaded(total, state["pages"], errors, on_loaded)
+        
+        def on_counted(position, future):
             try:
-                # Open PDF
-                pdf = pdfium.PdfDocument(pdf_path)
-                
-                # Add all pages
-                for page_idx in range(len(pdf)):
-                    self.all_pages.append((pdf_path, page_idx, False))
-                    
-                self.status_var.set(f"Loaded {len(pdf)} pages from {os.path.basename(pdf_path)}")
+                result = future.result()
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to load {os.path.basename(pdf_path)}: {str(e)}")
-                self.status_var.set(f"Error: {str(e)}")
+                result = e
+            self.frame.winfo_toplevel().after(0, lambda: on_result(position, result))
+        
+        if not pdf_paths:
+            self._on_pdfs_loaded(0, 0, errors, on_loaded)
+            return
+        
+        self.progress_var.set(0)
+        for position, pdf_path in enumerate(pdf_paths):
+            future = self.load_executor.submit(pdf_utils.count_pages, pdf_path)
+            future.add_done_callback(lambda f, p=position: on_counted(p, f))
+        
+        # Content hashes key the disk thumbnail cache; computed here, after the counts,
+        # so reading a huge file never holds up the render pool
+        for pdf_path in pdf_paths:
+            self.load_executor.submit(file_content_hash, pdf_path)
+    
+    def _on_pdfs_loaded(self, total, num_pages, errors, on_loaded=None):
+        """Report the outcome of a background load"""
+        self.progress_var.set(100 if total else 0)
+        self.status_var.set(f"Loaded {num_pages} pages from {total - len(errors)} PDFs")
+        
+        if errors:
+            # One summary instead of a dialog per file
+            shown = errors[:10]
+            if len(errors) > len(shown):
+                shown.append(f"...and {len(errors) - len(shown)} more")
+            messagebox.showerror("Error", f"Failed to load {len(errors)} of {total} PDFs:\n\n" + "\n".join(shown))
+        
+        if on_loaded:
+            on_loaded()
     
     # Page navigation and display
     def previous_page(self):
         """Go to the previous page"""
-        if not self.all_pages:
+        if not self.pages:
             return
             
         if self.selected_index > 0:
@@ -532,10 +559,10 @@ class PDFOrganizerTab:
     
     def next_page(self):
         """Go to the next page"""
-        if not self.all_pages:
+        if not self.pages:
             return
             
-        if self.selected_index < len(self.all_pages) - 1:
+        if self.selected_index < len(self.pages) - 1:
             self.selected_index += 1
             self.update_preview()
     
@@ -545,57 +572,113 @@ class PDFOrganizerTab:
         self.preview_canvas.delete("all")
         
         # Update page label
-        total_pages = len(self.all_pages)
+        total_pages = len(self.pages)
         current_page = self.selected_index + 1 if self.selected_index >= 0 else 0
         self.page_label.config(text=f"Page: {current_page} / {total_pages}")
+        self.thumbnail_grid.update_selection()
         
-        if self.selected_index < 0 or not self.all_pages:
+        if self.selected_index < 0 or not self.pages:
             return
             
         # Get page info
-        pdf_path, page_idx, is_blank = self.all_pages[self.selected_index]
+        pdf_path, page_idx, is_blank, rotation_deg, _ = self.pages[self.selected_index]
         
-        try:
-            if is_blank:
-                # Create a blank page image
-                img = Image.new('RGB', (612, 792), 'white')  # Letter size
-                self._display_preview_image(img)
+        # Zoom 1.0 shows the page at 1.5x its point size
+        scale = 1.5 * self.current_zoom
+        
+        # Anything still queued for the previously shown page is no longer needed
+        generation = self.render_pool.new_generation("preview")
+        
+        if is_blank:
+            # Letter size blank page
+            size = (612, 792) if rotation_deg % 180 == 0 else (792, 612)
+            self._display_preview_image(Image.new('RGB', (round(size[0] * scale), round(size[1] * scale)), 'white'))
+        else:
+            cached = self.preview_cache.lookup((pdf_path, page_idx, rotation_deg), scale)
+            if cached is not None:
+                # Cache hit (usually from the prefetcher): display without touching pdfium
+                self._display_preview_image(PreviewCache.scale_image(cached[0], cached[1], scale))
+                self._show_preview_status(pdf_path, page_idx)
             else:
-                # Load the page
-                pdf = pdfium.PdfDocument(pdf_path)
-                page = pdf[page_idx]
-
-                # Get rotation for this page (convert degrees to pdfium rotation values)
-                rotation_deg = self.page_rotations.get(self.selected_index, 0)
-                # pdfium rotation: 0=0, 1=90, 2=180, 3=270
-                pdfium_rotation = (rotation_deg // 90) % 4
-
-                # Render to image
-                pil_image = page.render(
-                    scale=1.5,  # Higher quality for preview
-                    rotation=pdfium_rotation
-                ).to_pil()
-
-                # Display the image
-                self._display_preview_image(pil_image)
+                # Render off the Tk thread and display when it arrives
+                self.preview_canvas.create_text(10, 10, anchor=tk.NW, text="Rendering...", fill="gray")
                 
-                # Get PDF name for status
-                pdf_name = os.path.basename(pdf_path)
-                self.status_var.set(f"Displaying page {page_idx + 1} from {pdf_name}")
+                def on_rendered(img, error):
+                    self.frame.winfo_toplevel().after(0,
+                        lambda: self._on_preview_rendered(img, error, pdf_path, page_idx, generation))
                 
-        except Exception as e:
-            self.status_var.set(f"Error loading preview: {str(e)}")
+                self.render_pool.submit(
+                    lambda: self._render_preview(pdf_path, page_idx, rotation_deg, scale),
+                    priority=PRIORITY_PREVIEW,
+                    callback=on_rendered,
+                    channel="preview",
+                    generation=generation
+                )
+        
+        self._prefetch_neighbours(scale)
     
-    def _display_preview_image(self, img):
-        """Display an image in the preview canvas with current zoom"""
-        # Apply zoom
-        width, height = img.size
-        new_width = int(width * self.current_zoom)
-        new_height = int(height * self.current_zoom)
+    def _show_preview_status(self, pdf_path, page_idx):
+        # Get PDF name for status
+        pdf_name = os.path.basename(pdf_path)
+        self.status_var.set(f"Displaying page {page_idx + 1} from {pdf_name}")
+    
+    def _on_preview_rendered(self, img, error, pdf_path, page_idx, generation):
+        """Display a finished preview unless the user has moved on since"""
+        if generation != self.render_pool.current_generation("preview"):
+            return
         
-        # Resize image
-        img = img.resize((new_width, new_height), Image.LANCZOS)
+        self.preview_canvas.delete("all")
+        if error is not None:
+            self.status_var.set(f"Error loading preview: {str(error)}")
+            return
         
+        self._display_preview_image(img)
+        self._show_preview_status(pdf_path, page_idx)
+    
+    def _prefetch_neighbours(self, scale):
+        """Queue background renders of the pages around the current one at the current zoom"""
+        generation = self.render_pool.new_generation("prefetch")
+        level = self.preview_cache.level_for(scale)
+        
+        # Nearest pages first, alternating forward and backward
+        for distance in range(1, self.prefetch_distance + 1):
+            for idx in (self.selected_index + distance, self.selected_index - distance):
+                if idx < 0 or idx >= len(self.pages):
+                    continue
+                pdf_path, page_idx, is_blank, rotation, _ = self.pages[idx]
+                if is_blank:
+                    continue
+                self.render_pool.submit(
+                    lambda p=pdf_path, i=page_idx, r=rotation: self._render_preview_level(p, i, r, level),
+                    priority=PRIORITY_PREFETCH,
+                    channel="prefetch",
+                    generation=generation
+                )
+    
+    def _render_preview_level(self, pdf_path, page_idx, rotation, level):
+        """Make sure a pyramid level is cached for the page (runs on a render pool worker)"""
+        page_key = (pdf_path, page_idx, rotation)
+        cached = self.preview_cache.lookup(page_key, level)
+        if cached is not None:
+            return cached
+        
+        with PDFIUM_LOCK:
+            pdf = self.render_pool.open_document(pdf_path)
+            page = pdf[page_idx]
+            level_img = page.render(scale=level, rotation=rotation % 360).to_pil()
+            page.close()
+        self.preview_cache.add(page_key, level, level_img)
+        return level, level_img
+    
+    def _render_preview(self, pdf_path, page_idx, rotation, scale):
+        """Return the page rendered at the given display scale (runs on a render pool worker)"""
+        # Only render when no cached level has enough resolution
+        level, level_img = self._render_preview_level(pdf_path, page_idx, rotation,
+                                                      self.preview_cache.level_for(scale))
+        return PreviewCache.scale_image(level, level_img, scale)
+    
+    def _display_preview_image(self, img):
+        """Display an image already rendered at the current zoom in the preview canvas"""
         # Convert to PhotoImage
         photo = ImageTk.PhotoImage(img)
         
@@ -603,7 +686,7 @@ class PDFOrganizerTab:
         self.preview_image = photo
         
         # Set scroll region
-        self.preview_canvas.config(scrollregion=(0, 0, new_width, new_height))
+        self.preview_canvas.config(scrollregion=(0, 0, img.width, img.height))
         
         # Display image
         self.preview_canvas.create_image(0, 0, anchor=tk.NW, image=photo)
@@ -621,7 +704,7 @@ class PDFOrganizerTab:
     
     def zoom_to_fit(self):
         """Zoom to fit the preview in the visible area"""
-        if not self.all_pages or self.selected_index < 0:
+        if not self.pages or self.selected_index < 0:
             return
             
         # Get canvas dimensions
@@ -632,23 +715,25 @@ class PDFOrganizerTab:
             return  # Canvas not properly sized yet
         
         # Get page info
-        pdf_path, page_idx, is_blank = self.all_pages[self.selected_index]
+        pdf_path, page_idx, is_blank, rotation, _ = self.pages[self.selected_index]
         
         try:
             if is_blank:
                 # Standard page size
                 img_width, img_height = 612, 792
             else:
-                # Get page dimensions
-                pdf = pdfium.PdfDocument(pdf_path)
-                page = pdf[page_idx]
-                # Get size in points
-                img_width, img_height = page.get_size()
+                # Get page dimensions in points from the shared document handle
+                with PDFIUM_LOCK:
+                    pdf = self.render_pool.open_document(pdf_path)
+                    img_width, img_height = pdf.get_page_size(page_idx)
+                if rotation % 180 == 90:
+                    img_width, img_height = img_height, img_width
             
             # Calculate zoom to fit
             zoom_width = canvas_width / img_width
             zoom_height = canvas_height / img_height
-            zoom = min(zoom_width, zoom_height) * 0.95  # 5% margin
+            # Pages are displayed at 1.5x their point size at zoom 1.0
+            zoom = min(zoom_width, zoom_height) * 0.95 / 1.5  # 5% margin
             
             # Set the zoom
             self.set_zoom(zoom)
@@ -658,69 +743,55 @@ class PDFOrganizerTab:
     
     # Page manipulation
     def delete_current_page(self):
-        """Delete the current page"""
-        if not self.all_pages or self.selected_index < 0:
-            return
-            
-        # Remove the page
-        self.all_pages.pop(self.selected_index)
-        
-        # Adjust selection
-        if self.selected_index >= len(self.all_pages):
-            self.selected_index = max(0, len(self.all_pages) - 1)
-        
-        # Update preview and thumbnails
-        self.update_preview()
-        self.refresh_thumbnails()
-        
-        self.status_var.set("Page deleted")
+        """Delete the current page, or the whole selection when it contains the current page"""
+        self.delete_selected_thumbnails()
     
     def insert_blank_page(self):
         """Insert a blank page before the current page"""
-        if not self.all_pages:
+        if not self.pages:
             # If no pages, just add one at the beginning
-            self.all_pages.append((None, 0, True))
+            self.pages.insert_blank(0)
             self.selected_index = 0
         else:
             # Insert before current page
             idx = max(0, self.selected_index)
-            self.all_pages.insert(idx, (None, 0, True))
+            self.pages.insert_blank(idx)
             self.selected_index = idx
         
-        # Update preview and thumbnails
+        # Update preview
         self.update_preview()
-        self.refresh_thumbnails()
         
         self.status_var.set("Blank page inserted")
     
     def insert_blank_after(self):
         """Insert a blank page after the current page"""
-        if not self.all_pages:
+        if not self.pages:
             # If no pages, just add one at the beginning
-            self.all_pages.append((None, 0, True))
+            self.pages.insert_blank(0)
             self.selected_index = 0
         else:
             # Insert after current page
             idx = self.selected_index + 1 if self.selected_index >= 0 else 0
-            self.all_pages.insert(idx, (None, 0, True))
+            self.pages.insert_blank(idx)
             self.selected_index = idx
         
-        # Update preview and thumbnails
+        # Update preview
         self.update_preview()
-        self.refresh_thumbnails()
         
         self.status_var.set("Blank page inserted")
     
     def rotate_page(self, angle):
-        """Rotate the current page by the given angle (cumulative)"""
-        if not self.all_pages or self.selected_index < 0:
+        """Rotate the selected pages by the given angle (cumulative)"""
+        if not self.pages or self.selected_index < 0:
             return
 
-        current = self.page_rotations.get(self.selected_index, 0)
-        self.page_rotations[self.selected_index] = (current + angle) % 360
+        indices = self._selected_indices()
+        self.pages.rotate(indices, angle)
         self.update_preview()
-        self.refresh_thumbnails()
-        self.status_var.set(f"Page rotated {angle} degrees (total: {self.page_rotations[self.selected_index]})")
+        if len(indices) == 1:
+            self.status_var.set(f"Page rotated {angle} degrees (total: {self.pages[self.selected_index].rotation})")
+        else:
+            self.status_var.set(f"{len(indices)} pages rotated {angle} degrees")
     
     def insert_pages_from_pdf(self):
         """Upload another PDF and insert its pages at the current position"""
@@ -732,8 +803,7 @@ class PDFOrganizerTab:
             return
 
         try:
-            pdf = pdfium.PdfDocument(file_path)
-            num_pages = len(pdf)
+            num_pages = pdf_utils.count_pages(file_path)
 
             # Ask which pages to insert
             page_spec = simpledialog.askstring(
@@ -758,11 +828,12 @@ class PDFOrganizerTab:
                 pages_to_insert = list(range(num_pages))
 
             # Insert at current position (after selected page)
-            insert_idx = self.selected_index + 1 if self.selected_index >= 0 else len(self.all_pages)
+            insert_idx = self.selected_index + 1 if self.selected_index >= 0 else len(self.pages)
+
+            self.pages.insert_pages(insert_idx, [(file_path, page_idx, False)
+                                                 for page_idx in pages_to_insert if 0 <= page_idx < num_pages])
 
-            for i, page_idx in enumerate(pages_to_insert):
-                if 0 <= page_idx < num_pages:
-                    self.all_pages.insert(insert_idx + i, (file_path, page_idx, False))
+            self.load_executor.submit(file_content_hash, file_path)
 
             # Also add to source PDFs if not already there
             if file_path not in self.source_pdfs:
@@ -770,7 +841,6 @@ class PDFOrganizerTab:
                 self.pdf_listbox.insert(tk.END, os.path.basename(file_path))
 
             self.update_preview()
-            self.refresh_thumbnails()
             self.status_var.set(f"Inserted {len(pages_to_insert)} pages from {os.path.basename(file_path)}")
 
         except Exception as e:
@@ -778,11 +848,11 @@ class PDFOrganizerTab:
     
     def extract_current_page(self):
         """Extract the current page to a separate PDF"""
-        if not self.all_pages or self.selected_index < 0:
+        if not self.pages or self.selected_index < 0:
             return
             
         # Get page info
-        pdf_path, page_idx, is_blank = self.all_pages[self.selected_index]
+        pdf_path, page_idx, is_blank = self.pages[self.selected_index][:3]
         
         if is_blank:
             messagebox.showinfo("Extract", "Cannot extract a blank page.")
@@ -805,56 +875,168 @@ class PDFOrganizerTab:
     
     def _extract_page_thread(self, pdf_path, page_idx, output_path):
         try:
-            # Open source PDF
-            pdf = pdfium.PdfDocument(pdf_path)
-            
-            # Create new PDF with just this page
-            output_pdf = pdfium.PdfDocument.new()
-            output_pdf.import_pages(pdf, [page_idx])
-            
-            # Save the new PDF
-            output_pdf.save(output_path)
+            # pdfium is not thread-safe; the render pool may be using it right now
+            with PDFIUM_LOCK:
+                # Open source PDF
+                pdf = pdfium.PdfDocument(pdf_path)
+                try:
+                    # Create new PDF with just this page
+                    output_pdf = pdfium.PdfDocument.new()
+                    try:
+                        output_pdf.import_pages(pdf, [page_idx])
+                        
+                        # Save the new PDF
+                        output_pdf.save(output_path)
+                    finally:
+                        output_pdf.close()
+                finally:
+                    pdf.close()
             
             self.frame.winfo_toplevel().after(0, lambda: messagebox.showinfo(
                 "Success", f"Page extracted and saved to:\n{output_path}"))
             self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Page extracted successfully"))
         
         except Exception as e:
+            # e is unbound once the except block ends, so keep the message for the callbacks
+            error_msg = str(e)
             self.frame.winfo_toplevel().after(0, lambda: messagebox.showerror(
-                "Error", f"Failed to extract page: {str(e)}"))
-            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Error: {str(e)}"))
+                "Error", f"Failed to extract page: {error_msg}"))
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Error: {error_msg}"))
     
-    def duplicate_page(self):
-        """Duplicate the current page"""
-        if not self.all_pages or self.selected_index < 0:
+    def export_selected_pages(self):
+        """Export the selected pages to single-page PDFs or images"""
+        if not self.pages or self.selected_index < 0:
             return
-            
-        # Get page info
-        pdf_path, page_idx, is_blank = self.all_pages[self.selected_index]
         
-        # Insert a copy after the current page
-        self.all_pages.insert(self.selected_index + 1, (pdf_path, page_idx, is_blank))
+        indices = self._selected_indices()
+        
+        # The chosen extension decides the format; pages are saved as <name>_<position>.<ext>
+        output_path = filedialog.asksaveasfilename(
+            title=f"Export {len(indices)} Selected Pages",
+            defaultextension=".pdf",
+            filetypes=[("Single-page PDFs", "*.pdf"), ("PNG Images", "*.png"),
+                       ("JPEG Images", "*.jpg"), ("TIFF Images", "*.tif"), ("All Files", "*.*")],
+            initialdir=self.output_dir.get(),
+            initialfile="page.pdf"
+        )
+        if not output_path:
+            return
+        
+        base_name, extension = os.path.splitext(os.path.basename(output_path))
+        extension = extension.lstrip('.').lower() or "pdf"
+        if extension != "pdf" and extension not in pdf_utils.EXPORT_IMAGE_FORMATS:
+            messagebox.showerror("Error", f"Unsupported export format: .{extension}")
+            return
+        
+        dpi = 150
+        if extension != "pdf":
+            dpi = simpledialog.askinteger("Export Pages", "Image resolution (DPI):",
+                                          initialvalue=150, minvalue=36, maxvalue=600)
+            if not dpi:
+                return
+        
+        # Snapshot the pages on the Tk thread; positions are 1-based organizer page numbers
+        entries = [(idx + 1, *self.pages[idx][:4]) for idx in indices]
         
-        # Move to the new page
-        self.selected_index += 1
+        utils.set_controls_state(self.frame, tk.DISABLED)
+        self.process_canceled = False
+        self.export_cancel_event = pdf_utils.PROCESS_CONTEXT.Event()
+        self.status_var.set(f"Exporting {len(entries)} pages...")
+        self.progress_var.set(0)
+        threading.Thread(target=self._export_thread,
+                         args=(entries, os.path.dirname(output_path), base_name, extension, dpi)).start()
+    
+    def _export_thread(self, entries, output_dir, base_name, extension, dpi):
+        try:
+            start = time.perf_counter()
+            
+            def on_progress(done, total, rate):
+                self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(done / total * 100))
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(
+                    f"Exported {done}/{total} pages ({rate:.1f} pages/s)..."))
+            
+            exported, failures = pdf_utils.export_pages(
+                entries, output_dir, base_name, extension, dpi=dpi,
+                progress_callback=on_progress,
+                cancel_event=self.export_cancel_event
+            )
+            elapsed = time.perf_counter() - start
+            
+            if self.export_cancel_event.is_set():
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(
+                    f"Export canceled after {exported} pages"))
+                return
+            
+            rate = exported / elapsed if elapsed > 0 else 0.0
+            summary = f"Exported {exported} pages in {elapsed:.1f}s ({rate:.1f} pages/s)"
+            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(summary))
+            
+            if failures:
+                shown = [f"{os.path.basename(path)}: {error}" for path, error in failures[:10]]
+                if len(failures) > len(shown):
+                    shown.append(f"...and {len(failures) - len(shown)} more")
+                self.frame.winfo_toplevel().after(0, lambda: messagebox.showwarning(
+                    "Warning", f"{summary}.\n{len(failures)} pages failed:\n\n" + "\n".join(shown)))
+            else:
+                self.frame.winfo_toplevel().after(0, lambda: messagebox.showinfo(
+                    "Success", f"{summary}.\nSaved to: {output_dir}"))
         
-        # Update preview and thumbnails
+        except Exception as e:
+            # e is unbound once the except block ends, so keep the message for the callbacks
+            error_msg = str(e)
+            self.frame.winfo_toplevel().after(0, lambda: messagebox.showerror(
+                "Error", f"Failed to export pages: {error_msg}"))
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Error: {error_msg}"))
+        finally:
+            # Re-enable controls
+            self.frame.winfo_toplevel().after(0, lambda: utils.set_controls_state(self.frame, tk.NORMAL))
+    
+    def duplicate_page(self):
+        """Duplicate the selected pages"""
+        if not self.pages or self.selected_index < 0:
+            return
+            
+        # Insert copies (with their rotations) after the last selected page
+        indices = self._selected_indices()
+        first_copy = self.pages.duplicate_indices(indices)
+        
+        # Move to the new pages
+        self.selected_index = first_copy
+        if len(indices) > 1:
+            self.selected_uids = set(self.pages.uid(i) for i in range(first_copy, first_copy + len(indices)))
+        else:
+            self.selected_uids = {self.pages.uid(first_copy)}
+        self._selection_anchor = self.pages.uid(first_copy)
+        
+        # Update preview
         self.update_preview()
-        self.refresh_thumbnails()
         
-        self.status_var.set("Page duplicated")
+        self.status_var.set("Page duplicated" if len(indices) == 1 else f"{len(indices)} pages duplicated")
     
     def move_to_position(self):
-        """Move the current page to a specified position"""
-        if not self.all_pages or self.selected_index < 0:
+        """Move the selected pages to a specified position"""
+        if not self.pages or self.selected_index < 0:
+            return
+        
+        indices = self._selected_indices()
+        if len(indices) > 1:
+            position = simpledialog.askinteger(
+                "Move Pages",
+                f"Enter new position for the {len(indices)} selected pages (1-{len(self.pages) - len(indices) + 1}):",
+                minvalue=1,
+                maxvalue=len(self.pages) - len(indices) + 1
+            )
+            if position:
+                self._move_pages(indices, position - 1)
             return
             
         # Ask for the new position
         position = simpledialog.askinteger(
             "Move Page", 
-            f"Enter new position (1-{len(self.all_pages)}):",
+            f"Enter new position (1-{len(self.pages)}):",
             minvalue=1, 
-            maxvalue=len(self.all_pages)
+            maxvalue=len(self.pages)
         )
         
         if not position:
@@ -868,202 +1050,210 @@ class PDFOrganizerTab:
             self.reorder_pages(self.selected_index, position)
             self.selected_index = position
             
-            # Update preview and thumbnails
+            # Update preview
             self.update_preview()
-            self.refresh_thumbnails()
             
             self.status_var.set(f"Page moved to position {position + 1}")
     
     def reorder_pages(self, from_idx, to_idx):
         """Reorder pages by moving from_idx to to_idx"""
-        if from_idx < 0 or from_idx >= len(self.all_pages) or to_idx < 0 or to_idx >= len(self.all_pages):
+        if from_idx < 0 or from_idx >= len(self.pages) or to_idx < 0 or to_idx >= len(self.pages):
             return
             
-        # Remove the page from its current position
-        page = self.all_pages.pop(from_idx)
+        # The page keeps its rotation wherever it ends up
+        self.pages.move(from_idx, to_idx)
+    
+    def _move_pages(self, indices, start):
+        """Move several pages as one block that starts at start"""
+        # The preview keeps showing the same page wherever it ends up
+        current_uid = self.pages.uid(self.selected_index) if 0 <= self.selected_index < len(self.pages) else None
+        self.pages.move_indices(indices, start)
+        if current_uid is not None:
+            self.selected_index = self.pages.index_of(current_uid)
+        self.update_preview()
         
-        # Insert at the new position
-        self.all_pages.insert(to_idx, page)
+        position = min(start, len(self.pages) - len(indices)) + 1
+        if len(indices) == 1:
+            self.status_var.set(f"Page moved to position {position}")
+        else:
+            self.status_var.set(f"{len(indices)} pages moved to position {position}")
     
     # Thumbnails management
     def refresh_thumbnails(self):
         """Refresh the thumbnails display"""
-        # Clear thumbnails container
-        for widget in self.thumbnails_container.winfo_children():
-            widget.destroy()
-        
-        # Clear canvas
-        self.thumb_canvas.delete("all")
+        # Drop queued renders for the tiles we are about to reassign
+        self.render_pool.new_generation("thumbnails")
+        self._pending_thumbnails.clear()
         
-        if not self.all_pages:
+        self.thumbnail_grid.refresh()
+    
+    def _thumbnail_cache_key(self, idx):
+        """Return the cache key for the thumbnail of the page at idx"""
+        pdf_path, page_idx, is_blank, rotation, _ = self.pages[idx]
+        # Include rotation and tile size in cache key so changed pages get re-rendered
+        width, height = self.thumbnail_grid.tile_width, self.thumbnail_grid.tile_height
+        return f"{pdf_path}_{page_idx}_{is_blank}_{rotation}_{width}x{height}"
+    
+    def _get_thumbnail_image(self, idx, visible):
+        """Return the cached thumbnail for idx, or queue a render and return None"""
+        cache_key = self._thumbnail_cache_key(idx)
+        photo = self.thumbnail_cache.get(cache_key)
+        if photo is not None:
+            return photo
+        
+        if cache_key not in self._pending_thumbnails:
+            self._pending_thumbnails.add(cache_key)
+            priority = PRIORITY_VISIBLE if visible else PRIORITY_BACKGROUND
+            self._create_thumbnail(idx, cache_key, priority)
+        return None
+    
+    def _create_thumbnail(self, idx, cache_key, priority=PRIORITY_BACKGROUND):
+        """Queue a render of the thumbnail for the page at idx"""
+        pdf_path, page_idx, is_blank, rotation, _ = self.pages[idx]
+        width, height = self.thumbnail_grid.tile_width, self.thumbnail_grid.tile_height
+        generation = self.render_pool.current_generation("thumbnails")
+        
+        def on_rendered(img, error):
+            # Hand the result back to the Tk thread, which owns the widgets
+            self.frame.winfo_toplevel().after(0,
+                lambda: self._on_thumbnail_rendered(cache_key, img, error, generation))
+        
+        self.render_pool.submit(
+            lambda: self._generate_thumbnail(pdf_path, page_idx, is_blank, width, height, rotation),
+            priority=priority,
+            callback=on_rendered,
+            channel="thumbnails",
+            generation=generation
+        )
+    
+    def _generate_thumbnail(self, pdf_path, page_idx, is_blank, width, height, rotation=0):
+        """Render a page thumbnail as a PIL image (runs on a render pool worker)"""
+        if is_blank:
+            return Image.new('RGB', (width, height), 'white')
+        
+        # Thumbnails rendered in an earlier session are reused from disk, once the
+        # loader has hashed the file (the render pool never reads whole files)
+        content_hash = cached_content_hash(pdf_path)
+        disk_key = None
+        if content_hash is not None:
+            disk_key = ThumbnailCache.disk_key(content_hash, page_idx, rotation, width, height)
+            img = self.thumbnail_cache.load(disk_key)
+            if img is not None:
+                return img
+        
+        with PDFIUM_LOCK:
+            pdf = self.render_pool.open_document(pdf_path)
+            page = pdf[page_idx]
+            img = render_to_fit(page, width, height, rotation)
+            page.close()
+        
+        if disk_key is not None:
+            self.thumbnail_cache.store(disk_key, img)
+        return img
+    
+    def _on_thumbnail_rendered(self, cache_key, img, error, generation):
+        """Display a finished render unless the grid has been rebuilt since"""
+        if generation != self.render_pool.current_generation("thumbnails"):
             return
-            
-        # Calculate thumbnail size based on available width
-        canvas_width = self.thumb_canvas.winfo_width()
-        if canvas_width <= 1:
-            canvas_width = 200  # Default if not realized yet
-        
-        thumb_width = min(150, canvas_width - 20)
-        thumb_height = int(thumb_width * 1.414)  # Approximate A4 ratio
-        
-        # Calculate number of columns
-        num_cols = max(1, canvas_width // (thumb_width + 10))
-        
-        # Create thumbnails
-        for idx, (pdf_path, page_idx, is_blank) in enumerate(self.all_pages):
-            # Calculate grid position
-            row = idx // num_cols
-            col = idx % num_cols
-            
-            # Create frame for thumbnail
-            frame = ttk.Frame(self.thumbnails_container, width=thumb_width, height=thumb_height + 30)
-            frame.grid(row=row, column=col, padx=5, pady=5)
-            frame.pack_propagate(False)
-            
-            # Create canvas for thumbnail
-            canvas = tk.Canvas(frame, width=thumb_width, height=thumb_height, bg="white", highlightthickness=1)
-            canvas.pack(pady=(0, 2))
-            
-            # Create label for page number
-            ttk.Label(frame, text=f"Page {idx + 1}").pack()
-            
-            # Generate and display thumbnail (pass rotation)
-            rotation = self.page_rotations.get(idx, 0)
-            self._create_thumbnail(canvas, pdf_path, page_idx, is_blank, idx, thumb_width, thumb_height, rotation)
-            
-            # Bind click event
-            canvas.bind("<Button-1>", lambda e, i=idx: self._select_thumbnail(i))
+        self._pending_thumbnails.discard(cache_key)
         
-        # Update canvas scroll region
-        self.thumbnails_container.update_idletasks()
-        self.thumb_canvas.configure(scrollregion=self.thumb_canvas.bbox("all"))
-    
-    def _create_thumbnail(self, canvas, pdf_path, page_idx, is_blank, idx, width, height, rotation=0):
-        """Create a thumbnail for the given page"""
-        # Include rotation in cache key so rotated pages get re-rendered
-        cache_key = f"{pdf_path}_{page_idx}_{is_blank}_{rotation}"
-        if cache_key in self.thumbnail_cache:
-            photo = self.thumbnail_cache[cache_key]
-            canvas.create_image(width/2, height/2, image=photo, anchor=tk.CENTER, tags=f"thumb_{idx}")
+        # Pages may have moved while rendering, so find the tiles in view by key
+        indices = [idx for idx in self.thumbnail_grid.tiles if self._thumbnail_cache_key(idx) == cache_key]
+        
+        if error is not None:
+            for idx in indices:
+                self.thumbnail_grid.set_error(idx)
+            if indices:
+                self.status_var.set(f"Error rendering page {min(indices) + 1}: {str(error)}")
             return
-
-        threading.Thread(target=self._generate_thumbnail,
-                       args=(canvas, pdf_path, page_idx, is_blank, idx, width, height, cache_key, rotation)).start()
-    
-    def _generate_thumbnail(self, canvas, pdf_path, page_idx, is_blank, idx, width, height, cache_key, rotation=0):
-        try:
-            if is_blank:
-                img = Image.new('RGB', (width, height), 'white')
-            else:
-                pdf = pdfium.PdfDocument(pdf_path)
-                page = pdf[page_idx]
-
-                pdfium_rotation = (rotation // 90) % 4
-                pil_image = page.render(
-                    scale=0.5,
-                    rotation=pdfium_rotation
-                ).to_pil()
-                
-                # Resize to thumbnail size
-                img_width, img_height = pil_image.size
-                ratio = min(width / img_width, height / img_height)
-                new_width = int(img_width * ratio)
-                new_height = int(img_height * ratio)
-                img = pil_image.resize((new_width, new_height), Image.LANCZOS)
-                
-                # Create blank image with right size and paste thumbnail centered
-                bg = Image.new('RGB', (width, height), 'white')
-                x = (width - new_width) // 2
-                y = (height - new_height) // 2
-                bg.paste(img, (x, y))
-                img = bg
-            
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(img)
-            
-            # Save in cache
-            self.thumbnail_cache[cache_key] = photo
-            
-            # Draw on canvas in main thread
-            self.frame.winfo_toplevel().after(0, 
-                lambda: self._draw_thumbnail(canvas, photo, idx, width, height))
         
-        except Exception as e:
-            # Draw error thumbnail
-            self.frame.winfo_toplevel().after(0, 
-                lambda: self._draw_error_thumbnail(canvas, str(e), idx, width, height))
+        # PhotoImage must be created on the Tk thread
+        photo = ImageTk.PhotoImage(img)
+        self.thumbnail_cache.put(cache_key, photo)
+        for idx in indices:
+            self.thumbnail_grid.set_image(idx, photo)
     
-    def _draw_thumbnail(self, canvas, photo, idx, width, height):
-        """Draw the thumbnail on the canvas"""
-        # Clear previous content
-        canvas.delete("all")
-        
-        # Draw thumbnail
-        canvas.create_image(width/2, height/2, image=photo, anchor=tk.CENTER, tags=f"thumb_{idx}")
+    def _select_thumbnail(self, idx, event=None):
+        """Select the thumbnail at the given index (Ctrl toggles, Shift selects a range)"""
+        if idx < 0 or idx >= len(self.pages):
+            return
         
-        # Highlight if selected
-        if idx == self.selected_index:
-            canvas.config(highlightbackground="blue", highlightthickness=3)
+        uid = self.pages.uid(idx)
+        state = event.state if event is not None else 0
+        if state & 0x0001 and self._selection_anchor is not None:  # Shift
+            anchor = self.pages.index_of(self._selection_anchor)
+            if anchor < 0:
+                anchor = max(0, self.selected_index)
+            low, high = min(anchor, idx), max(anchor, idx)
+            self.selected_uids = set(self.pages.uids()[low:high + 1])
+        elif state & 0x0004:  # Control
+            self._selection_anchor = uid
+            if self.selected_index >= 0 and not self.selected_uids:
+                # Start from the page that is currently shown
+                self.selected_uids.add(self.pages.uid(self.selected_index))
+            if uid in self.selected_uids:
+                self.selected_uids.discard(uid)
+                remaining = self.pages.indices_of(self.selected_uids)
+                if remaining:
+                    # Show the nearest page that is still selected
+                    idx = min(remaining, key=lambda i: abs(i - idx))
+            else:
+                self.selected_uids.add(uid)
         else:
-            canvas.config(highlightbackground="gray", highlightthickness=1)
-    
-    def _draw_error_thumbnail(self, canvas, error, idx, width, height):
-        """Draw an error thumbnail"""
-        # Clear previous content
-        canvas.delete("all")
+            self._selection_anchor = uid
+            self.selected_uids = {uid}
         
-        # Draw error message
-        canvas.create_rectangle(0, 0, width, height, fill="lightgray")
-        canvas.create_text(width/2, height/2, text="Error", tags=f"thumb_{idx}")
+        self.selected_index = idx
+        self.update_preview()
         
-        # Create tooltip
-        self._create_tooltip(canvas, error)
+        # Update thumbnail highlighting
+        self.thumbnail_grid.update_selection()
     
-    def _create_tooltip(self, widget, text):
-        """Create a tooltip for the widget"""
-        tooltip = tk.Label(widget, text=text, bg="yellow", relief="solid", borderwidth=1)
-        
-        def enter(event):
-            x, y, _, _ = widget.bbox("all")
-            tooltip.place(x=x, y=y, anchor=tk.NW)
-            
-        def leave(event):
-            tooltip.place_forget()
-            
-        widget.bind("<Enter>", enter)
-        widget.bind("<Leave>", leave)
+    def _is_page_selected(self, idx):
+        """Whether the page at idx is one of the pages bulk operations act on"""
+        if 0 <= self.selected_index < len(self.pages) and self.pages.uid(self.selected_index) in self.selected_uids:
+            return self.pages.uid(idx) in self.selected_uids
+        return idx == self.selected_index
     
-    def _select_thumbnail(self, idx):
-        """Select the thumbnail at the given index"""
-        if idx >= 0 and idx < len(self.all_pages):
-            self.selected_index = idx
-            self.update_preview()
-            
-            # Update thumbnail highlighting
-            for widget in self.thumbnails_container.winfo_children():
-                if isinstance(widget, ttk.Frame) and len(widget.winfo_children()) > 0:
-                    canvas = widget.winfo_children()[0]
-                    if isinstance(canvas, tk.Canvas):
-                        canvas_tag = canvas.gettags("all")
-                        if canvas_tag and canvas_tag[0].startswith("thumb_"):
-                            thumb_idx = int(canvas_tag[0].split("_")[1])
-                            if thumb_idx == idx:
-                                canvas.config(highlightbackground="blue", highlightthickness=3)
-                            else:
-                                canvas.config(highlightbackground="gray", highlightthickness=1)
+    def _selected_indices(self):
+        """Return the ascending indices that bulk operations act on"""
+        if self.selected_index < 0 or self.selected_index >= len(self.pages):
+            return []
+        if self.pages.uid(self.selected_index) in self.selected_uids:
+            return self.pages.indices_of(self.selected_uids)
+        return [self.selected_index]
     
     def select_all_thumbnails(self):
-        """Select all thumbnails (for future multi-select operations)"""
-        messagebox.showinfo("Info", "Multi-select operations are not implemented yet.")
+        """Select all thumbnails"""
+        if not self.pages:
+            return
+        self.selected_uids = set(self.pages.uids())
+        if self.selected_index < 0:
+            self.selected_index = 0
+            self.update_preview()
+        self.thumbnail_grid.update_selection()
+        self.status_var.set(f"{len(self.pages)} pages selected")
     
     def deselect_all_thumbnails(self):
-        """Deselect all thumbnails"""
-        messagebox.showinfo("Info", "Multi-select operations are not implemented yet.")
+        """Deselect all thumbnails except the current page"""
+        self.selected_uids.clear()
+        self.thumbnail_grid.update_selection()
+        self.status_var.set("Selection cleared")
     
     def delete_selected_thumbnails(self):
-        """Delete selected thumbnails (for future multi-select operations)"""
-        # For now, just delete current page
-        self.delete_current_page()
+        """Delete all selected pages in one operation"""
+        indices = self._selected_indices()
+        if not indices:
+            return
+        
+        self.selected_uids.difference_update(self.pages.uid(idx) for idx in indices)
+        self.pages.remove_indices(indices)
+        
+        # Show the page that took the place of the first deleted one
+        self.selected_index = min(indices[0], len(self.pages) - 1)
+        self.update_preview()
+        
+        self.status_var.set("Page deleted" if len(indices) == 1 else f"{len(indices)} pages deleted")
     
     # Output and processing
     def browse_output_dir(self):
@@ -1077,7 +1267,7 @@ class PDFOrganizerTab:
     
     def start_process(self):
         """Start the PDF organization process"""
-        if not self.all_pages:
+        if not self.pages:
             messagebox.showerror("Error", "No pages to process.")
             return
             
@@ -1114,43 +1304,38 @@ class PDFOrganizerTab:
             self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Creating organized PDF..."))
             self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(0))
             
-            # Create a new PDF
-            writer = PdfWriter()
+            # Snapshot the page list with each page's rotation
+            entries = [page[:4] for page in self.pages]
+            total_pages = len(entries)
             
-            # Process each page
-            total_pages = len(self.all_pages)
-            for i, (pdf_path, page_idx, is_blank) in enumerate(self.all_pages):
-                if self.process_canceled:
-                    self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Process canceled"))
-                    return
-                    
-                # Update progress
-                progress_pct = ((i + 1) / total_pages) * 100
+            def on_progress(done, total):
+                progress_pct = (done / total) * 100
                 self.frame.winfo_toplevel().after(0, lambda p=progress_pct: self.progress_var.set(p))
-                self.frame.winfo_toplevel().after(0, lambda p=i+1, t=total_pages: 
+                self.frame.winfo_toplevel().after(0, lambda p=done, t=total:
                     self.status_var.set(f"Processing page {p}/{t}..."))
-                
-                if is_blank:
-                    # Create a blank page
-                    writer.add_blank_page(width=612, height=792)  # Letter size
-                else:
-                    # Add page from source PDF
-                    try:
-                        reader = PdfReader(pdf_path)
-                        page = reader.pages[page_idx]
-                        # Apply rotation if set
-                        rotation_deg = self.page_rotations.get(i, 0)
-                        if rotation_deg:
-                            page.rotate(rotation_deg)
-                        writer.add_page(page)
-                    except Exception as e:
-                        self.frame.winfo_toplevel().after(0, lambda p=i+1, err=str(e): 
-                            messagebox.showwarning("Warning", f"Failed to process page {p}: {err}"))
-                        continue
             
-            # Save the new PDF
-            with open(output_path, "wb") as f:
-                writer.write(f)
+            def on_warning(message):
+                self.frame.winfo_toplevel().after(0, lambda: messagebox.showwarning("Warning", message))
+            
+            # Copy the pages in runs, opening each source PDF only once
+            completed = pdf_utils.write_page_list(
+                entries, output_path,
+                progress_callback=on_progress,
+                cancel_check=lambda: self.process_canceled,
+                warning_callback=on_warning
+            )
+            if not completed:
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Process canceled"))
+                return
+            
+            if self.linearize.get():
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Linearizing for fast web view..."))
+                try:
+                    linearize_utils.linearize_pdf(output_path)
+                except Exception as e:
+                    # The saved file is fine, keep it
+                    self.frame.winfo_toplevel().after(0, lambda err=str(e): messagebox.showwarning("Warning",
+                        f"The PDF was saved without linearization: {err}"))
             
             # Complete
             self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
@@ -1174,8 +1359,17 @@ class PDFOrganizerTab:
     def cancel_process(self):
         """Cancel the current process"""
         self.process_canceled = True
+        if self.export_cancel_event is not None:
+            self.export_cancel_event.set()
         self.status_var.set("Canceling process...")
     
     def open_output_folder(self):
         """Open the output folder"""
-        utils.open_output_folder(self.output_dir.get())
\ No newline at end of file
+        utils.open_output_folder(self.output_dir.get())
+    
+    def shutdown(self):
+        """Stop the background workers and close the open documents (on application exit)"""
+        self._load_generation += 1  # Discard files that are still loading
+        self.load_executor.shutdown(wait=False, cancel_futures=True)
+        self.render_pool.shutdown()
+        self.render_pool.close_documents()
\ No newline at end of file
@@ -4,9 +4,8 @@ import threading
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pypdfium2 as pdfium
-from PyPDF2 import PdfReader, PdfWriter
-from PIL import Image, ImageDraw, ImageFont
+import pdf_utils
+import security_utils
 import utils
 from styles import COLORS, FONTS
 
@@ -18,6 +17,8 @@ class PDFSecurityTab:
         
         # Variables
         self.pdf_path = tk.StringVar()
+        self.batch_mode = tk.BooleanVar(value=False)  # Process every PDF in a folder tree
+        self.batch_dir = tk.StringVar()
         self.output_dir = tk.StringVar()
         self.output_name = tk.StringVar(value="secured.pdf")
         self.progress_var = tk.DoubleVar(value=0.0)
@@ -33,6 +34,7 @@ class PDFSecurityTab:
         self.allow_printing = tk.BooleanVar(value=True)
         self.allow_copying = tk.BooleanVar(value=True)
         self.allow_modification = tk.BooleanVar(value=True)
+        self.encryption = tk.StringVar(value=security_utils.default_encryption())  # aes256 or rc4_128
         
         # Watermark options
         self.add_watermark = tk.BooleanVar(value=False)
@@ -42,6 +44,7 @@ class PDFSecurityTab:
         self.watermark_opacity = tk.IntVar(value=30)
         self.watermark_position = tk.StringVar(value="center")
         self.watermark_rotation = tk.IntVar(value=45)
+        self.incremental_watermark = tk.BooleanVar(value=False)  # Append an update instead of rewriting
         
         # Create UI elements
         self.create_file_frame()
@@ -62,14 +65,10 @@ class PDFSecurityTab:
         
         # Process canceled flag
         self.process_canceled = False
-    
-    @staticmethod
-    def to_float(value):
-        """Convert any numeric value to float, including Decimal types."""
-        try:
-            return float(value)
-        except (TypeError, ValueError):
-            return 0.0
+        
+        # Watermark stamps of the current job, cached by page geometry
+        self._stamper = None
+        self.batch_cancel_event = None  # Set to stop the worker processes of a batch run
     
     def create_file_frame(self):
         file_frame = ttk.LabelFrame(self.frame, text="File Selection", padding=10)
@@ -88,6 +87,14 @@ class PDFSecurityTab:
         ttk.Label(file_frame, text="Output Filename:").grid(row=2, column=0, sticky="w", padx=5, pady=5)
         ttk.Entry(file_frame, textvariable=self.output_name, width=50).grid(row=2, column=1, sticky="ew", padx=5, pady=5)
         
+        # Batch folder selection
+        ttk.Checkbutton(file_frame, text="Batch Folder:", variable=self.batch_mode).grid(
+            row=3, column=0, sticky="w", padx=5, pady=5)
+        ttk.Entry(file_frame, textvariable=self.batch_dir, width=50).grid(row=3, column=1, sticky="ew", padx=5, pady=5)
+        ttk.Button(file_frame, text="Browse...", command=self.browse_batch_dir).grid(row=3, column=2, sticky="e", padx=5, pady=5)
+        ttk.Label(file_frame, text="(all PDFs in the folder and its subfolders; outputs keep their names and skip files that are up to date)").grid(
+            row=4, column=1, columnspan=2, sticky="w", padx=5)
+        
         # Make column 1 expand
         file_frame.columnconfigure(1, weight=1)
     
@@ -141,6 +148,20 @@ class PDFSecurityTab:
             row=0, column=1, sticky="w", padx=5, pady=2)
         ttk.Checkbutton(permissions_frame, text="Allow Modification", variable=self.allow_modification).grid(
             row=1, column=0, sticky="w", padx=5, pady=2)
+        
+        # Encryption frame
+        encryption_frame = ttk.LabelFrame(self.add_password_frame, text="Encryption", padding=5)
+        encryption_frame.grid(row=3, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+        
+        aes_label = "AES-256"
+        if not security_utils.is_aes256_available():
+            aes_label += " - requires pikepdf or qpdf"
+        ttk.Radiobutton(encryption_frame, text=aes_label, variable=self.encryption,
+                        value=security_utils.ENCRYPTION_AES256,
+                        state="normal" if security_utils.is_aes256_available() else "disabled").grid(
+            row=0, column=0, sticky="w", padx=5, pady=2)
+        ttk.Radiobutton(encryption_frame, text="RC4 128-bit (older readers)", variable=self.encryption,
+                        value=security_utils.ENCRYPTION_RC4_128).grid(row=1, column=0, sticky="w", padx=5, pady=2)
     
     def create_remove_password_frame(self):
         self.remove_password_frame = ttk.Frame(self.security_container)
@@ -222,6 +243,9 @@ class PDFSecurityTab:
         ttk.Scale(self.watermark_options, from_=0, to=360, variable=self.watermark_rotation, orient="horizontal").grid(
             row=5, column=1, sticky="ew", padx=5, pady=5)
         
+        ttk.Checkbutton(self.watermark_options, text="Append as incremental update (fast for large PDFs, no password changes)",
+                        variable=self.incremental_watermark).grid(row=6, column=0, columnspan=2, sticky="w", padx=5, pady=5)
+        
         # Initially hide watermark options
         self.toggle_watermark()
         self.toggle_watermark_type()
@@ -274,6 +298,15 @@ class PDFSecurityTab:
         if selected_dir:
             self.output_dir.set(selected_dir)
     
+    def browse_batch_dir(self):
+        selected_dir = filedialog.askdirectory(
+            title="Select Folder of PDFs",
+            initialdir=self.batch_dir.get() if self.batch_dir.get() else os.getcwd()
+        )
+        if selected_dir:
+            self.batch_dir.set(selected_dir)
+            self.batch_mode.set(True)
+    
     def browse_watermark_image(self):
         selected_file = filedialog.askopenfilename(
             title="Select Watermark Image",
@@ -286,6 +319,10 @@ class PDFSecurityTab:
             self.watermark_image_path.set(selected_file)
     
     def start_process(self):
+        if self.batch_mode.get():
+            self.start_batch()
+            return
+        
         # Validate inputs
         if not self.pdf_path.get() or not os.path.isfile(self.pdf_path.get()):
             messagebox.showerror("Error", "Please select a valid PDF file.")
@@ -318,8 +355,24 @@ class PDFSecurityTab:
         
         output_path = os.path.join(self.output_dir.get(), output_filename)
         
+        incremental = self.add_watermark.get() and self.incremental_watermark.get()
+        if incremental and self.operation_mode.get() != "none":
+            messagebox.showerror("Error", "Incremental watermarking keeps the file's security settings unchanged.\n"
+                                 "Turn it off to add or remove a password.")
+            return
+        
+        # An incremental update can be appended to the input itself; everything else rewrites it
+        in_place = os.path.abspath(output_path) == os.path.abspath(self.pdf_path.get())
+        if in_place and not incremental:
+            messagebox.showerror("Error", "The output file must be different from the input PDF.")
+            return
+        
         # Confirm if file exists
-        if os.path.exists(output_path):
+        if in_place:
+            result = messagebox.askyesno("Confirm", f"Append the watermark to {output_filename} in place?")
+            if not result:
+                return
+        elif os.path.exists(output_path):
             result = messagebox.askyesno("Confirm", f"File {output_filename} already exists. Overwrite?")
             if not result:
                 return
@@ -329,326 +382,182 @@ class PDFSecurityTab:
         
         # Start processing in a separate thread
         self.process_canceled = False
+        # Settings may have changed since the last run
+        self._stamper = security_utils.WatermarkStamper(**self._watermark_settings()) if self.add_watermark.get() else None
         threading.Thread(target=self._processing_thread, args=(output_path,)).start()
     
-    def _processing_thread(self, output_path):
-        try:
-            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Processing PDF..."))
-            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(0))
-            
-            # Handle based on operation mode
-            if self.operation_mode.get() == "remove_password":
-                self._remove_password(output_path)
-            else:
-                # For "none" or "add_password" modes
-                self._process_pdf(output_path)
-            
-        except Exception as e:
-            self.frame.winfo_toplevel().after(0, lambda: messagebox.showerror("Error", f"Failed to process PDF: {str(e)}"))
-            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Error: {str(e)}"))
-            # Delete partial output
-            if os.path.exists(output_path):
-                try:
-                    os.remove(output_path)
-                except:
-                    pass
-        finally:
-            # Re-enable controls
-            self.frame.winfo_toplevel().after(0, lambda: utils.set_controls_state(self.frame, tk.NORMAL))
+    def _watermark_settings(self):
+        """Return the watermark options as WatermarkStamper arguments"""
+        return {
+            "watermark_type": self.watermark_type.get(),
+            "text": self.watermark_text.get(),
+            "image_path": self.watermark_image_path.get(),
+            "opacity": self.watermark_opacity.get(),
+            "position": self.watermark_position.get(),
+            "rotation": self.watermark_rotation.get(),
+        }
+    
+    def _security_settings(self):
+        """Return the current options as a plain dict for security_utils.process_pdf"""
+        return {
+            "mode": self.operation_mode.get(),
+            "owner_password": self.owner_password.get(),
+            "user_password": self.user_password.get(),
+            "current_password": self.current_password.get(),
+            "allow_printing": self.allow_printing.get(),
+            "allow_copying": self.allow_copying.get(),
+            "allow_modification": self.allow_modification.get(),
+            "encryption": self.encryption.get(),
+            "watermark": self._watermark_settings() if self.add_watermark.get() else None,
+            "incremental": self.incremental_watermark.get(),
+        }
     
-    def _remove_password(self, output_path):
-        """Process for removing password protection"""
-        self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Removing password protection..."))
-        self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(20))
+    def start_batch(self):
+        """Validate the options and process every PDF in the batch folder"""
+        input_dir = self.batch_dir.get()
+        output_dir = self.output_dir.get()
+        if not input_dir or not os.path.isdir(input_dir):
+            messagebox.showerror("Error", "Please select a valid folder of PDFs.")
+            return
+        
+        if not output_dir or not os.path.isdir(output_dir):
+            messagebox.showerror("Error", "Please select a valid output directory.")
+            return
+        
+        # Outputs keep the source names, so they must not land on top of the sources
+        if os.path.abspath(input_dir) == os.path.abspath(output_dir):
+            messagebox.showerror("Error", "The output directory must be different from the batch folder.")
+            return
+        
+        if self.add_watermark.get() and self.watermark_type.get() == "image":
+            if not self.watermark_image_path.get() or not os.path.isfile(self.watermark_image_path.get()):
+                messagebox.showerror("Error", "Please select a valid watermark image.")
+                return
+        
+        if self.operation_mode.get() == "add_password":
+            if not self.owner_password.get() and not self.user_password.get():
+                messagebox.showerror("Error", "Please enter at least one password for encryption.")
+                return
         
-        # Try to open with provided password
+        if self.operation_mode.get() == "none" and not self.add_watermark.get():
+            messagebox.showerror("Error", "Choose a password operation or a watermark to apply to the folder.")
+            return
+        
+        # Disable controls during processing
+        utils.set_controls_state(self.frame, tk.DISABLED)
+        
+        # Start processing in a separate thread
+        self.process_canceled = False
+        self.batch_cancel_event = pdf_utils.PROCESS_CONTEXT.Event()
+        threading.Thread(target=self._batch_thread, args=(input_dir, output_dir, self._security_settings())).start()
+    
+    def _batch_thread(self, input_dir, output_dir, settings):
         try:
-            # Try with or without password based on what user provided
-            password = self.current_password.get() if self.current_password.get() else None
-            reader = PdfReader(self.pdf_path.get(), password=password)
-            writer = PdfWriter()
-            
-            # Copy all pages from input to output
-            total_pages = len(reader.pages)
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Scanning folder..."))
+            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(0))
             
-            # Process each page
-            for i in range(total_pages):
-                if self.process_canceled:
-                    self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Processing canceled"))
-                    return
-                
-                # Update progress
-                progress_pct = ((i + 1) / total_pages) * 80 + 20
-                current_page = i + 1
+            def on_progress(done, total, relative_path):
+                progress_pct = (done / total) * 100
                 self.frame.winfo_toplevel().after(0, lambda p=progress_pct: self.progress_var.set(p))
-                self.frame.winfo_toplevel().after(0, lambda p=current_page, t=total_pages: 
-                    self.status_var.set(f"Processing page {p}/{t}..."))
-                
-                # Get the page and add it to the writer without any encryption
-                page = reader.pages[i]
-                
-                # Add watermark if enabled
-                if self.add_watermark.get():
-                    page = self._add_watermark_to_page(page, i)
-                
-                writer.add_page(page)
+                self.frame.winfo_toplevel().after(0, lambda d=done, f=relative_path:
+                    self.status_var.set(f"Processed {d}/{total}: {f}"))
             
-            # Save the output file without any encryption
-            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Saving unprotected PDF..."))
-            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(90))
+            rows, report_path = security_utils.batch_process(
+                input_dir, output_dir, settings,
+                progress_callback=on_progress,
+                cancel_event=self.batch_cancel_event
+            )
             
-            with open(output_path, "wb") as output_file:
-                writer.write(output_file)
+            counts = {}
+            for row in rows:
+                counts[row["status"]] = counts.get(row["status"], 0) + 1
+            summary = (f"{counts.get('processed', 0)} processed, {counts.get('skipped', 0)} up to date, "
+                       f"{counts.get('failed', 0)} failed")
+            if counts.get("canceled"):
+                summary += f", {counts['canceled']} canceled"
             
             # Complete
             self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
-            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Password protection removed: {os.path.basename(output_path)}"))
-            success_message = "Password protection removed.\n"
-            if self.add_watermark.get():
-                success_message += "Watermark added.\n"
-            success_message += f"Saved to: {output_path}"
-            self.frame.winfo_toplevel().after(0, lambda: messagebox.showinfo("Success", success_message))
-                
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Batch complete: {summary}"))
+            show = messagebox.showwarning if counts.get("failed") else messagebox.showinfo
+            self.frame.winfo_toplevel().after(0, lambda: show("Batch Complete",
+                f"{summary}.\nReport: {report_path}"))
+            
         except Exception as e:
+            # e is unbound once the except block ends, so keep the message for the callbacks
             error_msg = str(e)
-            # Check if it's a password-related error
-            if "password" in error_msg.lower() or "decrypt" in error_msg.lower():
-                self.frame.winfo_toplevel().after(0, lambda: messagebox.showerror("Error", 
-                    "Failed to remove password protection: Incorrect password or no password provided."))
-            else:
-                self.frame.winfo_toplevel().after(0, lambda: messagebox.showerror("Error", 
-                    f"Failed to process PDF: {error_msg}"))
-            raise  # Re-raise the exception to be caught by the outer try-except block
+            self.frame.winfo_toplevel().after(0, lambda: messagebox.showerror("Error", f"Failed to process folder: {error_msg}"))
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Error: {error_msg}"))
+        finally:
+            # Re-enable controls
+            self.frame.winfo_toplevel().after(0, lambda: utils.set_controls_state(self.frame, tk.NORMAL))
     
-    def _process_pdf(self, output_path):
-        """Process the PDF (add password and/or watermark)"""
-        # Load the PDF
+    def _processing_thread(self, output_path):
+        settings = self._security_settings()
         try:
-            reader = PdfReader(self.pdf_path.get())
-            writer = PdfWriter()
-            
-            # Copy all pages from input to output
-            total_pages = len(reader.pages)
-            
-            # Process each page
-            for i in range(total_pages):
-                if self.process_canceled:
-                    self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Processing canceled"))
-                    return
-                
-                # Update progress - we allocate 80% of progress to page processing
-                progress_pct = ((i + 1) / total_pages) * 80
-                current_page = i + 1
-                self.frame.winfo_toplevel().after(0, lambda p=progress_pct: self.progress_var.set(p))
-                self.frame.winfo_toplevel().after(0, lambda p=current_page, t=total_pages: 
-                    self.status_var.set(f"Processing page {p}/{t}..."))
-                
-                # Get the page
-                page = reader.pages[i]
-                
-                # Add watermark if enabled
-                if self.add_watermark.get():
-                    page = self._add_watermark_to_page(page, i)
-                
-                # Add page to writer
-                writer.add_page(page)
-            
-            # Apply security if requested
-            if self.operation_mode.get() == "add_password":
-                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Applying security settings..."))
-                self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(80))
-                
-                try:
-                    # Get permission flags
-                    permissions = 0
-                    if self.allow_printing.get():
-                        permissions |= 4  # Print document
-                    if self.allow_copying.get():
-                        permissions |= 16  # Copy content
-                    if self.allow_modification.get():
-                        permissions |= 8  # Modify contents
-                    
-                    # Try newer PyPDF2 API first
-                    try:
-                        writer.encrypt(
-                            user_password=self.user_password.get() if self.user_password.get() else "",
-                            owner_password=self.owner_password.get() if self.owner_password.get() else "",
-                            use_128bit=True,
-                            permissions_flag=permissions
-                        )
-                    except TypeError:
-                        # Fall back to older PyPDF2 API
-                        writer.encrypt(
-                            user_pwd=self.user_password.get() if self.user_password.get() else "",
-                            owner_pwd=self.owner_password.get() if self.owner_password.get() else "",
-                            use_128bit=True
-                        )
-                except Exception as e:
-                    self.frame.winfo_toplevel().after(0, lambda err=str(e): 
-                        messagebox.showwarning("Warning", f"Failed to apply password protection: {err}"))
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Processing PDF..."))
+            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(0))
             
-            # Save the output file
-            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Saving output file..."))
-            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(90))
+            def on_progress(fraction, message):
+                self.frame.winfo_toplevel().after(0, lambda p=fraction * 100: self.progress_var.set(p))
+                self.frame.winfo_toplevel().after(0, lambda m=message: self.status_var.set(m))
             
-            with open(output_path, "wb") as output_file:
-                writer.write(output_file)
+            pages = security_utils.process_pdf(
+                self.pdf_path.get(),
+                output_path,
+                settings,
+                self._stamper,
+                progress_callback=on_progress,
+                cancel_check=lambda: self.process_canceled
+            )
+            if pages is None:
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Processing canceled"))
+                return
             
             # Complete
             self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
-            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Processing complete: {os.path.basename(output_path)}"))
-            
-            success_message = "PDF processed successfully.\n"
-            if self.operation_mode.get() == "add_password":
-                success_message += "Security settings applied.\n"
-            if self.add_watermark.get():
-                success_message += "Watermark added.\n"
+            if settings["mode"] == "remove_password":
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Password protection removed: {os.path.basename(output_path)}"))
+                success_message = "Password protection removed.\n"
+                if self._stamper is not None:
+                    success_message += "Watermark added.\n"
+            elif self._stamper is not None and settings["incremental"]:
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Processing complete: {os.path.basename(output_path)}"))
+                success_message = f"Watermark added to {pages} pages as an incremental update.\n"
+            else:
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Processing complete: {os.path.basename(output_path)}"))
+                success_message = "PDF processed successfully.\n"
+                if settings["mode"] == "add_password":
+                    success_message += "Security settings applied.\n"
+                if self._stamper is not None:
+                    success_message += "Watermark added.\n"
             success_message += f"Saved to: {output_path}"
-            
             self.frame.winfo_toplevel().after(0, lambda: messagebox.showinfo("Success", success_message))
             
         except Exception as e:
             error_msg = str(e)
-            raise Exception(f"Failed to process PDF: {error_msg}")
-    
-    def _add_watermark_to_page(self, page, page_index):
-        """Add watermark to a PDF page"""
-        # Get page dimensions
-        page_width = PDFSecurityTab.to_float(page.mediabox.width)
-        page_height = PDFSecurityTab.to_float(page.mediabox.height)
-        
-        # Create watermark based on type
-        if self.watermark_type.get() == "text":
-            # Create a text watermark
-            watermark = self._create_text_watermark(page_width, page_height)
-        else:
-            # Create an image watermark
-            watermark = self._create_image_watermark(page_width, page_height)
-        
-        # Add watermark to page (using PyPDF2's merge_page)
-        page.merge_page(watermark)
-        return page
-    
-    def _create_text_watermark(self, width, height):
-        """Create a text watermark PDF page"""
-        # Convert to float to avoid decimal.Decimal issues
-        width = PDFSecurityTab.to_float(width)
-        height = PDFSecurityTab.to_float(height)
-        
-        # Create a blank PDF page
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter
-        from io import BytesIO
-        
-        packet = BytesIO()
-        c = canvas.Canvas(packet, pagesize=(width, height))
-        
-        # Set watermark properties
-        text = self.watermark_text.get()
-        opacity = self.watermark_opacity.get() / 100
-        rotation = self.watermark_rotation.get()
-        
-        # Calculate position based on selection
-        position = self.watermark_position.get()
-        if position == "center":
-            x, y = width / 2, height / 2
-        elif position == "top-left":
-            x, y = width * 0.1, height * 0.9
-        elif position == "top-right":
-            x, y = width * 0.9, height * 0.9
-        elif position == "bottom-left":
-            x, y = width * 0.1, height * 0.1
-        elif position == "bottom-right":
-            x, y = width * 0.9, height * 0.1
-        
-        # Set text properties
-        c.setFont("Helvetica", 72)
-        c.setFillColorRGB(0, 0, 0, opacity)
-        
-        # Draw rotated text
-        c.saveState()
-        c.translate(x, y)
-        c.rotate(rotation)
-        c.drawCentredString(0, 0, text)
-        c.restoreState()
-        
-        c.save()
-        
-        # Create PDF page from the canvas
-        packet.seek(0)
-        watermark_pdf = PdfReader(packet)
-        return watermark_pdf.pages[0]
-    
-    def _create_image_watermark(self, width, height):
-        """Create an image watermark PDF page"""
-        # Convert to float to avoid decimal.Decimal issues
-        width = PDFSecurityTab.to_float(width)
-        height = PDFSecurityTab.to_float(height)
-    
-        # Load and resize watermark image
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import inch
-        from io import BytesIO
-        
-        packet = BytesIO()
-        c = canvas.Canvas(packet, pagesize=(width, height))
-        
-        # Set watermark properties
-        image_path = self.watermark_image_path.get()
-        opacity = self.watermark_opacity.get() / 100
-        rotation = self.watermark_rotation.get()
-        
-        # Load image
-        img = Image.open(image_path)
-        
-        # Calculate image dimensions (resize to fit but maintain aspect ratio)
-        img_width, img_height = img.size
-        max_dimension = min(width, height) * 0.5  # Use 50% of page size
-        
-        ratio = min(max_dimension / img_width, max_dimension / img_height)
-        new_width = img_width * ratio
-        new_height = img_height * ratio
-        
-        # Calculate position based on selection
-        position = self.watermark_position.get()
-        if position == "center":
-            x, y = width / 2 - new_width / 2, height / 2 - new_height / 2
-        elif position == "top-left":
-            x, y = width * 0.05, height * 0.95 - new_height
-        elif position == "top-right":
-            x, y = width * 0.95 - new_width, height * 0.95 - new_height
-        elif position == "bottom-left":
-            x, y = width * 0.05, height * 0.05
-        elif position == "bottom-right":
-            x, y = width * 0.95 - new_width, height * 0.05
-        
-        # Create temporary image for watermark
-        temp_img_path = os.path.join(os.path.dirname(image_path), "temp_watermark.png")
-        img.save(temp_img_path, format="PNG")
-        
-        # Draw rotated image
-        c.saveState()
-        c.translate(x + new_width/2, y + new_height/2)
-        c.rotate(rotation)
-        c.setFillAlpha(opacity)
-        c.drawImage(temp_img_path, -new_width/2, -new_height/2, width=new_width, height=new_height)
-        c.restoreState()
-        
-        c.save()
-        
-        # Delete temporary image
-        try:
-            os.remove(temp_img_path)
-        except:
-            pass
-        
-        # Create PDF page from the canvas
-        packet.seek(0)
-        watermark_pdf = PdfReader(packet)
-        return watermark_pdf.pages[0]
+            # Check if it's a password-related error
+            if settings["mode"] == "remove_password" and ("password" in error_msg.lower() or "decrypt" in error_msg.lower()):
+                self.frame.winfo_toplevel().after(0, lambda: messagebox.showerror("Error", 
+                    "Failed to remove password protection: Incorrect password or no password provided."))
+            else:
+                self.frame.winfo_toplevel().after(0, lambda: messagebox.showerror("Error", f"Failed to process PDF: {error_msg}"))
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Error: {error_msg}"))
+            # Delete partial output; an in-place update has already been rolled back
+            in_place = os.path.abspath(output_path) == os.path.abspath(self.pdf_path.get())
+            if not in_place and os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except:
+                    pass
+        finally:
+            # Re-enable controls
+            self.frame.winfo_toplevel().after(0, lambda: utils.set_controls_state(self.frame, tk.NORMAL))
     
     def cancel_process(self):
         self.process_canceled = True
+        if self.batch_cancel_event is not None:
+            self.batch_cancel_event.set()
         self.status_var.set("Canceling process...")
     
     def open_output_folder(self):
@@ -4,6 +4,8 @@ from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import pypdfium2 as pdfium
+import linearize_utils
+import pdf_utils
 import utils
 from styles import COLORS, FONTS, create_drop_zone
 
@@ -18,14 +20,21 @@ class PDFSplitTab:
         self.output_dir = tk.StringVar()
         self.start_page = tk.IntVar(value=1)
         self.end_page = tk.IntVar(value=1)
-        self.split_mode = tk.StringVar(value="range")  # "range", "single", "extract"
+        self.split_mode = tk.StringVar(value="range")  # "range", "single", "extract", "size", "multi"
         self.total_pages = 0
         self.single_pages = tk.StringVar(value="")  # comma-separated page numbers
         self.page_interval = tk.IntVar(value=1)  # For splitting by intervals
+        self.max_size_mb = tk.DoubleVar(value=20.0)  # Size budget per output file
+        self.multi_kind = tk.StringVar(value="ranges")  # "ranges" or "parts"
+        self.multi_ranges = tk.StringVar(value="")  # comma-separated ranges, one output each
+        self.equal_parts = tk.IntVar(value=2)
+        self.linearize = tk.BooleanVar(value=False)  # Rewrite outputs for fast web view
         self.progress_var = tk.DoubleVar(value=0.0)
         self.status_var = tk.StringVar(value="Ready")
         self.conversion_canceled = False
+        self.split_cancel_event = None  # Set to stop the worker processes of a single-page split
         self._pages_to_extract = []
+        self._ranges_to_split = []  # (first, last) 0-based page ranges for the multi-range mode
         
         # Create UI elements
         self.create_file_frame()
@@ -86,6 +95,12 @@ class PDFSplitTab:
         self.mode_extract = ttk.Radiobutton(mode_frame, text="Extract Every N Pages", variable=self.split_mode, value="extract", command=self.toggle_split_mode)
         self.mode_extract.pack(side="left", padx=5)
         
+        self.mode_size = ttk.Radiobutton(mode_frame, text="Max File Size", variable=self.split_mode, value="size", command=self.toggle_split_mode)
+        self.mode_size.pack(side="left", padx=5)
+        
+        self.mode_multi = ttk.Radiobutton(mode_frame, text="Multiple Ranges", variable=self.split_mode, value="multi", command=self.toggle_split_mode)
+        self.mode_multi.pack(side="left", padx=5)
+        
         # Page range options
         self.range_frame = ttk.Frame(options_frame)
         self.range_frame.grid(row=1, column=0, columnspan=4, sticky="w", padx=5, pady=5)
@@ -112,26 +127,49 @@ class PDFSplitTab:
         ttk.Spinbox(self.extract_frame, from_=1, to=100, textvariable=self.page_interval, width=5).pack(side="left", padx=5)
         ttk.Label(self.extract_frame, text="page(s)").pack(side="left", padx=5)
         
-        # Hide single and extract frames initially
-        self.single_frame.grid_remove()
-        self.extract_frame.grid_remove()
+        # Size budget options
+        self.size_frame = ttk.Frame(options_frame)
+        self.size_frame.grid(row=4, column=0, columnspan=4, sticky="w", padx=5, pady=5)
+        
+        ttk.Label(self.size_frame, text="Max size per file:").pack(side="left", padx=5)
+        ttk.Spinbox(self.size_frame, from_=0.1, to=10000, increment=1, textvariable=self.max_size_mb, width=8).pack(side="left", padx=5)
+        ttk.Label(self.size_frame, text="MB").pack(side="left", padx=5)
+        
+        # Multiple ranges options
+        self.multi_frame = ttk.Frame(options_frame)
+        self.multi_frame.grid(row=5, column=0, columnspan=4, sticky="w", padx=5, pady=5)
+        
+        ttk.Radiobutton(self.multi_frame, text="Ranges:", variable=self.multi_kind, value="ranges").pack(side="left", padx=5)
+        ttk.Entry(self.multi_frame, textvariable=self.multi_ranges, width=30).pack(side="left", padx=5)
+        ttk.Label(self.multi_frame, text="(one file each, e.g. 1-10,11-25,40)").pack(side="left", padx=5)
+        ttk.Radiobutton(self.multi_frame, text="Equal parts:", variable=self.multi_kind, value="parts").pack(side="left", padx=5)
+        ttk.Spinbox(self.multi_frame, from_=2, to=9999, textvariable=self.equal_parts, width=6).pack(side="left", padx=5)
+        
+        linearize_check = ttk.Checkbutton(options_frame, text=linearize_utils.linearize_label(),
+                                          variable=self.linearize)
+        linearize_check.grid(row=6, column=0, columnspan=4, sticky="w", padx=5, pady=5)
+        if not linearize_utils.is_linearization_available():
+            utils.keep_disabled(linearize_check)
+        
+        # Only the page range options are shown initially
+        self.toggle_split_mode()
     
     def toggle_split_mode(self):
         """Show/hide option frames based on selected split mode"""
         mode = self.split_mode.get()
+        frames = {
+            "range": self.range_frame,
+            "single": self.single_frame,
+            "extract": self.extract_frame,
+            "size": self.size_frame,
+            "multi": self.multi_frame,
+        }
         
-        if mode == "range":
-            self.range_frame.grid()
-            self.single_frame.grid_remove()
-            self.extract_frame.grid_remove()
-        elif mode == "single":
-            self.range_frame.grid_remove()
-            self.single_frame.grid()
-            self.extract_frame.grid_remove()
-        elif mode == "extract":
-            self.range_frame.grid_remove()
-            self.single_frame.grid_remove()
-            self.extract_frame.grid()
+        for name, frame in frames.items():
+            if name == mode:
+                frame.grid()
+            else:
+                frame.grid_remove()
     
     def browse_pdf(self):
         selected_file = filedialog.askopenfilename(
@@ -215,6 +253,20 @@ class PDFSplitTab:
             if self.page_interval.get() < 1:
                 messagebox.showerror("Error", "Page interval must be at least 1.")
                 return
+                
+        elif mode == "size":
+            try:
+                max_size = self.max_size_mb.get()
+            except tk.TclError:
+                max_size = 0
+            if max_size <= 0:
+                messagebox.showerror("Error", "Maximum file size must be greater than 0 MB.")
+                return
+                
+        elif mode == "multi":
+            self._ranges_to_split = self._parse_ranges()
+            if not self._ranges_to_split:
+                return
         
         # Disable controls during splitting
         utils.set_controls_state(self.frame, tk.DISABLED)
@@ -254,6 +306,39 @@ class PDFSplitTab:
             messagebox.showerror("Error", "Invalid page format. Use comma-separated numbers and ranges (e.g., 1,3,5-7).")
             return False
     
+    def _parse_ranges(self):
+        """Return the validated (first, last) 0-based ranges for the multi-range mode, or None"""
+        if self.multi_kind.get() == "parts":
+            try:
+                parts = self.equal_parts.get()
+            except tk.TclError:
+                parts = 0
+            if parts < 2 or parts > self.total_pages:
+                messagebox.showerror("Error", f"Number of parts must be between 2 and {self.total_pages}.")
+                return None
+            return pdf_utils.equal_page_ranges(self.total_pages, parts)
+        
+        specs = [spec.strip() for spec in self.multi_ranges.get().split(',') if spec.strip()]
+        if not specs:
+            messagebox.showerror("Error", "Please enter at least one page range (e.g., 1-10,11-25,40).")
+            return None
+        
+        ranges = []
+        for spec in specs:
+            try:
+                if '-' in spec:
+                    start, end = map(int, spec.split('-'))
+                else:
+                    start = end = int(spec)
+            except ValueError:
+                messagebox.showerror("Error", f"Invalid page range: {spec}. Use comma-separated numbers and ranges (e.g., 1-10,11-25,40).")
+                return None
+            if start < 1 or end > self.total_pages or start > end:
+                messagebox.showerror("Error", f"Invalid page range: {spec}. Must be between 1 and {self.total_pages}.")
+                return None
+            ranges.append((start - 1, end - 1))
+        return ranges
+    
     def _split_thread(self):
         try:
             mode = self.split_mode.get()
@@ -264,6 +349,10 @@ class PDFSplitTab:
                 self._split_single_pages()
             elif mode == "extract":
                 self._split_by_interval()
+            elif mode == "size":
+                self._split_by_size()
+            elif mode == "multi":
+                self._split_multiple_ranges()
                 
         except Exception as e:
             error_msg = str(e)
@@ -312,6 +401,7 @@ class PDFSplitTab:
             
             # Save the new PDF
             output_pdf.save(output_path)
+            self._linearize_outputs([output_path])
             
             # Complete
             self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
@@ -334,9 +424,6 @@ class PDFSplitTab:
             # Get source PDF filename without extension
             pdf_basename = os.path.splitext(os.path.basename(self.pdf_path.get()))[0]
 
-            # Open source PDF
-            source_pdf = pdfium.PdfDocument(self.pdf_path.get())
-
             # Determine which pages to extract
             if self._pages_to_extract:
                 pages = self._pages_to_extract
@@ -344,26 +431,37 @@ class PDFSplitTab:
                 # No specific pages given — split all pages
                 pages = list(range(1, self.total_pages + 1))
 
-            output_files = []
-            for i, page_num in enumerate(pages):
-                if self.conversion_canceled:
-                    self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Split canceled"))
-                    return
+            # Pages are sharded across worker processes; each worker parses the source once
+            pdf_path = self.pdf_path.get()
+            output_dir = self.output_dir.get()
+            jobs = [(pdf_path, page_num - 1, False, 0, os.path.join(output_dir, f"{pdf_basename}_page_{page_num}.pdf"))
+                    for page_num in pages]
 
-                # Update progress
-                progress_pct = ((i + 1) / len(pages)) * 100
+            def on_progress(done, total, rate):
+                progress_pct = (done / total) * 100
                 self.frame.winfo_toplevel().after(0, lambda p=progress_pct: self.progress_var.set(p))
-                self.frame.winfo_toplevel().after(0, lambda p=page_num:
-                    self.status_var.set(f"Splitting page {p}..."))
+                self.frame.winfo_toplevel().after(0, lambda d=done, r=rate:
+                    self.status_var.set(f"Split {d} of {total} pages ({r:.0f} pages/s)..."))
+
+            self.split_cancel_event = pdf_utils.PROCESS_CONTEXT.Event()
+            exported, failures = pdf_utils.export_page_files(
+                jobs,
+                "pdf",
+                progress_callback=on_progress,
+                cancel_event=self.split_cancel_event
+            )
 
-                # Create a new single-page PDF for each page
-                output_pdf = pdfium.PdfDocument.new()
-                output_pdf.import_pages(source_pdf, [page_num - 1])
+            if self.conversion_canceled:
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Split canceled ({exported} files created)"))
+                return
 
-                output_filename = f"{pdf_basename}_page_{page_num}.pdf"
-                output_path = os.path.join(self.output_dir.get(), output_filename)
-                output_pdf.save(output_path)
-                output_files.append(output_filename)
+            if failures:
+                details = "\n".join(f"{os.path.basename(path)}: {error}" for path, error in failures[:10])
+                if len(failures) > 10:
+                    details += f"\n... and {len(failures) - 10} more"
+                raise Exception(f"{len(failures)} of {len(jobs)} pages could not be split:\n{details}")
+            output_files = [job[4] for job in jobs]
+            self._linearize_outputs(output_files)
 
             # Complete
             self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
@@ -415,6 +513,7 @@ class PDFSplitTab:
             
             # Save the new PDF
             output_pdf.save(output_path)
+            self._linearize_outputs([output_path])
             
             # Complete
             self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
@@ -426,8 +525,136 @@ class PDFSplitTab:
             error_msg = str(e)
             raise Exception(f"Failed to extract pages: {error_msg}")
     
+    def _split_by_size(self):
+        """Split PDF into consecutive parts that each stay under the size budget"""
+        try:
+            max_size_mb = self.max_size_mb.get()
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Estimating page sizes..."))
+            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(0))
+            
+            # Get source PDF filename without extension
+            pdf_basename = os.path.splitext(os.path.basename(self.pdf_path.get()))[0]
+            
+            def on_progress(done, total):
+                progress_pct = (done / total) * 100
+                self.frame.winfo_toplevel().after(0, lambda p=progress_pct: self.progress_var.set(p))
+                self.frame.winfo_toplevel().after(0, lambda d=done:
+                    self.status_var.set(f"Split {d} of {total} pages..."))
+            
+            # Linearize each part before it is measured, since linearizing changes its size
+            linearize_failures = []
+            
+            def linearize_part(output_path):
+                try:
+                    linearize_utils.linearize_pdf(output_path)
+                except Exception as e:
+                    linearize_failures.append((output_path, str(e)))
+            
+            parts = pdf_utils.split_by_size(
+                self.pdf_path.get(),
+                self.output_dir.get(),
+                pdf_basename,
+                int(max_size_mb * 1024 * 1024),
+                progress_callback=on_progress,
+                cancel_check=lambda: self.conversion_canceled,
+                finalize=linearize_part if self.linearize.get() else None
+            )
+            
+            if parts is None:
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Split canceled"))
+                return
+            
+            # Only failures for parts that were kept (re-split chunks are deleted)
+            kept = {part[0] for part in parts}
+            linearize_failures = [failure for failure in linearize_failures if failure[0] in kept]
+            if linearize_failures:
+                path, error = linearize_failures[0]
+                self.frame.winfo_toplevel().after(0, lambda: messagebox.showwarning("Warning",
+                    f"{len(linearize_failures)} file(s) were saved without linearization, "
+                    f"e.g. {os.path.basename(path)}: {error}"))
+            
+            # Single pages that are larger than the budget on their own
+            oversized = [part for part in parts if part[3] > max_size_mb * 1024 * 1024]
+            message = f"PDF split into {len(parts)} files of at most {max_size_mb:g} MB.\nSaved to: {self.output_dir.get()}"
+            if oversized:
+                pages = ", ".join(str(part[1] + 1) for part in oversized[:10])
+                message += f"\n\n{len(oversized)} page(s) exceed the limit on their own and were saved as single-page files: {pages}"
+            
+            # Complete
+            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Split complete: {len(parts)} files created"))
+            self.frame.winfo_toplevel().after(0, lambda: messagebox.showinfo("Success", message))
+            
+        except Exception as e:
+            error_msg = str(e)
+            raise Exception(f"Failed to split PDF by size: {error_msg}")
+    
+    def _split_multiple_ranges(self):
+        """Split PDF into several page ranges, parsing the source only once"""
+        try:
+            ranges = self._ranges_to_split
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Splitting into {len(ranges)} files..."))
+            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(0))
+            
+            # Get source PDF filename without extension
+            pdf_basename = os.path.splitext(os.path.basename(self.pdf_path.get()))[0]
+            
+            def on_progress(done, total):
+                progress_pct = (done / total) * 100
+                self.frame.winfo_toplevel().after(0, lambda p=progress_pct: self.progress_var.set(p))
+                self.frame.winfo_toplevel().after(0, lambda d=done:
+                    self.status_var.set(f"Written {d} of {total} files..."))
+            
+            output_paths = pdf_utils.split_ranges(
+                self.pdf_path.get(),
+                ranges,
+                self.output_dir.get(),
+                pdf_basename,
+                progress_callback=on_progress,
+                cancel_check=lambda: self.conversion_canceled
+            )
+            
+            if output_paths is None:
+                self.frame.winfo_toplevel().after(0, lambda: self.status_var.set("Split canceled"))
+                return
+            self._linearize_outputs(output_paths)
+            
+            # Complete
+            self.frame.winfo_toplevel().after(0, lambda: self.progress_var.set(100))
+            self.frame.winfo_toplevel().after(0, lambda: self.status_var.set(f"Split complete: {len(output_paths)} files created"))
+            self.frame.winfo_toplevel().after(0, lambda: messagebox.showinfo("Success",
+                f"PDF split into {len(output_paths)} files.\nSaved to: {self.output_dir.get()}"))
+            
+        except Exception as e:
+            error_msg = str(e)
+            raise Exception(f"Failed to split PDF into ranges: {error_msg}")
+    
+    def _linearize_outputs(self, output_paths):
+        """Rewrite the split outputs for fast web view if that option is checked.
+        Files that cannot be linearized are kept as they are, with a warning."""
+        if not self.linearize.get():
+            return
+        
+        def on_progress(done, total):
+            self.frame.winfo_toplevel().after(0, lambda d=done:
+                self.status_var.set(f"Linearizing {d} of {total} files..."))
+        
+        failures = linearize_utils.linearize_files(
+            output_paths,
+            progress_callback=on_progress,
+            cancel_check=lambda: self.conversion_canceled
+        )
+        if failures:
+            # The split files themselves are fine, so only warn
+            path, error = failures[0]
+            self.frame.winfo_toplevel().after(0, lambda: messagebox.showwarning("Warning",
+                f"{len(failures)} file(s) were saved without linearization, "
+                f"e.g. {os.path.basename(path)}: {error}"))
+    
     def cancel_split(self):
         self.conversion_canceled = True
+        if self.split_cancel_event is not None:
+            self.split_cancel_event.set()
         self.status_var.set("Canceling split operation...")
     
     def open_output_folder(self):
@@ -0,0 +1,1213 @@
+# pdf_utils.py - PDF processing helpers shared by the PDF tabs
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pypdfium2 as pdfium
+from PIL import Image
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject, NumberObject,
+                            StreamObject)
+
+from render_utils import PDFIUM_LOCK
+
+# Worker processes are always spawned, as on Windows: a forked child of the
+# threaded Tk process could inherit pdfium state a render thread is in the
+# middle of using. Cancel events for these pools must come from this context.
+PROCESS_CONTEXT = multiprocessing.get_context("spawn")
+
+# Size used for inserted blank pages (US Letter, in points)
+BLANK_PAGE_SIZE = (612, 792)
+
+# Files up to this size are read into memory before pdfium parses them, so
+# several files can be read from slow disks or network shares at once
+IN_MEMORY_OPEN_LIMIT = 64 * 1024 * 1024
+
+
+def count_pages(pdf_path):
+    """Return the number of pages in a PDF; safe to call from several threads at once"""
+    if os.path.getsize(pdf_path) <= IN_MEMORY_OPEN_LIMIT:
+        # The slow part (I/O) happens outside the lock, only the parse is serialized
+        with open(pdf_path, "rb") as f:
+            source = f.read()
+    else:
+        source = pdf_path
+
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+
+def group_page_runs(entries):
+    """Group consecutive page entries that come from the same source.
+
+    entries is a sequence of (pdf_path, page_idx, is_blank, rotation).
+    Returns a list of (pdf_path, [page_idx, ...], [rotation, ...]) runs,
+    where pdf_path is None for a run of blank pages. Each run can be
+    copied with a single import_pages call.
+    """
+    runs = []
+    for pdf_path, page_idx, is_blank, rotation in entries:
+        source = None if is_blank else pdf_path
+        if runs and runs[-1][0] == source:
+            runs[-1][1].append(page_idx)
+            runs[-1][2].append(rotation)
+        else:
+            runs.append((source, [page_idx], [rotation]))
+    return runs
+
+
+class PageCountIndex:
+    """Page counts of PDF files keyed by (path, size, mtime), persisted as JSON.
+
+    Files whose size and modification time match the index are answered
+    from it without being opened; only new or changed files are counted,
+    several at a time. The index lives in ~/.p2i/page_counts.json by
+    default, so it carries over between sessions. Safe to use from any
+    thread.
+    """
+
+    def __init__(self, index_file=None, max_workers=8, max_entries=20000):
+        self.index_file = Path(index_file) if index_file else Path.home() / ".p2i" / "page_counts.json"
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self._entries = {}  # absolute path -> [size, mtime_ns, page count]
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, "r") as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self._entries = entries
+        except (OSError, ValueError):
+            # A missing or damaged index just means everything is counted again
+            self._entries = {}
+
+    def save(self):
+        """Write the index to disk, dropping the oldest entries over max_entries"""
+        with self._lock:
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            data = json.dumps(self._entries)
+
+        tmp_file = self.index_file.with_suffix(".tmp")
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, "w") as f:
+                f.write(data)
+            os.replace(tmp_file, self.index_file)
+        except OSError as e:
+            print(f"Error saving page count index: {e}")
+
+    def get(self, pdf_path):
+        """Return the indexed page count if the file is unchanged, otherwise None"""
+        path = os.path.abspath(pdf_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def _count(self, pdf_path):
+        """Return the page count of one file, from the index or by opening it"""
+        path = os.path.abspath(pdf_path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2], False
+
+        pages = count_pages(path)
+        with self._lock:
+            self._entries.pop(path, None)  # Re-insert so the newest entries are kept longest
+            self._entries[path] = [stat.st_size, stat.st_mtime_ns, pages]
+        return pages, True
+
+    def counts(self, pdf_paths, progress_callback=None):
+        """Return {pdf_path: page count or None if unreadable} for the given files.
+
+        progress_callback(done, total) is called as files are resolved.
+        The index is saved if any file had to be opened.
+        """
+        pdf_paths = list(dict.fromkeys(pdf_paths))
+        results = {}
+        changed = False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._count, path): path for path in pdf_paths}
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    pages, counted = future.result()
+                    changed = changed or counted
+                except Exception:
+                    pages = None
+                results[futures[future]] = pages
+                if progress_callback:
+                    progress_callback(done, len(pdf_paths))
+
+        if changed:
+            self.save()
+        return results
+
+
+def write_page_list(entries, output_path, progress_callback=None, cancel_check=None, warning_callback=None):
+    """Write an organized list of pages to a new PDF.
+
+    Each source document is opened once, runs of pages from the same source
+    are copied with one import_pages call, and rotations are applied to the
+    imported pages in the same pass. progress_callback(done, total) is
+    called after every run. A run that cannot be copied is skipped and
+    reported through warning_callback(message). If cancel_check() returns
+    True the output is not written and False is returned.
+    """
+    entries = list(entries)
+    total = len(entries)
+    sources = {}
+    output_pdf = None
+
+    try:
+        with PDFIUM_LOCK:
+            output_pdf = pdfium.PdfDocument.new()
+
+        processed = 0  # Entries handled so far, including skipped ones
+        written = 0  # Pages actually in the output document
+        for pdf_path, page_indices, rotations in group_page_runs(entries):
+            if cancel_check and cancel_check():
+                return False
+
+            try:
+                with PDFIUM_LOCK:
+                    if pdf_path is None:
+                        for _ in page_indices:
+                            output_pdf.new_page(*BLANK_PAGE_SIZE).close()
+                    else:
+                        if pdf_path not in sources:
+                            sources[pdf_path] = pdfium.PdfDocument(pdf_path)
+                        output_pdf.import_pages(sources[pdf_path], page_indices, index=written)
+                    run_start = written
+                    written += len(page_indices)
+
+                    # Apply cumulative rotations on top of each page's own rotation
+                    for offset, rotation in enumerate(rotations):
+                        if rotation % 360:
+                            page = output_pdf[run_start + offset]
+                            page.set_rotation((page.get_rotation() + rotation) % 360)
+                            page.close()
+            except Exception as e:
+                if warning_callback is None:
+                    raise
+                first, last = processed + 1, processed + len(page_indices)
+                pages = f"page {first}" if first == last else f"pages {first}-{last}"
+                warning_callback(f"Failed to process {pages}: {str(e)}")
+
+            processed += len(page_indices)
+            if progress_callback:
+                progress_callback(processed, total)
+
+        with PDFIUM_LOCK:
+            output_pdf.save(output_path)
+        return True
+
+    finally:
+        with PDFIUM_LOCK:
+            for pdf in sources.values():
+                pdf.close()
+            if output_pdf is not None:
+                output_pdf.close()
+
+
+# Image formats for export_pages, by file extension
+EXPORT_IMAGE_FORMATS = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG", "tif": "TIFF", "tiff": "TIFF"}
+
+# Pages per export task; each task opens its source at most once per worker
+EXPORT_CHUNK_SIZE = 16
+
+# State of an export worker process, set up by _init_export_worker
+_export_documents = {}  # pdf_path -> PdfDocument, kept open for the life of the worker
+_export_cancel_event = None
+
+
+def _init_export_worker(cancel_event):
+    global _export_cancel_event
+    _export_cancel_event = cancel_event
+
+
+def _export_document(pdf_path):
+    """Return the worker's open handle for pdf_path, opening it on first use"""
+    pdf = _export_documents.get(pdf_path)
+    if pdf is None:
+        pdf = pdfium.PdfDocument(pdf_path)
+        _export_documents[pdf_path] = pdf
+    return pdf
+
+
+def _export_chunk(pdf_path, jobs, extension, scale, quality):
+    """Export (page_idx, rotation, output_path) jobs from one source (runs in a worker process).
+
+    pdf_path is None for blank pages. Returns (exported, [(output_path, error), ...]).
+    """
+    exported = 0
+    failures = []
+    for page_idx, rotation, output_path in jobs:
+        if _export_cancel_event is not None and _export_cancel_event.is_set():
+            break
+        try:
+            if extension == "pdf":
+                output_pdf = pdfium.PdfDocument.new()
+                try:
+                    if pdf_path is None:
+                        output_pdf.new_page(*BLANK_PAGE_SIZE).close()
+                    else:
+                        output_pdf.import_pages(_export_document(pdf_path), [page_idx])
+                    if rotation % 360:
+                        page = output_pdf[0]
+                        page.set_rotation((page.get_rotation() + rotation) % 360)
+                        page.close()
+                    output_pdf.save(output_path)
+                finally:
+                    output_pdf.close()
+            else:
+                if pdf_path is None:
+                    width, height = BLANK_PAGE_SIZE if rotation % 180 == 0 else BLANK_PAGE_SIZE[::-1]
+                    img = Image.new("RGB", (round(width * scale), round(height * scale)), "white")
+                else:
+                    page = _export_document(pdf_path)[page_idx]
+                    try:
+                        img = page.render(scale=scale, rotation=rotation % 360).to_pil()
+                    finally:
+                        page.close()
+
+                image_format = EXPORT_IMAGE_FORMATS[extension]
+                if image_format == "JPEG":
+                    img.convert("RGB").save(output_path, image_format, quality=quality)
+                else:
+                    img.save(output_path, image_format)
+            exported += 1
+        except Exception as e:
+            failures.append((output_path, str(e)))
+    return exported, failures
+
+
+def export_pages(entries, output_dir, base_name, extension="pdf", dpi=150, quality=90,
+                 max_workers=None, progress_callback=None, cancel_event=None):
+    """Export pages to one file each, in parallel worker processes.
+
+    entries is a sequence of (position, pdf_path, page_idx, is_blank, rotation);
+    each page is written to <base_name>_<position>.<extension> in output_dir,
+    with positions zero-padded so the files sort in page order. See
+    export_page_files for the other arguments and the return value.
+    """
+    entries = list(entries)
+    if not entries:
+        return 0, []
+
+    digits = len(str(max(position for position, *_ in entries)))
+    jobs = [(pdf_path, page_idx, is_blank, rotation,
+             os.path.join(output_dir, f"{base_name}_{position:0{digits}d}.{extension.lower()}"))
+            for position, pdf_path, page_idx, is_blank, rotation in entries]
+    return export_page_files(jobs, extension, dpi=dpi, quality=quality, max_workers=max_workers,
+                             progress_callback=progress_callback, cancel_event=cancel_event)
+
+
+def export_page_files(jobs, extension="pdf", dpi=150, quality=90, max_workers=None,
+                      progress_callback=None, cancel_event=None):
+    """Write pages to individual files, sharded across worker processes.
+
+    jobs is a sequence of (pdf_path, page_idx, is_blank, rotation, output_path).
+    extension is "pdf" for single-page PDFs or a key of EXPORT_IMAGE_FORMATS
+    for images rendered at dpi. Pages are handed out in chunks from one
+    source, and every worker keeps the sources it has opened, so each
+    source is parsed at most once per worker.
+
+    progress_callback(done, total, pages_per_second) is called as chunks
+    finish. Setting cancel_event (a PROCESS_CONTEXT.Event) stops the
+    workers after their current page. Returns (exported, failures) where
+    failures is a list of (output_path, error message).
+    """
+    jobs = list(jobs)
+    extension = extension.lower()
+    if extension != "pdf" and extension not in EXPORT_IMAGE_FORMATS:
+        raise ValueError(f"Unsupported export format: {extension}")
+    if not jobs:
+        return 0, []
+
+    # Group by source (keeping order within a source) and cut into chunks
+    by_source = {}
+    for pdf_path, page_idx, is_blank, rotation, output_path in jobs:
+        by_source.setdefault(None if is_blank else pdf_path, []).append((page_idx, rotation, output_path))
+    chunks = [(pdf_path, source_jobs[i:i + EXPORT_CHUNK_SIZE])
+              for pdf_path, source_jobs in by_source.items()
+              for i in range(0, len(source_jobs), EXPORT_CHUNK_SIZE)]
+
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 2) - 1)
+    max_workers = max(1, min(max_workers, len(chunks)))
+
+    total = len(jobs)
+    exported = 0
+    processed = 0
+    failures = []
+    start = time.perf_counter()
+
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=PROCESS_CONTEXT,
+                                   initializer=_init_export_worker, initargs=(cancel_event,))
+    try:
+        futures = {executor.submit(_export_chunk, pdf_path, chunk_jobs, extension, dpi / 72, quality): len(chunk_jobs)
+                   for pdf_path, chunk_jobs in chunks}
+        for future in as_completed(futures):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            chunk_exported, chunk_failures = future.result()
+            exported += chunk_exported
+            failures.extend(chunk_failures)
+            processed += futures[future]
+            if progress_callback:
+                elapsed = time.perf_counter() - start
+                progress_callback(processed, total, exported / elapsed if elapsed > 0 else 0.0)
+    finally:
+        # Queued chunks are dropped on cancel; running ones stop at their next page
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return exported, failures
+
+
+# Limits for a group of inputs merged into one intermediate file by merge_pdfs
+MERGE_GROUP_SIZE = 64
+MERGE_GROUP_BYTES = 48 * 1024 * 1024
+
+
+def _merge_groups(pdf_paths, group_size, group_bytes):
+    """Split inputs into consecutive groups bounded by file count and total size"""
+    groups = []
+    current, current_bytes = [], 0
+    for pdf_path in pdf_paths:
+        try:
+            size = os.path.getsize(pdf_path)
+        except OSError:
+            size = 0  # Reported when the group is merged
+        if current and (len(current) >= group_size or current_bytes + size > group_bytes):
+            groups.append(current)
+            current, current_bytes = [], 0
+        current.append(pdf_path)
+        current_bytes += size
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _merge_group(pdf_paths, output_path, on_input, cancel_check=None, warning_callback=None):
+    """Merge a bounded group of PDFs with pdfium, closing each source right after import.
+
+    Returns the number of pages written, or None if canceled.
+    """
+    with PDFIUM_LOCK:
+        output_pdf = pdfium.PdfDocument.new()
+    try:
+        for pdf_path in pdf_paths:
+            if cancel_check and cancel_check():
+                return None
+            try:
+                with PDFIUM_LOCK:
+                    source = pdfium.PdfDocument(pdf_path)
+                    try:
+                        output_pdf.import_pages(source)
+                    finally:
+                        source.close()
+            except Exception as e:
+                if warning_callback is None:
+                    raise
+                warning_callback(f"Failed to process {os.path.basename(pdf_path)}: {str(e)}")
+            on_input(pdf_path)
+
+        with PDFIUM_LOCK:
+            num_pages = len(output_pdf)
+            if num_pages:
+                output_pdf.save(output_path)
+        return num_pages
+    finally:
+        with PDFIUM_LOCK:
+            output_pdf.close()
+
+
+def _copy_objects(reader, out, offsets, kids, digests=None, stats=None):
+    """Stream every object reachable from reader's pages to out under new object numbers.
+
+    Objects are numbered from len(offsets) on, and their file offsets are
+    appended to offsets. The new numbers of the pages are appended to kids;
+    their /Parent is pointed at object 2, the shared page tree.
+
+    If digests is a dict, stream objects (fonts, images, ICC profiles,
+    content) are deduplicated: each stream is hashed after its own
+    references have been remapped, and a stream already written, from
+    this input or an earlier one, is referenced instead of written again.
+    stats["duplicates"] and stats["bytes_saved"] count what was skipped.
+    """
+    numbers = {}  # (idnum, generation) in the source -> object number in the output
+    queue = deque()
+    in_progress = set()  # Streams being deduplicated, to break reference cycles
+
+    def number_for(ref):
+        key = (ref.idnum, ref.generation)
+        number = numbers.get(key)
+        if number is None:
+            number = len(offsets)
+            offsets.append(0)
+            numbers[key] = number
+            queue.append(ref)
+        return number
+
+    def remap(obj):
+        if isinstance(obj, IndirectObject):
+            if obj.pdf is None:
+                return obj  # Already remapped through a shared direct object
+            number = numbers.get((obj.idnum, obj.generation))
+            if number is not None:
+                return IndirectObject(number, 0, None)
+            target = obj.get_object()
+            if isinstance(target, DictionaryObject) and target.get("/Type") == "/Pages":
+                return NullObject()  # Never pull in the source's page tree
+            if digests is not None and isinstance(target, StreamObject) and \
+                    (obj.idnum, obj.generation) not in in_progress:
+                return IndirectObject(write_unique_stream(obj, target), 0, None)
+            return IndirectObject(number_for(obj), 0, None)
+        if isinstance(obj, DictionaryObject):
+            for key, value in list(obj.items()):
+                # A stream's /Length is rewritten from its data when it is written
+                if not (key == "/Length" and isinstance(obj, StreamObject)):
+                    obj[key] = remap(value)
+        elif isinstance(obj, ArrayObject):
+            for i, value in enumerate(obj):
+                obj[i] = remap(value)
+        return obj
+
+    def write_unique_stream(ref, stream):
+        """Write a stream now unless an identical one was written before; return its number"""
+        key = (ref.idnum, ref.generation)
+        in_progress.add(key)
+        try:
+            # Children first, so identical streams that point at duplicated
+            # resources (an image and its /SMask, say) also become identical
+            remap(stream)
+            buffer = io.BytesIO()
+            stream.write_to_stream(buffer, None)
+            data = buffer.getvalue()
+        finally:
+            in_progress.discard(key)
+        if key in numbers:
+            # Reached again through a reference cycle; the number handed out then is kept
+            return numbers[key]
+        reader.resolved_objects.pop((ref.generation, ref.idnum), None)
+
+        digest = hashlib.blake2b(data, digest_size=20).digest()
+        number = digests.get(digest)
+        if number is not None:
+            numbers[key] = number
+            if stats is not None:
+                stats["duplicates"] = stats.get("duplicates", 0) + 1
+                stats["bytes_saved"] = stats.get("bytes_saved", 0) + len(data)
+            return number
+
+        number = len(offsets)
+        offsets.append(out.tell())
+        numbers[key] = number
+        digests[digest] = number
+        out.write(b"%d 0 obj\n" % number)
+        out.write(data)
+        out.write(b"\nendobj\n")
+        return number
+
+    # Pages keep their order; inherited attributes were already copied onto them by the reader
+    page_numbers = set()
+    for page in reader.pages:
+        number = number_for(page.indirect_reference)
+        kids.append(number)
+        page_numbers.add(number)
+
+    while queue:
+        ref = queue.popleft()
+        number = numbers[(ref.idnum, ref.generation)]
+        obj = ref.get_object()
+        if obj is None:
+            obj = NullObject()
+        elif isinstance(obj, DictionaryObject) and obj.get("/Type") == "/Page":
+            obj.pop("/Parent", None)
+            if number in page_numbers:
+                obj[NameObject("/Parent")] = IndirectObject(2, 0, None)
+        obj = remap(obj)
+
+        offsets[number] = out.tell()
+        out.write(b"%d 0 obj\n" % number)
+        obj.write_to_stream(out, None)
+        out.write(b"\nendobj\n")
+
+        # Written objects are never needed again; drop them from the reader's cache right away
+        reader.resolved_objects.pop((ref.generation, ref.idnum), None)
+
+
+def concatenate_pdfs(pdf_paths, output_path, progress_callback=None, cancel_check=None,
+                     deduplicate=False, stats=None):
+    """Concatenate PDFs by streaming their objects straight into the output file.
+
+    Only one input is open at a time and nothing but the object offsets
+    and the page list is kept once an input is written, so memory use
+    does not grow with the number of inputs. Intended for well-formed,
+    unencrypted files such as the intermediates written by merge_pdfs.
+    With deduplicate, identical streams across all inputs are written
+    once (see _copy_objects); the savings are added to the stats dict.
+    progress_callback(done, total) is called after every input. Returns
+    False if cancel_check() returned True.
+    """
+    pdf_paths = list(pdf_paths)
+    offsets = array("q", [0, 0, 0])  # Object 0 is the free list head; 1 is the catalog, 2 the page tree
+    kids = array("q")
+    digests = {} if deduplicate else None  # Stream hash -> output object number
+
+    with open(output_path, "wb") as out:
+        out.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+        for i, pdf_path in enumerate(pdf_paths):
+            if cancel_check and cancel_check():
+                return False
+            with open(pdf_path, "rb") as f:
+                _copy_objects(PdfReader(f), out, offsets, kids, digests, stats)
+            if progress_callback:
+                progress_callback(i + 1, len(pdf_paths))
+
+        # Page tree and catalog
+        offsets[2] = out.tell()
+        out.write(b"2 0 obj\n<< /Type /Pages /Count %d /Kids [" % len(kids))
+        for start in range(0, len(kids), 1000):
+            out.write(b"".join(b"%d 0 R " % number for number in kids[start:start + 1000]))
+        out.write(b"] >>\nendobj\n")
+
+        offsets[1] = out.tell()
+        out.write(b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
+
+        # Classic cross-reference table; every entry is exactly 20 bytes
+        xref_offset = out.tell()
+        out.write(b"xref\n0 %d\n0000000000 65535 f \n" % len(offsets))
+        for start in range(1, len(offsets), 1000):
+            out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets[start:start + 1000]))
+        out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets), xref_offset))
+
+    return True
+
+
+def merge_pdfs(pdf_paths, output_path, group_size=MERGE_GROUP_SIZE, group_bytes=MERGE_GROUP_BYTES,
+               progress_callback=None, cancel_check=None, warning_callback=None, deduplicate=False, stats=None):
+    """Merge PDFs with memory and file handle use that stay flat as inputs grow.
+
+    Inputs are merged by pdfium in groups of at most group_size files and
+    group_bytes of input (a larger file gets a group of its own), with
+    every source closed as soon as its pages are imported, and each group
+    is saved to an intermediate file. The intermediates are then joined by
+    concatenate_pdfs, which streams objects to the output one file at a
+    time. A single group is written straight to output_path unless
+    deduplicate is set, in which case it also goes through the streaming
+    pass so identical fonts, images and ICC profiles are written once;
+    stats (a dict) then receives "duplicates" and "bytes_saved".
+
+    progress_callback(done, total, label) is called after every input and
+    intermediate. An input that cannot be read is skipped and reported
+    through warning_callback(message), or raises if there is none.
+    Returns False if cancel_check() returned True.
+    """
+    pdf_paths = list(pdf_paths)
+    groups = _merge_groups(pdf_paths, group_size, group_bytes)
+    total = len(pdf_paths) + (len(groups) if len(groups) > 1 or deduplicate else 0)
+    done = 0
+
+    def on_input(pdf_path):
+        nonlocal done
+        done += 1
+        if progress_callback:
+            progress_callback(done, total, os.path.basename(pdf_path))
+
+    if len(groups) <= 1 and not deduplicate:
+        num_pages = _merge_group(pdf_paths, output_path, on_input, cancel_check, warning_callback)
+        if num_pages is None:
+            return False
+        if not num_pages:
+            raise ValueError("None of the PDFs could be merged")
+        return True
+
+    # Intermediates live next to the output so they are on the same volume
+    tmp_dir = tempfile.mkdtemp(prefix=".p2i-merge-", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        parts = []
+        for i, group in enumerate(groups):
+            part_path = os.path.join(tmp_dir, f"part_{i:05d}.pdf")
+            num_pages = _merge_group(group, part_path, on_input, cancel_check, warning_callback)
+            if num_pages is None:
+                return False
+            if num_pages:
+                parts.append(part_path)
+
+        if not parts:
+            raise ValueError("None of the PDFs could be merged")
+
+        def on_part(part_done, part_total):
+            if progress_callback:
+                progress_callback(len(pdf_paths) + part_done, total, f"Combining part {part_done}/{part_total}")
+
+        return concatenate_pdfs(parts, output_path, progress_callback=on_part, cancel_check=cancel_check,
+                                deduplicate=deduplicate, stats=stats)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# Keys that point away from a page (to its parent, other pages or outline
+# items) and are not followed when measuring what the page pulls in
+_PAGE_SIZE_SKIP_KEYS = {"/Parent", "/P", "/Dest", "/B", "/Prev", "/Next", "/First", "/Last"}
+
+# Attributes a page can inherit from its ancestors in the page tree
+_INHERITABLE_PAGE_KEYS = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+# Rough size of the header, page tree, catalog, xref and trailer of an output file
+SPLIT_FILE_OVERHEAD = 2048
+
+
+def _object_sizes(reader, file_size):
+    """Approximate the stored size of every object from the gaps between xref offsets"""
+    offsets = sorted((offset, idnum) for table in reader.xref.values()
+                     for idnum, offset in table.items() if idnum)
+    sizes = {}
+    for i, (offset, idnum) in enumerate(offsets):
+        end = offsets[i + 1][0] if i + 1 < len(offsets) else file_size
+        sizes[idnum] = max(0, end - offset)
+
+    # Objects packed in an object stream share its size between them
+    packed = {}
+    for idnum, (stream_num, _) in reader.xref_objStm.items():
+        packed.setdefault(stream_num, []).append(idnum)
+    for stream_num, members in packed.items():
+        share = sizes.get(stream_num, 0) / len(members)
+        for idnum in members:
+            sizes[idnum] = share
+    return sizes
+
+
+def estimate_page_objects(pdf_path):
+    """Return (page_objects, sizes) describing what each page costs on disk.
+
+    page_objects[i] is the set of object numbers page i pulls in (its own
+    dictionary, content streams, resources, annotations and inherited
+    resources), and sizes maps object numbers to their approximate stored
+    size in bytes. Objects shared by several pages, such as fonts, appear
+    in each of their sets, so a chunk of pages only needs to count them once.
+    """
+    reader = PdfReader(pdf_path)
+    sizes = _object_sizes(reader, os.path.getsize(pdf_path))
+    generations = {idnum: generation for generation, table in reader.xref.items() for idnum in table}
+    children = {}  # object number -> object numbers it references, parsed once per file
+
+    def collect_refs(value, refs, top=True):
+        if isinstance(value, IndirectObject):
+            refs.append(value.idnum)
+        elif isinstance(value, dict):
+            # A page object inside another page's graph (e.g. a link target) is not followed
+            if not top and value.get("/Type") == "/Page":
+                return
+            for key, item in value.items():
+                if key not in _PAGE_SIZE_SKIP_KEYS:
+                    collect_refs(item, refs, False)
+        elif isinstance(value, list):
+            for item in value:
+                collect_refs(item, refs, False)
+
+    def references(idnum):
+        refs = children.get(idnum)
+        if refs is None:
+            refs = []
+            generation = generations.get(idnum, 0)
+            obj = reader.get_object(IndirectObject(idnum, generation, reader))
+            if not (isinstance(obj, dict) and obj.get("/Type") == "/Page"):
+                collect_refs(obj, refs)
+            children[idnum] = refs
+            # Stream data is only needed for its size, which comes from the xref
+            reader.resolved_objects.pop((generation, idnum), None)
+        return refs
+
+    page_objects = []
+    for page in reader.pages:
+        refs = []
+        collect_refs(page, refs)
+        # Walk up the page tree for inherited attributes the page does not set itself
+        parent = page.get("/Parent")
+        while parent is not None:
+            parent = parent.get_object()
+            for key in _INHERITABLE_PAGE_KEYS:
+                if key not in page and key in parent:
+                    collect_refs(parent.raw_get(key), refs, False)
+            parent = parent.get("/Parent")
+
+        seen = {page.indirect_reference.idnum} if page.indirect_reference else set()
+        pending = [idnum for idnum in refs if idnum not in seen]
+        while pending:
+            idnum = pending.pop()
+            if idnum in seen:
+                continue
+            seen.add(idnum)
+            pending.extend(child for child in references(idnum) if child not in seen)
+        page_objects.append(seen)
+    return page_objects, sizes
+
+
+def plan_size_chunks(page_objects, sizes, max_bytes, pages=None):
+    """Cut pages into consecutive chunks whose estimated size stays under max_bytes.
+
+    pages defaults to every page. Objects shared by pages of the same chunk
+    are counted once. A single page that is over the budget on its own
+    becomes a chunk by itself. Returns a list of lists of page indices.
+    """
+    if pages is None:
+        pages = range(len(page_objects))
+
+    chunks = []
+    current = []
+    included = set()
+    total = SPLIT_FILE_OVERHEAD
+    for page_idx in pages:
+        added = page_objects[page_idx] - included
+        cost = sum(sizes.get(idnum, 0) for idnum in added)
+        if current and total + cost > max_bytes:
+            chunks.append(current)
+            current = []
+            included = set()
+            total = SPLIT_FILE_OVERHEAD
+            added = page_objects[page_idx]
+            cost = sum(sizes.get(idnum, 0) for idnum in added)
+        current.append(page_idx)
+        included |= added
+        total += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_by_size(pdf_path, output_dir, base_name, max_bytes, progress_callback=None, cancel_check=None,
+                  finalize=None):
+    """Split a PDF into consecutive parts that each stay under max_bytes.
+
+    Chunks are planned from estimate_page_objects, written, and measured;
+    a part that comes out over the budget is deleted and only that chunk
+    is planned again against a proportionally smaller budget (or halved)
+    and rewritten. Parts are named <base_name>_part_<n>.pdf in page order.
+
+    finalize(output_path), if given, rewrites each part in place (for
+    example to linearize it) before it is measured, so the budget holds
+    for the final file.
+
+    progress_callback(done, total) is called with the number of pages
+    written. Returns a list of (output_path, first_page, last_page, size)
+    with 0-based page indices, or None if cancel_check() returned True. A
+    part whose size is still over max_bytes is a single page that does
+    not fit the budget by itself.
+    """
+    page_objects, sizes = estimate_page_objects(pdf_path)
+    total_pages = len(page_objects)
+    pending = deque(plan_size_chunks(page_objects, sizes, max_bytes))
+
+    parts = []
+    done = 0
+    with PDFIUM_LOCK:
+        source = pdfium.PdfDocument(pdf_path)
+    try:
+        while pending:
+            if cancel_check and cancel_check():
+                return None
+
+            chunk = pending.popleft()
+            output_path = os.path.join(output_dir, f"{base_name}_part_{len(parts) + 1}.pdf")
+            with PDFIUM_LOCK:
+                output_pdf = pdfium.PdfDocument.new()
+                try:
+                    output_pdf.import_pages(source, chunk)
+                    output_pdf.save(output_path)
+                finally:
+                    output_pdf.close()
+            if finalize:
+                finalize(output_path)
+            size = os.path.getsize(output_path)
+
+            if size > max_bytes and len(chunk) > 1:
+                # Re-plan just this chunk with the budget scaled by how far the estimate was off
+                os.remove(output_path)
+                smaller = plan_size_chunks(page_objects, sizes, max_bytes * max_bytes / size * 0.95, chunk)
+                if len(smaller) < 2:
+                    middle = len(chunk) // 2
+                    smaller = [chunk[:middle], chunk[middle:]]
+                pending.extendleft(reversed(smaller))
+                continue
+
+            parts.append((output_path, chunk[0], chunk[-1], size))
+            done += len(chunk)
+            if progress_callback:
+                progress_callback(done, total_pages)
+    finally:
+        with PDFIUM_LOCK:
+            source.close()
+    return parts
+
+
+def equal_page_ranges(total_pages, parts):
+    """Cut total_pages into `parts` consecutive (first, last) ranges whose lengths differ by at most one"""
+    parts = max(1, min(parts, total_pages))
+    base, extra = divmod(total_pages, parts)
+    ranges = []
+    first = 0
+    for i in range(parts):
+        length = base + (1 if i < extra else 0)
+        ranges.append((first, first + length - 1))
+        first += length
+    return ranges
+
+
+def _write_file(output_path, data):
+    with open(output_path, "wb") as f:
+        f.write(data)
+
+
+def split_ranges(pdf_path, ranges, output_dir, base_name, max_workers=4, progress_callback=None, cancel_check=None):
+    """Write several page ranges of one PDF to separate files in a single pass.
+
+    ranges is a list of (first, last) 0-based inclusive page indices; they
+    may overlap. The source is parsed once and shared by every output:
+    each part is assembled and serialized to memory while holding
+    PDFIUM_LOCK, and the files are written by a pool of threads while the
+    next part is being built. At most 2 * max_workers finished parts wait
+    in memory at a time. Parts are named <base_name>_pages_<a>-<b>.pdf
+    (or <base_name>_page_<a>.pdf for one page) with 1-based numbers.
+
+    progress_callback(done, total) is called as files are written.
+    Returns the list of output paths, or None if cancel_check() returned
+    True (parts already written are kept).
+    """
+    total = len(ranges)
+    output_paths = []
+    in_flight = deque()
+    done = 0
+
+    def wait_oldest():
+        nonlocal done
+        in_flight.popleft().result()
+        done += 1
+        if progress_callback:
+            progress_callback(done, total)
+
+    with PDFIUM_LOCK:
+        source = pdfium.PdfDocument(pdf_path)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for first, last in ranges:
+                if cancel_check and cancel_check():
+                    break
+
+                name = f"{base_name}_page_{first + 1}.pdf" if first == last else f"{base_name}_pages_{first + 1}-{last + 1}.pdf"
+                output_path = os.path.join(output_dir, name)
+                buffer = io.BytesIO()
+                with PDFIUM_LOCK:
+                    output_pdf = pdfium.PdfDocument.new()
+                    try:
+                        output_pdf.import_pages(source, list(range(first, last + 1)))
+                        output_pdf.save(buffer)
+                    finally:
+                        output_pdf.close()
+
+                in_flight.append(pool.submit(_write_file, output_path, buffer.getbuffer()))
+                output_paths.append(output_path)
+                while len(in_flight) >= 2 * max_workers:
+                    wait_oldest()
+
+            while in_flight:
+                wait_oldest()
+    finally:
+        with PDFIUM_LOCK:
+            source.close()
+
+    if len(output_paths) < total:
+        return None
+    return output_paths
+
+
+# Resource name under which append_page_stamps registers a stamp on each page
+STAMP_XOBJECT_NAME = "/P2IStamp"
+
+
+def _last_startxref(f):
+    """Return the offset named by the last startxref keyword in an open PDF file"""
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(max(0, size - 4096))
+    tail = f.read()
+    position = tail.rfind(b"startxref")
+    if position < 0:
+        raise ValueError("The PDF has no startxref entry, so it cannot be updated incrementally.")
+    return int(tail[position + len(b"startxref"):].split()[0])
+
+
+def _page_content_refs(page):
+    """Return the content stream references of a page as a list"""
+    contents = page.raw_get("/Contents") if "/Contents" in page else None
+    if contents is None:
+        return []
+    resolved = contents.get_object()
+    if isinstance(resolved, ArrayObject):
+        return list(resolved)
+    return [contents]
+
+
+def append_page_stamps(pdf_path, output_path, stamp_for_page, progress_callback=None, cancel_check=None):
+    """Draw a stamp over pages by appending an incremental update to the file.
+
+    stamp_for_page(page) returns a PyPDF2 page whose content is painted
+    over the given page (or None to leave it alone). Each distinct stamp
+    is written once as a Form XObject; every stamped page gets a new
+    version of its page object, under the same object number, whose
+    content array wraps the original streams in q/Q and then paints the
+    stamp. The new objects and an xref section (a table or a stream,
+    matching the file) whose /Prev points at the original one follow the
+    original bytes unchanged. Nothing else is parsed, so the work grows
+    with the page count, not the file size.
+
+    With output_path equal to pdf_path the update is appended to the file
+    in place and the original bytes are neither read nor written again;
+    otherwise the file is first copied to output_path in one sequential
+    pass.
+
+    progress_callback(done, total) is called per page. Returns the number
+    of stamped pages, or None if cancel_check() returned True (a copy is
+    removed, an in-place file is truncated back to its original length).
+    Raises ValueError for encrypted files.
+    """
+    with open(pdf_path, "rb") as source:
+        reader = PdfReader(source)
+        if reader.is_encrypted:
+            raise ValueError("Encrypted PDFs cannot be updated incrementally. Remove the password first.")
+        previous_xref = _last_startxref(source)
+        source.seek(previous_xref)
+        xref_is_stream = not source.read(4).startswith(b"xref")
+        source.seek(-1, os.SEEK_END)
+        ends_with_newline = source.read(1) in (b"\n", b"\r")
+        original_size = source.tell()
+
+        in_place = os.path.abspath(output_path) == os.path.abspath(pdf_path)
+        if not in_place:
+            shutil.copyfile(pdf_path, output_path)
+        completed = False
+        try:
+            with open(output_path, "ab") as out:
+                if not ends_with_newline:
+                    out.write(b"\n")
+
+                # New objects are numbered after every object the file already has
+                highest = max([idnum for table in reader.xref.values() for idnum in table] +
+                              list(reader.xref_objStm), default=0)
+                next_number = max(int(reader.trailer.get("/Size", 0)), highest + 1)
+                offsets = {}  # object number -> (offset, generation) of the objects written here
+
+                def write_object(number, obj, generation=0):
+                    offsets[number] = (out.tell(), generation)
+                    out.write(b"%d %d obj\n" % (number, generation))
+                    obj.write_to_stream(out, None)
+                    out.write(b"\nendobj\n")
+
+                def new_object(obj):
+                    nonlocal next_number
+                    number = next_number
+                    next_number += 1
+                    write_object(number, obj)
+                    return IndirectObject(number, 0, None)
+
+                def flate_stream(data, extra=None):
+                    stream = StreamObject()
+                    stream._data = zlib.compress(data)
+                    stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+                    for key, value in (extra or {}).items():
+                        stream[NameObject(key)] = value
+                    return stream
+
+                # Objects of the stamp documents, copied on first use: (reader id, idnum) -> new reference
+                copied = {}
+
+                def copy_stamp_object(value):
+                    if isinstance(value, IndirectObject):
+                        key = (id(value.pdf), value.idnum)
+                        ref = copied.get(key)
+                        if ref is None:
+                            # Reserve the number first so reference cycles resolve to it
+                            nonlocal next_number
+                            ref = IndirectObject(next_number, 0, None)
+                            next_number += 1
+                            copied[key] = ref
+                            target = value.get_object()
+                            write_object(ref.idnum, copy_stamp_object(target) if target is not None else NullObject())
+                        return ref
+                    if isinstance(value, StreamObject):
+                        stream = StreamObject()
+                        stream._data = value._data
+                        for key, item in value.items():
+                            if key != "/Length":
+                                stream[NameObject(key)] = copy_stamp_object(item)
+                        return stream
+                    if isinstance(value, DictionaryObject):
+                        return DictionaryObject({NameObject(key): copy_stamp_object(item) for key, item in value.items()})
+                    if isinstance(value, ArrayObject):
+                        return ArrayObject(copy_stamp_object(item) for item in value)
+                    return value
+
+                stamp_refs = {}  # id(stamp page) -> Form XObject reference
+                paint_refs = {}  # XObject name -> content stream that paints it
+                resource_refs = {}  # (page resources idnum, stamp idnum, name) -> new resources reference
+                save_ref = new_object(flate_stream(b"q\n"))
+
+                total = len(reader.pages)
+                stamped = 0
+                for i, page in enumerate(reader.pages):
+                    if cancel_check and cancel_check():
+                        return None
+
+                    stamp = stamp_for_page(page)
+                    if stamp is not None:
+                        stamp_ref = stamp_refs.get(id(stamp))
+                        if stamp_ref is None:
+                            resources = stamp.raw_get("/Resources") if "/Resources" in stamp else DictionaryObject()
+                            form = flate_stream(stamp.get_contents().get_data() if stamp.get_contents() else b"", {
+                                "/Type": NameObject("/XObject"),
+                                "/Subtype": NameObject("/Form"),
+                                "/BBox": ArrayObject(stamp.mediabox),
+                                "/Resources": copy_stamp_object(resources),
+                            })
+                            stamp_ref = new_object(form)
+                            stamp_refs[id(stamp)] = stamp_ref
+
+                        # Register the stamp next to the page's own XObjects under a free name
+                        raw_resources = page.raw_get("/Resources") if "/Resources" in page else None
+                        resources = raw_resources.get_object() if raw_resources is not None else DictionaryObject()
+                        xobjects = resources.get("/XObject")
+                        xobjects = xobjects.get_object() if xobjects is not None else DictionaryObject()
+                        name = STAMP_XOBJECT_NAME
+                        suffix = 1
+                        while name in xobjects:
+                            suffix += 1
+                            name = f"{STAMP_XOBJECT_NAME}{suffix}"
+
+                        resources_key = (raw_resources.idnum if isinstance(raw_resources, IndirectObject) else None,
+                                         stamp_ref.idnum, name)
+                        new_resources = resource_refs.get(resources_key)
+                        if new_resources is None:
+                            new_xobjects = DictionaryObject(xobjects)
+                            new_xobjects[NameObject(name)] = stamp_ref
+                            new_resources = DictionaryObject(resources)
+                            new_resources[NameObject("/XObject")] = new_xobjects
+                            # Pages sharing one resources object keep sharing one updated copy
+                            if resources_key[0] is not None:
+                                new_resources = new_object(new_resources)
+                                resource_refs[resources_key] = new_resources
+
+                        paint_ref = paint_refs.get(name)
+                        if paint_ref is None:
+                            paint_ref = new_object(flate_stream(b"Q\nq %s Do Q\n" % name.encode()))
+                            paint_refs[name] = paint_ref
+
+                        new_page = DictionaryObject(page)
+                        new_page[NameObject("/Contents")] = ArrayObject([save_ref] + _page_content_refs(page) + [paint_ref])
+                        new_page[NameObject("/Resources")] = new_resources
+                        ref = page.indirect_reference
+                        write_object(ref.idnum, new_page, ref.generation)
+                        stamped += 1
+
+                    if progress_callback:
+                        progress_callback(i + 1, total)
+
+                # Cross-reference section for the new and replaced objects, chained to the original
+                trailer = DictionaryObject()
+                for key in ("/Root", "/Info", "/ID"):
+                    if key in reader.trailer:
+                        trailer[NameObject(key)] = reader.trailer.raw_get(key)
+                trailer[NameObject("/Prev")] = NumberObject(previous_xref)
+
+                if xref_is_stream:
+                    xref_number = next_number
+                    next_number += 1
+                    xref_offset = out.tell()
+                    offsets[xref_number] = (xref_offset, 0)
+                    numbers = sorted(offsets)
+                    width = max(4, (max(offset for offset, _ in offsets.values()).bit_length() + 7) // 8)
+                    rows = b"".join(b"\x01" + offsets[n][0].to_bytes(width, "big") + offsets[n][1].to_bytes(2, "big")
+                                    for n in numbers)
+                    index = ArrayObject()
+                    for start, count in _number_runs(numbers):
+                        index.extend([NumberObject(start), NumberObject(count)])
+                    trailer.update({
+                        NameObject("/Type"): NameObject("/XRef"),
+                        NameObject("/Size"): NumberObject(next_number),
+                        NameObject("/W"): ArrayObject([NumberObject(1), NumberObject(width), NumberObject(2)]),
+                        NameObject("/Index"): index,
+                    })
+                    xref = StreamObject()
+                    xref._data = rows
+                    xref.update(trailer)
+                    out.write(b"%d 0 obj\n" % xref_number)
+                    xref.write_to_stream(out, None)
+                    out.write(b"\nendobj\n")
+                else:
+                    xref_offset = out.tell()
+                    numbers = sorted(offsets)
+                    out.write(b"xref\n")
+                    for start, count in _number_runs(numbers):
+                        out.write(b"%d %d\n" % (start, count))
+                        for number in range(start, start + count):
+                            offset, generation = offsets[number]
+                            out.write(b"%010d %05d n\r\n" % (offset, generation))
+                    trailer[NameObject("/Size")] = NumberObject(next_number)
+                    out.write(b"trailer\n")
+                    trailer.write_to_stream(out, None)
+                    out.write(b"\n")
+                out.write(b"startxref\n%d\n%%%%EOF\n" % xref_offset)
+            completed = True
+            return stamped
+        finally:
+            if not completed:
+                try:
+                    if in_place:
+                        os.truncate(output_path, original_size)
+                    else:
+                        os.remove(output_path)
+                except OSError:
+                    pass
+
+
+def _number_runs(numbers):
+    """Yield (start, count) for each run of consecutive numbers in a sorted list"""
+    start = previous = None
+    for number in numbers:
+        if start is None:
+            start = previous = number
+        elif number == previous + 1:
+            previous = number
+        else:
+            yield start, previous - start + 1
+            start = previous = number
+    if start is not None:
+        yield start, previous - start + 1
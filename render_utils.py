@@ -0,0 +1,378 @@
+# render_utils.py - Background page rendering helpers for the PDF organizer
+import hashlib
+import itertools
+import os
+import queue
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pypdfium2 as pdfium
+from PIL import Image
+
+# pdfium is not thread-safe, so every call into it must hold this lock
+PDFIUM_LOCK = threading.RLock()
+
+# Job priorities (lower values are rendered first)
+PRIORITY_PREVIEW = -10
+PRIORITY_VISIBLE = 0
+PRIORITY_PREFETCH = 5
+PRIORITY_BACKGROUND = 10
+
+
+class RenderPool:
+    """Fixed-size pool of worker threads that runs render jobs by priority.
+
+    Every job is tagged with a channel and the generation of that channel
+    it was submitted in. Calling new_generation(channel) invalidates
+    everything still queued on that channel, so jobs for widgets that have
+    since been destroyed, or pages the user has already navigated away
+    from, are dropped instead of rendered.
+    """
+
+    def __init__(self, num_workers=2, max_open_documents=8):
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._generations = {}  # channel -> current generation number
+        self._documents = OrderedDict()  # pdf_path -> open PdfDocument
+        self._max_open_documents = max_open_documents
+        self._workers = []
+
+        for i in range(num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"p2i-render-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def current_generation(self, channel="default"):
+        return self._generations.get(channel, 0)
+
+    def new_generation(self, channel="default"):
+        """Invalidate the jobs queued on channel and return the new generation number"""
+        self._generations[channel] = self._generations.get(channel, 0) + 1
+        return self._generations[channel]
+
+    def submit(self, func, priority=PRIORITY_BACKGROUND, callback=None, channel="default", generation=None):
+        """Queue func to run on a worker; callback(result, error) runs on that worker"""
+        if generation is None:
+            generation = self.current_generation(channel)
+        self._queue.put((priority, next(self._sequence), (channel, generation), func, callback))
+
+    def open_document(self, pdf_path):
+        """Return a shared PdfDocument for pdf_path (caller must hold PDFIUM_LOCK)"""
+        pdf = self._documents.get(pdf_path)
+        if pdf is not None:
+            self._documents.move_to_end(pdf_path)
+            return pdf
+
+        pdf = pdfium.PdfDocument(pdf_path)
+        self._documents[pdf_path] = pdf
+
+        # Close the least recently used documents beyond the limit
+        while len(self._documents) > self._max_open_documents:
+            _, old_pdf = self._documents.popitem(last=False)
+            old_pdf.close()
+        return pdf
+
+    def close_documents(self):
+        """Close every cached document handle"""
+        with PDFIUM_LOCK:
+            for pdf in self._documents.values():
+                pdf.close()
+            self._documents.clear()
+
+    def shutdown(self):
+        """Drop queued jobs and stop the worker threads"""
+        for channel in list(self._generations):
+            self.new_generation(channel)
+        for _ in self._workers:
+            # A None job is the stop signal; the huge priority keeps it behind real work
+            self._queue.put((float("inf"), next(self._sequence), None, None, None))
+
+    def _worker_loop(self):
+        while True:
+            _, _, tag, func, callback = self._queue.get()
+            if func is None:
+                break
+
+            # Skip jobs submitted before the last new_generation() call on their channel
+            channel, generation = tag
+            if generation != self.current_generation(channel):
+                continue
+
+            try:
+                result, error = func(), None
+            except Exception as e:
+                result, error = None, e
+
+            if callback:
+                callback(result, error)
+
+
+def render_to_fit(page, width, height, rotation=0):
+    """Render a page straight into a width x height box, preserving aspect ratio.
+
+    The pdfium scale is computed from the page's point size, so the
+    bitmap comes out at thumbnail resolution in a single render call with
+    no resampling pass afterwards. Call with PDFIUM_LOCK held.
+    """
+    page_width, page_height = page.get_size()
+    if rotation % 180 == 90:
+        page_width, page_height = page_height, page_width
+
+    scale = min(width / page_width, height / page_height)
+    return page.render(scale=scale, rotation=rotation % 360).to_pil()
+
+
+class PreviewCache:
+    """Per-page image pyramid of preview renders, bounded by total bytes.
+
+    Pages are rendered at fixed levels (base_scale times a power of two).
+    A zoom request is served from the smallest cached level that has at
+    least the resolution it needs, so zooming out or back in never
+    re-renders. A new render only happens when more detail is required.
+    Safe to use from any thread.
+    """
+
+    def __init__(self, base_scale=1.5, min_exponent=-2, max_exponent=2, max_bytes=192 * 1024 * 1024):
+        self.levels = [base_scale * 2 ** exponent for exponent in range(min_exponent, max_exponent + 1)]
+        self.max_bytes = max_bytes
+        self._pages = OrderedDict()  # page key -> {level: PIL image}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def level_for(self, scale):
+        """Return the pyramid level to render for a requested display scale"""
+        for level in self.levels:
+            if level >= scale - 1e-6:
+                return level
+        return self.levels[-1]
+
+    def lookup(self, page_key, scale):
+        """Return (level, image) for the smallest cached level covering scale, or None"""
+        with self._lock:
+            pyramid = self._pages.get(page_key)
+            if not pyramid:
+                return None
+            self._pages.move_to_end(page_key)
+
+            needed = self.level_for(scale)
+            covering = [level for level in pyramid if level >= needed - 1e-6]
+            if not covering:
+                return None
+            level = min(covering)
+            return level, pyramid[level]
+
+    def add(self, page_key, level, img):
+        """Store a rendered level, evicting least recently used pages over the budget"""
+        size = img.width * img.height * len(img.getbands())
+        with self._lock:
+            pyramid = self._pages.setdefault(page_key, {})
+            old = pyramid.get(level)
+            if old is not None:
+                self._bytes -= old.width * old.height * len(old.getbands())
+            pyramid[level] = img
+            self._pages.move_to_end(page_key)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and len(self._pages) > 1:
+                _, evicted = self._pages.popitem(last=False)
+                for old in evicted.values():
+                    self._bytes -= old.width * old.height * len(old.getbands())
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._bytes = 0
+
+    @staticmethod
+    def scale_image(level, img, scale):
+        """Resize a level image down to the requested display scale"""
+        if abs(level - scale) < 1e-6:
+            return img
+        width = max(1, round(img.width * scale / level))
+        height = max(1, round(img.height * scale / level))
+        # reducing_gap lets PIL shrink by whole factors first, which keeps this fast
+        return img.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+
+
+# Content hashes memoized by (path, size, mtime) so each file is read only once
+_content_hashes = {}
+_content_hashes_pending = {}  # Identity -> Event set when the thread hashing it is done
+_content_hashes_lock = threading.Lock()
+
+
+def _file_identity(path):
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def cached_content_hash(path):
+    """Return the memoized content hash of path, or None if it has not been computed yet"""
+    try:
+        identity = _file_identity(path)
+    except OSError:
+        return None
+    with _content_hashes_lock:
+        return _content_hashes.get(identity)
+
+
+def file_content_hash(path, chunk_size=1024 * 1024):
+    """Return a hex digest of the file's contents, memoized while the file is unchanged.
+    If another thread is already hashing the same file, wait for its result."""
+    identity = _file_identity(path)
+    with _content_hashes_lock:
+        digest = _content_hashes.get(identity)
+        if digest is not None:
+            return digest
+        pending = _content_hashes_pending.get(identity)
+        if pending is None:
+            pending = _content_hashes_pending[identity] = threading.Event()
+            owner = True
+        else:
+            owner = False
+
+    if not owner:
+        pending.wait()
+        with _content_hashes_lock:
+            digest = _content_hashes.get(identity)
+        # None means the other thread failed; try again ourselves
+        return digest if digest is not None else file_content_hash(path, chunk_size)
+
+    try:
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        with _content_hashes_lock:
+            _content_hashes[identity] = digest
+        return digest
+    finally:
+        with _content_hashes_lock:
+            del _content_hashes_pending[identity]
+        pending.set()
+
+
+class ThumbnailCache:
+    """Two-level thumbnail cache: a byte-budgeted LRU in memory backed by PNGs on disk.
+
+    The memory level holds PhotoImage objects and must only be used from
+    the Tk thread. The disk level stores PIL images keyed by the source
+    file's content hash, so it survives restarts and renamed files, and
+    is safe to use from render workers.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_bytes=64 * 1024 * 1024,
+                 max_disk_bytes=256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".p2i" / "thumbnails"
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory = OrderedDict()  # key -> (photo, size in bytes)
+        self._memory_bytes = 0
+
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = None  # Measured on first write
+
+    @staticmethod
+    def disk_key(content_hash, page_idx, rotation, width, height):
+        """Build the on-disk key for a rendered page thumbnail"""
+        return f"{content_hash}_{page_idx}_{rotation}_{width}x{height}"
+
+    # Memory level (Tk thread only)
+    def get(self, key):
+        """Return the cached PhotoImage for key, or None"""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        self._memory.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, photo):
+        """Add a PhotoImage, evicting least recently used entries over the budget"""
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+
+        size = photo.width() * photo.height() * 4  # Tk keeps 32-bit pixels
+        self._memory[key] = (photo, size)
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, (_, old_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+
+    def __contains__(self, key):
+        return key in self._memory
+
+    def clear_memory(self):
+        """Drop every in-memory entry (the disk level is kept)"""
+        self._memory.clear()
+        self._memory_bytes = 0
+
+    # Disk level (any thread)
+    def _disk_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.png"
+
+    def load(self, key):
+        """Return the stored PIL image for key, or None"""
+        path = self._disk_path(key)
+        try:
+            with Image.open(path) as img:
+                img.load()
+                os.utime(path)  # Mark as recently used for pruning
+                return img
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, img):
+        """Write a PIL image to the disk level, pruning old entries over the budget"""
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            img.save(tmp_path, format="PNG", compress_level=1)
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError:
+            # The disk cache is best effort; rendering still succeeded
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(entry.stat().st_size for entry in self._disk_entries())
+            else:
+                self._disk_bytes += size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+
+    def _disk_entries(self):
+        if not self.cache_dir.is_dir():
+            return []
+        return list(self.cache_dir.glob("*/*.png"))
+
+    def _prune_disk(self):
+        """Delete least recently used files until the disk level is at 80% of its budget"""
+        entries = []
+        for entry in self._disk_entries():
+            try:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            except OSError:
+                continue
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * 0.8
+        for _, size, entry in entries:
+            if total <= target:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                continue
+        self._disk_bytes = total
@@ -0,0 +1,582 @@
+# security_utils.py - Password and watermark processing for the PDF security tab
+import csv
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+from PIL import Image
+from PyPDF2 import PdfReader, PdfWriter
+
+import linearize_utils
+import pdf_utils
+
+# Longest side, in pixels, of the image embedded for an image watermark
+WATERMARK_MAX_PIXELS = 2048
+
+# Records which outputs of a batch are up to date, kept in the output folder
+BATCH_MANIFEST_NAME = ".p2i-security-batch.json"
+
+# Settings that are only fingerprinted through a salted scrypt hash, never in the clear
+PASSWORD_KEYS = ("owner_password", "user_password", "current_password")
+
+# Encryption engines for "add_password"
+ENCRYPTION_AES256 = "aes256"  # AES-256 (PDF 2.0, revision 6) through pikepdf or qpdf
+ENCRYPTION_RC4_128 = "rc4_128"  # 128-bit RC4 through PyPDF2, for very old readers
+
+# How often (in bytes written) ProgressFile reports progress
+PROGRESS_STEP_BYTES = 1024 * 1024
+
+
+def to_float(value):
+    """Convert any numeric value to float, including Decimal types."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class WatermarkStamper:
+    """Builds watermark stamps and caches one per page geometry.
+
+    Settings are plain values (no Tk variables), so a stamper can be
+    created in a worker process. watermark_type is "text" or "image";
+    position is one of center, top-left, top-right, bottom-left and
+    bottom-right; opacity is a percentage and rotation is in degrees.
+    """
+
+    def __init__(self, watermark_type="text", text="CONFIDENTIAL", image_path=None,
+                 opacity=30, position="center", rotation=45):
+        self.watermark_type = watermark_type
+        self.text = text
+        self.image_path = image_path
+        self.opacity = opacity
+        self.position = position
+        self.rotation = rotation
+        self._stamps = {}  # (left, bottom, width, height, /Rotate) -> stamp page
+        self._image = None  # Prepared image watermark, see _prepare_image
+
+    def stamp_for(self, page):
+        """Return the watermark stamp for a page's geometry"""
+        # Pages with the same geometry share one stamp, built the first time it is needed
+        mediabox = page.mediabox
+        key = (
+            to_float(mediabox.left),
+            to_float(mediabox.bottom),
+            to_float(mediabox.width),
+            to_float(mediabox.height),
+            int(page.get("/Rotate", 0) or 0) % 360
+        )
+        watermark = self._stamps.get(key)
+        if watermark is None:
+            watermark = self._create_stamp(*key)
+            self._stamps[key] = watermark
+        return watermark
+
+    def _create_stamp(self, left, bottom, width, height, page_rotation):
+        """Create a watermark PDF page for one page geometry.
+        The watermark is drawn upright and positioned as the page is displayed,
+        so pages with a /Rotate entry get it in the expected corner."""
+        from reportlab.pdfgen import canvas
+
+        packet = BytesIO()
+        c = canvas.Canvas(packet, pagesize=(left + width, bottom + height))
+        c.translate(left, bottom)
+
+        # Map the displayed (rotated) page onto the unrotated page space
+        if page_rotation == 90:
+            c.transform(0, 1, -1, 0, width, 0)
+            width, height = height, width
+        elif page_rotation == 180:
+            c.transform(-1, 0, 0, -1, width, height)
+        elif page_rotation == 270:
+            c.transform(0, -1, 1, 0, 0, height)
+            width, height = height, width
+
+        if self.watermark_type == "text":
+            self._draw_text(c, width, height)
+        else:
+            self._draw_image(c, width, height)
+
+        c.save()
+
+        # Create PDF page from the canvas
+        packet.seek(0)
+        watermark_pdf = PdfReader(packet)
+        return watermark_pdf.pages[0]
+
+    def _draw_text(self, c, width, height):
+        """Draw the text watermark on a reportlab canvas of the given page size"""
+        opacity = self.opacity / 100
+
+        # Calculate position based on selection
+        position = self.position
+        if position == "center":
+            x, y = width / 2, height / 2
+        elif position == "top-left":
+            x, y = width * 0.1, height * 0.9
+        elif position == "top-right":
+            x, y = width * 0.9, height * 0.9
+        elif position == "bottom-left":
+            x, y = width * 0.1, height * 0.1
+        elif position == "bottom-right":
+            x, y = width * 0.9, height * 0.1
+
+        # Set text properties
+        c.setFont("Helvetica", 72)
+        c.setFillColorRGB(0, 0, 0, opacity)
+
+        # Draw rotated text
+        c.saveState()
+        c.translate(x, y)
+        c.rotate(self.rotation)
+        c.drawCentredString(0, 0, self.text)
+        c.restoreState()
+
+    def _prepare_image(self):
+        """Load the watermark image once, with opacity and rotation baked in.
+        Returns (ImageReader, width, height, rotated width, rotated height)."""
+        from reportlab.lib.utils import ImageReader
+
+        opacity = self.opacity / 100
+
+        with Image.open(self.image_path) as source:
+            img = source.convert("RGBA")
+
+        # A watermark never needs more detail than this; keeps the output small for huge images
+        img.thumbnail((WATERMARK_MAX_PIXELS, WATERMARK_MAX_PIXELS), Image.LANCZOS)
+        img_width, img_height = img.size
+
+        # Scale the alpha channel for opacity, then rotate (counterclockwise, like the canvas)
+        img.putalpha(img.getchannel("A").point(lambda a: round(a * opacity)))
+        if self.rotation % 360:
+            img = img.rotate(self.rotation, resample=Image.BICUBIC, expand=True)
+
+        return ImageReader(img), img_width, img_height, img.width, img.height
+
+    def _draw_image(self, c, width, height):
+        """Draw the image watermark on a reportlab canvas of the given page size"""
+        if self._image is None:
+            self._image = self._prepare_image()
+        image, img_width, img_height, rotated_width, rotated_height = self._image
+
+        # Calculate image dimensions (resize to fit but maintain aspect ratio)
+        max_dimension = min(width, height) * 0.5  # Use 50% of page size
+
+        ratio = min(max_dimension / img_width, max_dimension / img_height)
+        new_width = img_width * ratio
+        new_height = img_height * ratio
+
+        # Calculate position based on selection
+        position = self.position
+        if position == "center":
+            x, y = width / 2 - new_width / 2, height / 2 - new_height / 2
+        elif position == "top-left":
+            x, y = width * 0.05, height * 0.95 - new_height
+        elif position == "top-right":
+            x, y = width * 0.95 - new_width, height * 0.95 - new_height
+        elif position == "bottom-left":
+            x, y = width * 0.05, height * 0.05
+        elif position == "bottom-right":
+            x, y = width * 0.95 - new_width, height * 0.05
+
+        # The prepared image is already rotated, so center its expanded box on the same point
+        draw_width = rotated_width * ratio
+        draw_height = rotated_height * ratio
+        c.drawImage(image, x + new_width / 2 - draw_width / 2, y + new_height / 2 - draw_height / 2,
+                    width=draw_width, height=draw_height, mask="auto")
+
+
+def permission_flags(settings):
+    """Return the PDF permission bits for the allow_* entries of settings"""
+    permissions = 0
+    if settings.get("allow_printing", True):
+        permissions |= 4  # Print document
+    if settings.get("allow_copying", True):
+        permissions |= 16  # Copy content
+    if settings.get("allow_modification", True):
+        permissions |= 8  # Modify contents
+    return permissions
+
+
+def is_aes256_available():
+    """Return True if pikepdf or qpdf is installed to write AES-256 encrypted PDFs."""
+    return linearize_utils.pikepdf is not None or linearize_utils.get_qpdf()[0] is not None
+
+
+def default_encryption():
+    """AES-256 when a backend is installed, otherwise RC4 128-bit"""
+    return ENCRYPTION_AES256 if is_aes256_available() else ENCRYPTION_RC4_128
+
+
+class ProgressFile:
+    """Wraps a binary file and reports the bytes written through it.
+
+    PyPDF2 serializes (and, with RC4, encrypts) objects straight into the
+    stream it is given, so counting bytes is the only way to follow that
+    phase. progress_callback(fraction) is called about every
+    PROGRESS_STEP_BYTES with written / expected_bytes, capped at 1.0.
+    """
+
+    def __init__(self, f, expected_bytes, progress_callback):
+        self._f = f
+        self._expected = max(1, expected_bytes)
+        self._callback = progress_callback
+        self._written = 0
+        self._next_report = PROGRESS_STEP_BYTES
+
+    def write(self, data):
+        written = self._f.write(data)
+        self._written += len(data)
+        if self._written >= self._next_report:
+            self._next_report = self._written + PROGRESS_STEP_BYTES
+            self._callback(min(1.0, self._written / self._expected))
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def write_pdf(writer, output_path, expected_bytes=None, progress_callback=None):
+    """Write a PdfWriter to output_path, reporting progress(fraction) as bytes go out"""
+    with open(output_path, "wb") as output_file:
+        if progress_callback and expected_bytes:
+            writer.write(ProgressFile(output_file, expected_bytes, progress_callback))
+        else:
+            writer.write(output_file)
+    if progress_callback:
+        progress_callback(1.0)
+
+
+def encrypt_aes256(input_path, output_path, settings, progress_callback=None):
+    """Write an AES-256 encrypted copy of a PDF.
+
+    Uses pikepdf when it is installed and the qpdf tool otherwise; both
+    encrypt each object and stream as it is written, so memory use does
+    not grow with the file. Passwords and allow_* permissions come from
+    settings. progress_callback(fraction) reports the write.
+    """
+    user_password = settings.get("user_password") or ""
+    owner_password = settings.get("owner_password") or ""
+    allow_printing = settings.get("allow_printing", True)
+    allow_copying = settings.get("allow_copying", True)
+    allow_modification = settings.get("allow_modification", True)
+
+    pikepdf = linearize_utils.pikepdf
+    if pikepdf is not None:
+        allow = pikepdf.Permissions(
+            extract=allow_copying,
+            modify_annotation=allow_modification,
+            modify_assembly=allow_modification,
+            modify_form=allow_modification,
+            modify_other=allow_modification,
+            print_lowres=allow_printing,
+            print_highres=allow_printing
+        )
+        with pikepdf.open(input_path) as pdf:
+            pdf.save(
+                output_path,
+                encryption=pikepdf.Encryption(owner=owner_password, user=user_password, R=6, allow=allow),
+                progress=(lambda percent: progress_callback(percent / 100)) if progress_callback else None
+            )
+        return
+
+    exe, _ = linearize_utils.get_qpdf()
+    if exe is None:
+        raise RuntimeError("AES-256 encryption requires pikepdf (pip install pikepdf) or the qpdf tool.")
+
+    # Arguments go through an @file so the passwords never show up in process listings
+    args = [
+        "--progress",
+        "--encrypt", user_password, owner_password, "256",
+        f"--print={'full' if allow_printing else 'none'}",
+        f"--extract={'y' if allow_copying else 'n'}",
+        f"--modify={'all' if allow_modification else 'none'}",
+        "--",
+        input_path,
+        output_path,
+    ]
+    fd, args_path = tempfile.mkstemp(prefix="p2i-qpdf-", suffix=".args")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(args) + "\n")
+        process = subprocess.Popen([exe, f"@{args_path}"], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+        # Progress lines look like "qpdf: out.pdf: write progress: 42%"
+        for line in process.stdout:
+            if progress_callback and "progress:" in line:
+                try:
+                    progress_callback(int(line.rsplit(":", 1)[1].strip().rstrip("%")) / 100)
+                except ValueError:
+                    pass
+        stderr = process.stderr.read()
+        # Exit code 3 means qpdf wrote the file but reported warnings
+        if process.wait() not in (0, 3):
+            raise RuntimeError(f"qpdf error: {stderr.strip()}")
+    finally:
+        os.remove(args_path)
+
+
+def encrypt_writer(writer, settings):
+    """Apply the owner/user passwords and permissions of settings to a PdfWriter"""
+    # Try newer PyPDF2 API first
+    try:
+        writer.encrypt(
+            user_password=settings.get("user_password") or "",
+            owner_password=settings.get("owner_password") or "",
+            use_128bit=True,
+            permissions_flag=permission_flags(settings)
+        )
+    except TypeError:
+        # Fall back to older PyPDF2 API
+        writer.encrypt(
+            user_pwd=settings.get("user_password") or "",
+            owner_pwd=settings.get("owner_password") or "",
+            use_128bit=True
+        )
+
+
+def process_pdf(input_path, output_path, settings, stamper=None, progress_callback=None, cancel_check=None):
+    """Apply security and watermark settings to one PDF; returns the number of pages.
+
+    settings is a dict with "mode" ("none", "add_password" or
+    "remove_password"), the passwords and allow_* permissions,
+    "encryption" (ENCRYPTION_AES256 or ENCRYPTION_RC4_128, default from
+    default_encryption()), an optional
+    "watermark" dict of WatermarkStamper arguments and "incremental",
+    which appends the watermark as an incremental update instead of
+    rewriting the file. A stamper can be passed in to reuse its stamps.
+
+    progress_callback(fraction, message) reports the overall progress
+    (0 to 1) with a status message. Returns None, without an output
+    file, if cancel_check() returned True.
+    """
+    mode = settings.get("mode", "none")
+    watermark = settings.get("watermark")
+    if watermark and stamper is None:
+        stamper = WatermarkStamper(**watermark)
+
+    def report(fraction, message):
+        if progress_callback:
+            progress_callback(fraction, message)
+
+    if stamper is not None and settings.get("incremental") and mode == "none":
+        return pdf_utils.append_page_stamps(
+            input_path, output_path, stamper.stamp_for,
+            progress_callback=lambda done, total: report(done / total, f"Processing page {done}/{total}..."),
+            cancel_check=cancel_check
+        )
+
+    if mode == "add_password" and settings.get("encryption", default_encryption()) == ENCRYPTION_AES256:
+        if stamper is None:
+            # Nothing to change but the encryption: no PyPDF2 rewrite at all
+            report(0, "Encrypting (AES-256)...")
+            encrypt_aes256(input_path, output_path, settings,
+                           lambda fraction: report(fraction, "Encrypting (AES-256)..."))
+            return len(PdfReader(input_path).pages)
+
+        # Stamp into a private temporary file next to the output, then encrypt that
+        fd, tmp_path = tempfile.mkstemp(suffix=".pdf", prefix=".p2i-stamped-",
+                                        dir=os.path.dirname(os.path.abspath(output_path)))
+        os.close(fd)
+        try:
+            unencrypted = dict(settings, mode="none")
+            pages = process_pdf(input_path, tmp_path, unencrypted, stamper,
+                                lambda fraction, message: report(fraction * 0.8, message), cancel_check)
+            if pages is None:
+                return None
+            report(0.8, "Encrypting (AES-256)...")
+            encrypt_aes256(tmp_path, output_path, settings,
+                           lambda fraction: report(0.8 + fraction * 0.2, "Encrypting (AES-256)..."))
+        finally:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return pages
+
+    password = (settings.get("current_password") or None) if mode == "remove_password" else None
+    reader = PdfReader(input_path, password=password)
+    writer = PdfWriter()
+    total_pages = len(reader.pages)
+    # Pages take 80% of the progress, writing the file the rest
+    for i, page in enumerate(reader.pages):
+        if cancel_check and cancel_check():
+            return None
+        report((i + 1) / total_pages * 0.8, f"Processing page {i + 1}/{total_pages}...")
+        if stamper is not None:
+            page.merge_page(stamper.stamp_for(page))
+        writer.add_page(page)
+
+    if mode == "add_password":
+        report(0.8, "Applying security settings...")
+        encrypt_writer(writer, settings)
+
+    report(0.8, "Saving output file...")
+    write_pdf(writer, output_path, os.path.getsize(input_path),
+              lambda fraction: report(0.8 + fraction * 0.2, "Saving output file..."))
+    return total_pages
+
+
+def settings_digest(settings, salt):
+    """Fingerprint of the settings, so outputs made with other settings are redone.
+
+    The fingerprint is stored in the output folder, so passwords only go
+    in through scrypt with the manifest's random salt, which keeps it
+    from being a fast way to test password guesses. A watermark image is
+    identified by its size and modification time as well as its path, so
+    replacing the image redoes the outputs.
+    """
+    public = {key: value for key, value in settings.items() if key not in PASSWORD_KEYS}
+    watermark = settings.get("watermark")
+    if watermark and watermark.get("image_path"):
+        try:
+            stat = os.stat(watermark["image_path"])
+            public["watermark_image"] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            pass
+
+    secrets = json.dumps([settings.get(key) or "" for key in PASSWORD_KEYS]).encode()
+    digest = hashlib.blake2b(json.dumps(public, sort_keys=True, default=str).encode(), digest_size=16)
+    digest.update(hashlib.scrypt(secrets, salt=salt, n=2 ** 15, r=8, p=1, maxmem=64 * 1024 * 1024, dklen=16))
+    return digest.hexdigest()
+
+
+def find_pdfs(input_dir, exclude_dir=None):
+    """Return the paths of the PDFs under input_dir relative to it, sorted"""
+    exclude_dir = os.path.abspath(exclude_dir) if exclude_dir else None
+    found = []
+    for root, dirs, files in os.walk(input_dir):
+        # Never pick up our own outputs when the output folder is inside the input folder
+        if exclude_dir:
+            dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != exclude_dir]
+        for name in files:
+            if name.lower().endswith(".pdf"):
+                found.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return sorted(found)
+
+
+# State of a batch worker process, set up by _init_batch_worker
+_batch_cancel_event = None
+
+
+def _init_batch_worker(cancel_event):
+    global _batch_cancel_event
+    _batch_cancel_event = cancel_event
+
+
+def _batch_job(input_path, output_path, settings):
+    """Process one file of a batch (runs in a worker process).
+
+    Returns (status, pages, seconds, error) with status "processed",
+    "failed" or "canceled". The output is written to a temporary name and
+    renamed, so an interrupted run never leaves a file that looks done.
+    """
+    if _batch_cancel_event is not None and _batch_cancel_event.is_set():
+        return "canceled", 0, 0.0, ""
+
+    start = time.perf_counter()
+    tmp_path = output_path + ".part"
+    try:
+        pages = process_pdf(input_path, tmp_path, settings)
+        os.replace(tmp_path, output_path)
+        return "processed", pages, time.perf_counter() - start, ""
+    except Exception as e:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return "failed", 0, time.perf_counter() - start, str(e)
+
+
+def batch_process(input_dir, output_dir, settings, max_workers=None, progress_callback=None,
+                  cancel_event=None, report_path=None):
+    """Apply settings to every PDF under input_dir, on a pool of worker processes.
+
+    Outputs mirror the folder structure of input_dir inside output_dir.
+    A file is skipped when its output exists and the manifest in
+    output_dir shows it was made from the same source (size and mtime)
+    with the same settings. progress_callback(done, total, relative_path)
+    is called as files finish; setting cancel_event (a
+    pdf_utils.PROCESS_CONTEXT.Event) stops before the next file.
+
+    A CSV report with one row per file (status, pages, seconds, error) is
+    written to report_path, by default a timestamped file in output_dir.
+    Returns (rows, report_path) where rows are dicts with the CSV columns.
+    """
+    manifest_path = os.path.join(output_dir, BATCH_MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        salt = bytes.fromhex(data["salt"])
+        manifest = data["files"]
+    except (OSError, ValueError, TypeError, KeyError):
+        # No manifest yet (or an unreadable one): start over with a new salt
+        salt = os.urandom(16)
+        manifest = {}
+
+    digest = settings_digest(settings, salt)
+    rows = []
+    jobs = []
+    for relative_path in find_pdfs(input_dir, exclude_dir=output_dir):
+        input_path = os.path.join(input_dir, relative_path)
+        output_path = os.path.join(output_dir, relative_path)
+        stat = os.stat(input_path)
+        record = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "settings": digest}
+        if os.path.isfile(output_path) and manifest.get(relative_path) == record:
+            rows.append({"file": relative_path, "status": "skipped", "pages": "", "seconds": "0.000", "error": ""})
+        else:
+            jobs.append((relative_path, input_path, output_path, record))
+
+    total = len(rows) + len(jobs)
+    done = len(rows)
+    if progress_callback and done:
+        progress_callback(done, total, "")
+
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or 2) - 1)
+    max_workers = max(1, min(max_workers, len(jobs) or 1))
+
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=pdf_utils.PROCESS_CONTEXT,
+                                   initializer=_init_batch_worker, initargs=(cancel_event,))
+    try:
+        futures = {}
+        for relative_path, input_path, output_path, record in jobs:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            futures[executor.submit(_batch_job, input_path, output_path, settings)] = (relative_path, record)
+
+        for future in as_completed(futures):
+            relative_path, record = futures[future]
+            status, pages, seconds, error = future.result()
+            rows.append({"file": relative_path, "status": status, "pages": pages if pages else "",
+                         "seconds": f"{seconds:.3f}", "error": error})
+            if status == "processed":
+                manifest[relative_path] = record
+            else:
+                manifest.pop(relative_path, None)
+            done += 1
+            if progress_callback:
+                progress_callback(done, total, relative_path)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+        tmp_manifest = manifest_path + ".tmp"
+        try:
+            with open(tmp_manifest, "w", encoding="utf-8") as f:
+                json.dump({"salt": salt.hex(), "files": manifest}, f)
+            os.replace(tmp_manifest, manifest_path)
+        except OSError:
+            pass  # Only costs a redo of these files next time
+
+    rows.sort(key=lambda row: row["file"])
+    if report_path is None:
+        report_path = os.path.join(output_dir, time.strftime("security_report_%Y%m%d_%H%M%S.csv"))
+    with open(report_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["file", "status", "pages", "seconds", "error"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows, report_path
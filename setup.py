@@ -23,6 +23,7 @@ setup(
         "Pillow>=9.0.0",
         "pypdfium2>=3.3.0",
         "reportlab>=3.6.0",
+        "rl_accel>=0.9.0",
         "PyPDF2>=2.0.0",
         "tkinterdnd2>=0.3.0",
     ],
@@ -0,0 +1,346 @@
+# thumbnail_grid.py - Virtualized page thumbnail grid
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+# Pixels the pointer must travel before a press turns into a drag
+DRAG_THRESHOLD = 5
+
+
+class _Tile:
+    """Canvas items that make up one thumbnail slot in the grid"""
+
+    def __init__(self, canvas):
+        self.index = -1
+        self.border = canvas.create_rectangle(0, 0, 0, 0, fill="white", outline="gray", width=1)
+        self.image = canvas.create_image(0, 0, anchor=tk.CENTER)
+        self.message = canvas.create_text(0, 0, text="", fill="gray")
+        self.label = canvas.create_text(0, 0, text="", anchor=tk.N)
+
+    def items(self):
+        return (self.border, self.image, self.message, self.label)
+
+
+class ThumbnailGrid:
+    """Scrollable thumbnail grid that only creates tiles for the rows in view.
+
+    Tiles are drawn as items on a single canvas and recycled as the user
+    scrolls, so the cost of a redraw depends on the size of the window
+    rather than on the number of pages.
+
+    Callbacks:
+        get_count()                -> number of pages to show
+        get_image(index, visible)  -> PhotoImage, or None if it is still rendering
+        is_selected(index)         -> whether the tile should be highlighted
+        on_select(index, event)    -> a tile was clicked
+        on_move(from_idx, to_idx)  -> a tile was dragged onto another tile
+    """
+
+    def __init__(self, parent, get_count, get_image, is_selected, on_select, on_move,
+                 max_tile_width=150, overscan_rows=2):
+        self.get_count = get_count
+        self.get_image = get_image
+        self.is_selected = is_selected
+        self.on_select = on_select
+        self.on_move = on_move
+        self.max_tile_width = max_tile_width
+        self.overscan_rows = overscan_rows
+
+        # Layout, recomputed by refresh()
+        self.tile_width = max_tile_width
+        self.tile_height = int(max_tile_width * 1.414)  # Approximate A4 ratio
+        self.label_height = 20
+        self.padding = 10
+        self.num_cols = 1
+
+        self.tiles = {}  # page index -> _Tile currently showing it
+        self.free_tiles = []  # hidden tiles ready for reuse
+        self._update_pending = False
+        self.drag_data = {"index": None, "x": 0, "y": 0, "dragging": False, "ghost": None}
+
+        # Canvas with scrollbar
+        self.frame = ttk.Frame(parent)
+
+        self.scrollbar = ttk.Scrollbar(self.frame)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas = tk.Canvas(
+            self.frame,
+            bg="lightgray",
+            highlightthickness=0,
+            yscrollcommand=self._on_yscroll
+        )
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.config(command=self.canvas.yview)
+
+        # Scrolling and resizing
+        self.canvas.bind("<Configure>", self._on_configure)
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+        # Selection and drag and drop reordering
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_motion)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+
+    # Layout
+    @property
+    def cell_width(self):
+        return self.tile_width + self.padding
+
+    @property
+    def cell_height(self):
+        return self.tile_height + self.label_height + self.padding
+
+    def _layout_for_width(self, canvas_width):
+        """Return (tile_width, num_cols) for a canvas of the given width"""
+        tile_width = max(40, min(self.max_tile_width, canvas_width - 20))
+        num_cols = max(1, canvas_width // (tile_width + self.padding))
+        return tile_width, num_cols
+
+    def refresh(self):
+        """Recompute the layout and redraw every tile in view"""
+        canvas_width = self.canvas.winfo_width()
+        if canvas_width <= 1:
+            canvas_width = 200  # Default if not realized yet
+
+        self.tile_width, self.num_cols = self._layout_for_width(canvas_width)
+        self.tile_height = int(self.tile_width * 1.414)  # Approximate A4 ratio
+
+        # Every tile is repositioned below, so return them all to the pool first
+        self._release_tiles(list(self.tiles))
+
+        self._update_scrollregion()
+        self._update_visible()
+
+    def pages_changed(self, event, *args):
+        """Patch the tiles in view after a page model change event.
+
+        Tiles of pages that only moved keep their images and are shifted
+        to their new cells; only updated or newly exposed pages ask
+        get_image() again. The scroll position is left where it was.
+        """
+        if event == "reset":
+            self.refresh()
+            return
+
+        if event == "update":
+            first_visible, last_visible = self._row_range(0)
+            for index in args[0]:
+                tile = self.tiles.get(index)
+                if tile is not None:
+                    self._load_image(tile, first_visible <= index // self.num_cols <= last_visible)
+            return
+
+        if event == "insert":
+            start, count = args
+
+            def new_index(index):
+                return index + count if index >= start else index
+        elif event == "remove":
+            removed = args[0]  # Ascending old indices
+            self._release_tiles([index for index in removed if index in self.tiles])
+
+            def new_index(index):
+                return index - bisect.bisect_left(removed, index)
+        elif event == "move":
+            moved, to_idx = args  # Ascending old indices, new start of the block
+
+            def new_index(index):
+                position = bisect.bisect_left(moved, index)
+                if position < len(moved) and moved[position] == index:
+                    return to_idx + position
+                # Index among the pages that stayed, shifted past the block if needed
+                index -= position
+                return index + len(moved) if index >= to_idx else index
+        else:
+            return
+
+        self.tiles = {new_index(index): tile for index, tile in self.tiles.items()}
+        for index, tile in self.tiles.items():
+            tile.index = index
+            self._place_tile(tile)
+
+        self._update_scrollregion()
+        self._update_visible()
+
+    def _update_scrollregion(self):
+        canvas_width = max(self.canvas.winfo_width(), self.num_cols * self.cell_width)
+        total_rows = (self.get_count() + self.num_cols - 1) // self.num_cols
+        self.canvas.configure(scrollregion=(0, 0, canvas_width, max(1, total_rows * self.cell_height)))
+
+    def _row_range(self, overscan):
+        """Return (first_row, last_row) for the rows in view plus overscan"""
+        top = self.canvas.canvasy(0)
+        view_height = self.canvas.winfo_height()
+        if view_height <= 1:
+            view_height = 600  # Default if not realized yet
+
+        first_row = int(top // self.cell_height) - overscan
+        last_row = int((top + view_height) // self.cell_height) + overscan
+        return max(0, first_row), last_row
+
+    def _update_visible(self):
+        """Assign tiles to the rows in view and recycle the rest"""
+        self._update_pending = False
+        count = self.get_count()
+        first_row, last_row = self._row_range(self.overscan_rows)
+        first_visible, last_visible = self._row_range(0)
+
+        start = first_row * self.num_cols
+        end = min(count, (last_row + 1) * self.num_cols)
+
+        # Recycle tiles that scrolled out of range
+        self._release_tiles([i for i in self.tiles if i < start or i >= end])
+
+        # Fill the slots that came into range
+        for index in range(start, end):
+            if index in self.tiles:
+                continue
+            row = index // self.num_cols
+            self._show_tile(index, first_visible <= row <= last_visible)
+
+    def _release_tiles(self, indices):
+        """Hide the tiles showing the given indices and return them to the pool"""
+        for index in indices:
+            tile = self.tiles.pop(index)
+            tile.index = -1
+            for item in tile.items():
+                self.canvas.itemconfigure(item, state="hidden")
+            self.free_tiles.append(tile)
+
+    def _show_tile(self, index, visible):
+        tile = self.free_tiles.pop() if self.free_tiles else _Tile(self.canvas)
+        tile.index = index
+        self.tiles[index] = tile
+
+        self._place_tile(tile)
+        for item in tile.items():
+            self.canvas.itemconfigure(item, state="normal")
+        self._load_image(tile, visible)
+
+    def _place_tile(self, tile):
+        """Position the tile's items in the grid cell of its index"""
+        index = tile.index
+        row, col = divmod(index, self.num_cols)
+        x = col * self.cell_width + self.padding / 2
+        y = row * self.cell_height + self.padding / 2
+        self.canvas.coords(tile.border, x, y, x + self.tile_width, y + self.tile_height)
+        self.canvas.coords(tile.image, x + self.tile_width / 2, y + self.tile_height / 2)
+        self.canvas.coords(tile.message, x + self.tile_width / 2, y + self.tile_height / 2)
+        self.canvas.coords(tile.label, x + self.tile_width / 2, y + self.tile_height + 2)
+
+        self.canvas.itemconfigure(tile.label, text=f"Page {index + 1}")
+        self._style_tile(tile)
+
+    def _load_image(self, tile, visible):
+        self.canvas.itemconfigure(tile.message, text="")
+        photo = self.get_image(tile.index, visible)
+        self.canvas.itemconfigure(tile.image, image=photo if photo is not None else "")
+
+    def _style_tile(self, tile):
+        if self.is_selected(tile.index):
+            self.canvas.itemconfigure(tile.border, outline="blue", width=3)
+        else:
+            self.canvas.itemconfigure(tile.border, outline="gray", width=1)
+
+    # Updates from the owner
+    def set_image(self, index, photo):
+        """Show a finished thumbnail if its tile is still in view"""
+        tile = self.tiles.get(index)
+        if tile is not None:
+            self.canvas.itemconfigure(tile.message, text="")
+            self.canvas.itemconfigure(tile.image, image=photo)
+
+    def set_error(self, index, message="Error"):
+        """Mark a thumbnail as failed if its tile is still in view"""
+        tile = self.tiles.get(index)
+        if tile is not None:
+            self.canvas.itemconfigure(tile.image, image="")
+            self.canvas.itemconfigure(tile.message, text=message)
+
+    def update_selection(self):
+        """Restyle the tiles in view after the selection changed"""
+        for tile in self.tiles.values():
+            self._style_tile(tile)
+
+    def index_at(self, x, y):
+        """Return the page index of the tile at canvas coordinates, or None"""
+        col = int(x // self.cell_width)
+        row = int(y // self.cell_height)
+        if col < 0 or col >= self.num_cols or row < 0:
+            return None
+        index = row * self.num_cols + col
+        return index if index < self.get_count() else None
+
+    def see(self, index):
+        """Scroll so that the tile for index is in view"""
+        count = self.get_count()
+        if index < 0 or index >= count:
+            return
+        total_rows = (count + self.num_cols - 1) // self.num_cols
+        row = index // self.num_cols
+        first_row, last_row = self._row_range(0)
+        if row < first_row or row >= last_row:
+            self.canvas.yview_moveto(row / max(1, total_rows))
+
+    # Event handlers
+    def _on_yscroll(self, first, last):
+        """Keep the scrollbar in sync and refill tiles once scrolling settles"""
+        self.scrollbar.set(first, last)
+        if not self._update_pending:
+            self._update_pending = True
+            self.canvas.after_idle(self._update_visible)
+
+    def _on_configure(self, event):
+        # Only a change in tile size or column count requires a new layout
+        if self._layout_for_width(event.width) != (self.tile_width, self.num_cols) or not self.tiles:
+            self.refresh()
+        else:
+            self._update_visible()
+
+    def _on_mousewheel(self, event):
+        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+
+    def _on_press(self, event):
+        """Remember which tile the pointer went down on"""
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        self.drag_data.update(index=self.index_at(x, y), x=x, y=y, dragging=False)
+
+    def _on_motion(self, event):
+        """Drag an outline of the pressed tile around"""
+        if self.drag_data["index"] is None:
+            return
+
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        if not self.drag_data["dragging"]:
+            if abs(x - self.drag_data["x"]) < DRAG_THRESHOLD and abs(y - self.drag_data["y"]) < DRAG_THRESHOLD:
+                return
+            self.drag_data["dragging"] = True
+            self.drag_data["ghost"] = self.canvas.create_rectangle(
+                0, 0, self.tile_width, self.tile_height, outline="blue", width=2, dash=(4, 2))
+
+        # Center the outline under the pointer
+        self.canvas.coords(
+            self.drag_data["ghost"],
+            x - self.tile_width / 2, y - self.tile_height / 2,
+            x + self.tile_width / 2, y + self.tile_height / 2
+        )
+
+    def _on_release(self, event):
+        """Finish a click or a drag reorder"""
+        from_idx = self.drag_data["index"]
+        if from_idx is None:
+            return
+
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        if self.drag_data["dragging"]:
+            self.canvas.delete(self.drag_data["ghost"])
+            to_idx = self.index_at(x, y)
+            if to_idx is not None and to_idx != from_idx:
+                self.on_move(from_idx, to_idx)
+        else:
+            self.on_select(from_idx, event)
+
+        self.drag_data.update(index=None, dragging=False, ghost=None)
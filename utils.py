@@ -99,6 +99,11 @@ def display_preview(canvas, img, photo_ref):
     # Return the photo so it can be stored (to prevent garbage collection)
     return photo
 
+def keep_disabled(widget):
+    """Disable a control for good, so set_controls_state never re-enables it"""
+    widget.configure(state=tk.DISABLED)
+    widget.keep_disabled = True
+
 def set_controls_state(parent, state):
     """Recursively enable or disable all interactive controls in a frame"""
     for widget in parent.winfo_children():
@@ -109,6 +114,9 @@ def set_controls_state(parent, state):
             # Don't disable Cancel button
             if isinstance(widget, ttk.Button) and widget["text"] == "Cancel":
                 continue
+            # Controls for features that are not installed stay disabled
+            if getattr(widget, "keep_disabled", False):
+                continue
             
             widget.configure(state=state)
 